@@ -1,199 +1,327 @@
+import inspect
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-import pandas as pd
-
-# Create a DataFrame for better data handling and seaborn integration
-data = pd.DataFrame({
-    'fiscal_years': ['FY21/22', 'FY22/23', 'FY23/24'],
-    'revenue': [18.3, 22.8, 29.0],  # in billion £
-    'net_profit': [-0.4, -0.1, 2.2],  # in billion £, profit before tax & exceptional items
-    'free_cash_flow': [-1.1, 0.5, 2.3],  # in billion £
-    'net_debt': [3.2, 3.0, 0.7],  # in billion £
-    'unit_sales': [376381, 354662, 431733]  # number of units
-})
+
+import store
+
+# Columns the charts read from the store
+COLUMNS = ['fiscal_years', 'revenue', 'net_profit', 'free_cash_flow', 'net_debt', 'unit_sales']
+
+# Styling shared by every chart; part of each chart's build key, so changing it
+# re-renders everything
+STYLE = {'theme': 'whitegrid', 'font.size': 12, 'palette': 'viridis'}
 
 # Set the seaborn theme for all plots
-sns.set_theme(style="whitegrid")
-plt.rcParams.update({'font.size': 12})
+sns.set_theme(style=STYLE['theme'])
+plt.rcParams.update({'font.size': STYLE['font.size']})
 
 # Custom color palette
-palette = sns.color_palette("viridis", 5)
+palette = sns.color_palette(STYLE['palette'], 5)
+
+# Fixed subplot margins, replacing a tight_layout solve on every render
+MARGINS = dict(left=0.1, right=0.98, bottom=0.12, top=0.92)
+
+
+# A pool of reusable text artists: grown on demand, extras hidden
+class TextPool:
+    def __init__(self, ax, **style):
+        self.ax = ax
+        self.style = style
+        self.texts = []
+
+    def update(self, items):
+        for i, (x, y, label, color) in enumerate(items):
+            if i == len(self.texts):
+                self.texts.append(self.ax.text(0, 0, '', **self.style))
+            text = self.texts[i]
+            text.set_position((x, y))
+            text.set_text(label)
+            if color is not None:
+                text.set_color(color)
+            text.set_visible(True)
+        for text in self.texts[len(items):]:
+            text.set_visible(False)
+
+
+# Categorical x axis shared by the line and bar panels
+def set_categories(ax, labels):
+    ax.set_xticks(range(len(labels)))
+    ax.set_xticklabels(labels)
+
+
+# Line with value annotations; optionally filled down to zero.
+# `label` maps a value to (text, color or None).
+class LinePanel:
+    def __init__(self, ax, column, color, marker, markersize, label, offset, fill=False, **text_style):
+        self.ax = ax
+        self.column = column
+        self.label = label
+        self.offset = offset
+        self.line, = ax.plot([], [], marker=marker, markersize=markersize, color=color, linewidth=3,
+                             markeredgecolor='w', markeredgewidth=0.75)
+        self.fill = ax.fill_between([0, 1], [0, 0], alpha=0.3, color=color) if fill else None
+        self.texts = TextPool(ax, ha='center', fontweight='bold', **text_style)
+
+    def update(self, data):
+        values = data[self.column].to_numpy()
+        x = np.arange(len(values))
+        self.line.set_data(x, values)
+
+        # Fill the area under the curve
+        if self.fill is not None:
+            self.fill.set_verts([np.column_stack([np.r_[x[0], x, x[-1]], np.r_[0, values, 0]])])
+
+        self.texts.update([(i, val + self.offset, *self.label(val)) for i, val in enumerate(values)])
+        set_categories(self.ax, data['fiscal_years'])
+        self.ax.relim()
+        if self.fill is not None:
+            self.ax.update_datalim([(x[0], 0)])
+        self.ax.autoscale_view()
+
+
+# Bars coloured by sign with value annotations
+class BarPanel:
+    def __init__(self, ax, column, above, below, **text_style):
+        self.ax = ax
+        self.column = column
+        self.above = above
+        self.below = below
+        self.bars = []
+        self.texts = TextPool(ax, ha='center', fontweight='bold', **text_style)
+        ax.xaxis.grid(False)
+
+    def update(self, data):
+        values = data[self.column].to_numpy()
+
+        # Bar artists are reused as long as the number of periods is the same
+        if len(self.bars) != len(values):
+            for bar in self.bars:
+                bar.remove()
+            self.bars = list(self.ax.bar(range(len(values)), np.zeros(len(values)), width=0.8))
+
+        items = []
+        for i, (bar, value) in enumerate(zip(self.bars, values)):
+            bar.set_height(value)
+            bar.set_facecolor(sns.desaturate('#FF5252' if value < 0 else '#4CAF50', 0.75))
+            text_color = 'white' if value < 0 else 'black'
+            y_pos = value - self.below if value < 0 else value + self.above
+            items.append((i, y_pos, f'£{value}B', text_color))
+        self.texts.update(items)
+
+        set_categories(self.ax, data['fiscal_years'])
+        self.ax.set_xlim(-0.5, len(values) - 0.5)
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+
+def billions(val):
+    return f'£{val}B', None
+
+
+def billions_signed(val):
+    return f'£{val}B', 'red' if val < 0 else 'green'
+
+
+def units(val):
+    return f'{val:,}', None
+
+
+# A chart whose figure, axes, styling and layout are built once; update()
+# only moves artist data, so rendering many entities skips figure
+# construction and layout solving
+class ChartTemplate:
+    figsize = (10, 6)
+    margins = MARGINS
+
+    def __init__(self):
+        self.fig = plt.figure(figsize=self.figsize)
+        self.build()
+        self.fig.subplots_adjust(**self.margins)
+
+    def build(self):
+        raise NotImplementedError
+
+    def update(self, data):
+        raise NotImplementedError
+
+    def save(self, data, path, dpi):
+        self.update(data)
+        self.fig.savefig(path, dpi=dpi)
+
+    def close(self):
+        plt.close(self.fig)
+
+
+# Single-panel chart with a title and axis labels
+class SingleChart(ChartTemplate):
+    title = ''
+    ylabel = ''
+    zero_line = False
+
+    def build(self):
+        self.ax = self.fig.add_subplot()
+        self.panel = self.make_panel(self.ax)
+        self.ax.set_title(self.title, fontsize=16, fontweight='bold')
+        self.ax.set_xlabel('Fiscal Year', fontsize=14)
+        self.ax.set_ylabel(self.ylabel, fontsize=14)
+        if self.zero_line:
+            self.ax.axhline(0, color='black', linewidth=1.5, alpha=0.7)
+        sns.despine(ax=self.ax, left=True, bottom=True)
+
+    def make_panel(self, ax):
+        raise NotImplementedError
+
+    def update(self, data):
+        self.panel.update(data)
+        return self.fig
+
 
 # Chart 1: Revenue Trend with enhanced styling
-plt.figure(figsize=(10, 6))
-ax = sns.lineplot(x='fiscal_years', y='revenue', data=data, marker='o', markersize=10, 
-                 color=palette[0], linewidth=3)
-                 
-# Add value annotations
-for i, val in enumerate(data['revenue']):
-    ax.text(i, val + 0.3, f'£{val}B', ha='center', fontweight='bold')
-
-plt.title('Revenue Growth Trend', fontsize=16, fontweight='bold')
-plt.xlabel('Fiscal Year', fontsize=14)
-plt.ylabel('Revenue (Billion £)', fontsize=14)
-sns.despine(left=True, bottom=True)
-plt.tight_layout()
-plt.savefig("enhanced_revenue_trend.png", dpi=300)
-plt.show()
+class RevenueTrend(SingleChart):
+    title = 'Revenue Growth Trend'
+    ylabel = 'Revenue (Billion £)'
+
+    def make_panel(self, ax):
+        return LinePanel(ax, 'revenue', palette[0], 'o', 10, billions, 0.3)
+
 
 # Chart 2: Net Profit Trend with enhanced styling
-plt.figure(figsize=(10, 6))
-bars = sns.barplot(x='fiscal_years', y='net_profit', data=data, 
-                  palette=['#FF5252' if x < 0 else '#4CAF50' for x in data['net_profit']])
-
-# Add value annotations
-for i, bar in enumerate(bars.patches):
-    value = data['net_profit'].iloc[i]
-    text_color = 'white' if value < 0 else 'black'
-    height = bar.get_height()
-    if height < 0:
-        y_pos = height - 0.2
-    else:
-        y_pos = height + 0.1
-    bars.text(bar.get_x() + bar.get_width()/2., y_pos, 
-             f'£{value}B', ha='center', va='bottom', fontweight='bold', color=text_color)
-
-plt.title('Net Profit Before Tax & Exceptions', fontsize=16, fontweight='bold')
-plt.xlabel('Fiscal Year', fontsize=14)
-plt.ylabel('Net Profit (Billion £)', fontsize=14)
-plt.axhline(0, color='black', linewidth=1.5, alpha=0.7)
-sns.despine(left=True, bottom=True)
-plt.tight_layout()
-plt.savefig("enhanced_net_profit_trend.png", dpi=300)
-plt.show()
+class NetProfitTrend(SingleChart):
+    title = 'Net Profit Before Tax & Exceptions'
+    ylabel = 'Net Profit (Billion £)'
+    zero_line = True
+
+    def make_panel(self, ax):
+        return BarPanel(ax, 'net_profit', above=0.1, below=0.2, va='bottom')
+
 
 # Chart 3: Free Cash Flow with enhanced styling
-plt.figure(figsize=(10, 6))
-ax = sns.lineplot(x='fiscal_years', y='free_cash_flow', data=data, marker='s', markersize=10, 
-                 color=palette[2], linewidth=3)
-
-# Fill the area under the curve with gradient
-ax.fill_between(range(len(data)), data['free_cash_flow'], alpha=0.3, color=palette[2])
-
-# Add value annotations
-for i, val in enumerate(data['free_cash_flow']):
-    y_offset = 0.15 if val < 0 else 0.15
-    text_color = 'red' if val < 0 else 'green'
-    ax.text(i, val + y_offset, f'£{val}B', ha='center', fontweight='bold', color=text_color)
-    
-plt.title('Free Cash Flow Progression', fontsize=16, fontweight='bold')
-plt.xlabel('Fiscal Year', fontsize=14)
-plt.ylabel('Free Cash Flow (Billion £)', fontsize=14)
-plt.axhline(0, color='black', linewidth=1.5, alpha=0.7)
-sns.despine(left=True, bottom=True)
-plt.tight_layout()
-plt.savefig("enhanced_free_cash_flow.png", dpi=300)
-plt.show()
+class FreeCashFlowTrend(SingleChart):
+    title = 'Free Cash Flow Progression'
+    ylabel = 'Free Cash Flow (Billion £)'
+    zero_line = True
+
+    def make_panel(self, ax):
+        return LinePanel(ax, 'free_cash_flow', palette[2], 's', 10, billions_signed, 0.15, fill=True)
+
 
 # Chart 4: Net Debt with enhanced styling
-plt.figure(figsize=(10, 6))
-ax = sns.lineplot(x='fiscal_years', y='net_debt', data=data, marker='^', markersize=10, 
-                 color=palette[3], linewidth=3)
-
-# Add value annotations with downward trend highlighting
-for i, val in enumerate(data['net_debt']):
-    ax.text(i, val + 0.15, f'£{val}B', ha='center', fontweight='bold')
-    
-# Show the decrease with arrows
-for i in range(len(data) - 1):
-    if data['net_debt'].iloc[i+1] < data['net_debt'].iloc[i]:
-        plt.annotate('', 
-                    xy=(i+1, data['net_debt'].iloc[i+1]), 
-                    xytext=(i, data['net_debt'].iloc[i]),
-                    arrowprops=dict(arrowstyle='->', color='green', lw=2, alpha=0.5))
-
-plt.title('Net Debt Reduction', fontsize=16, fontweight='bold')
-plt.xlabel('Fiscal Year', fontsize=14)
-plt.ylabel('Net Debt (Billion £)', fontsize=14)
-sns.despine(left=True, bottom=True)
-plt.tight_layout()
-plt.savefig("enhanced_net_debt_trend.png", dpi=300)
-plt.show()
+class NetDebtTrend(SingleChart):
+    title = 'Net Debt Reduction'
+    ylabel = 'Net Debt (Billion £)'
+
+    def build(self):
+        super().build()
+        self.arrows = []
+
+    def make_panel(self, ax):
+        return LinePanel(ax, 'net_debt', palette[3], '^', 10, billions, 0.15)
+
+    def update(self, data):
+        self.panel.update(data)
+
+        # Show each decrease with an arrow
+        debt = data['net_debt'].to_numpy()
+        decreases = [i for i in range(len(debt) - 1) if debt[i + 1] < debt[i]]
+        while len(self.arrows) < len(decreases):
+            self.arrows.append(self.ax.annotate(
+                '', xy=(0, 0), xytext=(0, 0),
+                arrowprops=dict(arrowstyle='->', color='green', lw=2, alpha=0.5)
+            ))
+        for arrow, i in zip(self.arrows, decreases):
+            arrow.xy = (i + 1, debt[i + 1])
+            arrow.set_position((i, debt[i]))
+            arrow.set_visible(True)
+        for arrow in self.arrows[len(decreases):]:
+            arrow.set_visible(False)
+        return self.fig
+
 
 # Chart 5: Unit Sales with enhanced styling
-plt.figure(figsize=(10, 6))
-ax = sns.lineplot(x='fiscal_years', y='unit_sales', data=data, marker='o', markersize=10, 
-                 color=palette[4], linewidth=3)
-
-# Add value annotations with formatted numbers
-for i, val in enumerate(data['unit_sales']):
-    ax.text(i, val + 10000, f'{val:,}', ha='center', fontweight='bold')
-
-plt.title('Vehicle Unit Sales Performance', fontsize=16, fontweight='bold')
-plt.xlabel('Fiscal Year', fontsize=14)
-plt.ylabel('Units Sold', fontsize=14)
-sns.despine(left=True, bottom=True)
-plt.tight_layout()
-plt.savefig("enhanced_unit_sales_trend.png", dpi=300)
-plt.show()
+class UnitSalesTrend(SingleChart):
+    title = 'Vehicle Unit Sales Performance'
+    ylabel = 'Units Sold'
+    margins = dict(MARGINS, left=0.12, top=0.9)
+
+    def make_panel(self, ax):
+        return LinePanel(ax, 'unit_sales', palette[4], 'o', 10, units, 10000)
+
 
 # Bonus: Combined Dashboard-style visualization
-plt.figure(figsize=(15, 12))
-
-# Create a 3x2 grid for subplots
-grid = plt.GridSpec(3, 2, hspace=0.4, wspace=0.3)
-
-# Revenue trend - Top left
-ax1 = plt.subplot(grid[0, 0])
-sns.lineplot(x='fiscal_years', y='revenue', data=data, marker='o', ax=ax1, 
-            color=palette[0], linewidth=3, markersize=8)
-for i, val in enumerate(data['revenue']):
-    ax1.text(i, val + 0.3, f'£{val}B', ha='center', fontsize=10, fontweight='bold')
-ax1.set_title('Revenue (Billion £)', fontweight='bold')
-sns.despine(ax=ax1, left=True, bottom=True)
-
-# Net profit - Top right
-ax2 = plt.subplot(grid[0, 1])
-bars = sns.barplot(x='fiscal_years', y='net_profit', data=data, ax=ax2,
-                  palette=['#FF5252' if x < 0 else '#4CAF50' for x in data['net_profit']])
-for i, bar in enumerate(bars.patches):
-    value = data['net_profit'].iloc[i]
-    text_color = 'white' if value < 0 else 'black'
-    height = bar.get_height()
-    if height < 0:
-        y_pos = height - 0.15
-    else:
-        y_pos = height + 0.1
-    ax2.text(bar.get_x() + bar.get_width()/2., y_pos, 
-            f'£{value}B', ha='center', fontsize=10, fontweight='bold', color=text_color)
-ax2.set_title('Net Profit (Billion £)', fontweight='bold')
-ax2.axhline(0, color='black', linewidth=1.5, alpha=0.7)
-sns.despine(ax=ax2, left=True, bottom=True)
-
-# Free Cash Flow - Middle left
-ax3 = plt.subplot(grid[1, 0])
-sns.lineplot(x='fiscal_years', y='free_cash_flow', data=data, marker='s', ax=ax3,
-            color=palette[2], linewidth=3, markersize=8)
-ax3.fill_between(range(len(data)), data['free_cash_flow'], alpha=0.3, color=palette[2])
-for i, val in enumerate(data['free_cash_flow']):
-    y_offset = 0.15 if val < 0 else 0.15
-    text_color = 'red' if val < 0 else 'green'
-    ax3.text(i, val + y_offset, f'£{val}B', ha='center', fontsize=10, fontweight='bold', color=text_color)
-ax3.set_title('Free Cash Flow (Billion £)', fontweight='bold')
-ax3.axhline(0, color='black', linewidth=1.5, alpha=0.7)
-sns.despine(ax=ax3, left=True, bottom=True)
-
-# Net Debt - Middle right
-ax4 = plt.subplot(grid[1, 1])
-sns.lineplot(x='fiscal_years', y='net_debt', data=data, marker='^', ax=ax4,
-            color=palette[3], linewidth=3, markersize=8)
-for i, val in enumerate(data['net_debt']):
-    ax4.text(i, val + 0.15, f'£{val}B', ha='center', fontsize=10, fontweight='bold')
-ax4.set_title('Net Debt (Billion £)', fontweight='bold')
-sns.despine(ax=ax4, left=True, bottom=True)
-
-# Unit Sales - Bottom span
-ax5 = plt.subplot(grid[2, :])
-sns.lineplot(x='fiscal_years', y='unit_sales', data=data, marker='o', ax=ax5,
-            color=palette[4], linewidth=3, markersize=8)
-for i, val in enumerate(data['unit_sales']):
-    ax5.text(i, val + 10000, f'{val:,}', ha='center', fontsize=10, fontweight='bold')
-ax5.set_title('Unit Sales', fontweight='bold')
-sns.despine(ax=ax5, left=True, bottom=True)
-
-plt.suptitle('Financial Performance Dashboard FY21/22 - FY23/24', fontsize=20, fontweight='bold', y=0.98)
-plt.tight_layout()
-plt.subplots_adjust(top=0.92)
-plt.savefig("financial_dashboard.png", dpi=300)
-plt.show()
\ No newline at end of file
+class FinancialDashboard(ChartTemplate):
+    figsize = (15, 12)
+    margins = dict(top=0.92)
+
+    def build(self):
+        # Create a 3x2 grid for subplots
+        grid = self.fig.add_gridspec(3, 2, hspace=0.4, wspace=0.3)
+
+        panels = [
+            # Revenue trend - Top left
+            (grid[0, 0], 'Revenue (Billion £)',
+             lambda ax: LinePanel(ax, 'revenue', palette[0], 'o', 8, billions, 0.3, fontsize=10)),
+            # Net profit - Top right
+            (grid[0, 1], 'Net Profit (Billion £)',
+             lambda ax: BarPanel(ax, 'net_profit', above=0.1, below=0.15, fontsize=10)),
+            # Free Cash Flow - Middle left
+            (grid[1, 0], 'Free Cash Flow (Billion £)',
+             lambda ax: LinePanel(ax, 'free_cash_flow', palette[2], 's', 8, billions_signed, 0.15, fill=True, fontsize=10)),
+            # Net Debt - Middle right
+            (grid[1, 1], 'Net Debt (Billion £)',
+             lambda ax: LinePanel(ax, 'net_debt', palette[3], '^', 8, billions, 0.15, fontsize=10)),
+            # Unit Sales - Bottom span
+            (grid[2, :], 'Unit Sales',
+             lambda ax: LinePanel(ax, 'unit_sales', palette[4], 'o', 8, units, 10000, fontsize=10)),
+        ]
+
+        self.panels = []
+        for spec, title, make_panel in panels:
+            ax = self.fig.add_subplot(spec)
+            panel = make_panel(ax)
+            self.panels.append(panel)
+            ax.set_title(title, fontweight='bold')
+            ax.set_xlabel('fiscal_years')
+            ax.set_ylabel(panel.column)
+            if title.startswith(('Net Profit', 'Free Cash Flow')):
+                ax.axhline(0, color='black', linewidth=1.5, alpha=0.7)
+            sns.despine(ax=ax, left=True, bottom=True)
+
+        self.suptitle = self.fig.suptitle('', fontsize=20, fontweight='bold', y=0.98)
+
+    def update(self, data):
+        for panel in self.panels:
+            panel.update(data)
+        period = f"{data['fiscal_years'].iloc[0]} - {data['fiscal_years'].iloc[-1]}"
+        self.suptitle.set_text(f'Financial Performance Dashboard {period}')
+        return self.fig
+
+
+# Chart id -> (output file name, template class)
+CHARTS = {
+    'revenue': ('enhanced_revenue_trend', RevenueTrend),
+    'net_profit': ('enhanced_net_profit_trend', NetProfitTrend),
+    'free_cash_flow': ('enhanced_free_cash_flow', FreeCashFlowTrend),
+    'net_debt': ('enhanced_net_debt_trend', NetDebtTrend),
+    'unit_sales': ('enhanced_unit_sales_trend', UnitSalesTrend),
+    'dashboard': ('financial_dashboard', FinancialDashboard),
+}
+
+
+# Source of everything that draws `chart_id`, used in the build manifest key
+def chart_source(chart_id):
+    _, template = CHARTS[chart_id]
+    classes = [cls for cls in template.__mro__ if cls is not object]
+    helpers = [TextPool, set_categories, LinePanel, BarPanel, billions, billions_signed, units]
+    return "".join(inspect.getsource(obj) for obj in classes + helpers) + repr(MARGINS)
+
+
+if __name__ == "__main__":
+    # Load JLR's financials from the columnar store (only the columns the charts use)
+    data = store.load_financials(['JLR'], columns=COLUMNS)
+
+    for name, template in CHARTS.values():
+        template().update(data)
+        plt.savefig(f"{name}.png", dpi=300)
+        plt.show()
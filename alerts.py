@@ -0,0 +1,212 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import metrics
+import store
+
+# Series scored against their own trailing window: period-over-period
+# changes (the YoY columns) and the profit margin level
+ZSCORE_COLUMNS = ['revenue_yoy', 'unit_sales_yoy', 'net_profit_yoy', 'free_cash_flow_yoy', 'net_debt_yoy',
+                  'profit_margin']
+
+# Trailing periods a value is compared with, and how many of them must exist
+WINDOW = 8
+MIN_PERIODS = 4
+Z_THRESHOLD = 3.0
+
+# Series whose sign changes are reported
+SIGN_COLUMNS = ['net_profit', 'free_cash_flow']
+
+# Net debt / FCF levels (years of free cash flow to repay the debt) whose
+# crossing is reported; only defined while free cash flow is positive
+DEBT_TO_FCF_THRESHOLDS = [1.0, 3.0, 5.0]
+
+# Every rule scores in z-like units so one table ranks them all: sign flips
+# and threshold crossings start at the z threshold, plus one per 10% of
+# revenue swung or per extra threshold crossed
+FLIP_SWING_PCT = 10.0
+
+# Direction of a favourable move for each scanned series
+HIGHER_IS_BETTER = {
+    'revenue_yoy': True, 'unit_sales_yoy': True, 'net_profit_yoy': True, 'free_cash_flow_yoy': True,
+    'net_debt_yoy': False, 'profit_margin': True, 'net_profit': True, 'free_cash_flow': True,
+    'debt_to_fcf': False,
+}
+
+LABELS = {
+    'revenue_yoy': ("Revenue growth", "%"),
+    'unit_sales_yoy': ("Unit sales growth", "%"),
+    'net_profit_yoy': ("Net profit change", "B"),
+    'free_cash_flow_yoy': ("Free cash flow change", "B"),
+    'net_debt_yoy': ("Net debt change", "%"),
+    'profit_margin': ("Profit margin", "%"),
+    'net_profit': ("Net profit", "B"),
+    'free_cash_flow': ("Free cash flow", "B"),
+    'debt_to_fcf': ("Net debt / FCF", "x"),
+}
+
+# Index of every row within its company run
+def positions(starts):
+    index = np.arange(len(starts))
+    return index - np.maximum.accumulate(np.where(starts, index, 0))
+
+
+# Mean and standard deviation of the up to `window` valid values before each
+# row in the same company, from running sums: O(rows) whatever the window.
+# Also returns how many values each window held.
+def trailing_stats(values, valid, starts, window):
+    x = np.where(valid, values, 0.0)
+    sums = np.concatenate([[0.0], np.cumsum(x)])
+    squares = np.concatenate([[0.0], np.cumsum(x * x)])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+
+    end = np.arange(len(values))
+    begin = end - np.minimum(positions(starts), window)
+    n = counts[end] - counts[begin]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = (sums[end] - sums[begin]) / n
+        var = ((squares[end] - squares[begin]) - n * mean * mean) / (n - 1)
+    return mean, np.sqrt(np.maximum(var, 0)), n
+
+
+# Columns identifying the row an alert was raised on, as far as the table has them
+KEY_COLUMNS = ['company', 'fiscal_years', 'period_end']
+
+
+# Each rule returns a list of column dicts, one per scanned series; `level`
+# is the threshold crossed (threshold rule only)
+def zscore_alerts(frame, starts, window=WINDOW, min_periods=MIN_PERIODS, threshold=Z_THRESHOLD):
+    found = []
+    for column in ZSCORE_COLUMNS:
+        values = frame[column].to_numpy(dtype=np.float64)
+        valid = np.isfinite(values)
+        if column in metrics.YOY_COLUMNS:
+            # A company's first YoY value is a placeholder 0, not a change
+            valid &= ~starts
+        mean, std, n = trailing_stats(values, valid, starts, window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = (values - mean) / std
+        hit = np.flatnonzero(valid & (n >= min_periods) & (std > 0) & (np.abs(z) >= threshold))
+        found.append({
+            'row': hit, 'rule': "zscore", 'metric': column, 'value': values[hit], 'previous': mean[hit],
+            'score': np.abs(z[hit]), 'good': (z[hit] > 0) == HIGHER_IS_BETTER[column],
+        })
+    return found
+
+
+def sign_flip_alerts(frame, starts, base_score=Z_THRESHOLD):
+    revenue = frame['revenue'].to_numpy(dtype=np.float64)
+    found = []
+    for column in SIGN_COLUMNS:
+        values = frame[column].to_numpy(dtype=np.float64)
+        prev = metrics.shift_previous(values, starts)
+        with np.errstate(invalid='ignore'):
+            flipped = np.sign(values) * np.sign(prev) < 0
+        hit = np.flatnonzero(flipped)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            swing = np.abs(values[hit] - prev[hit]) / np.abs(revenue[hit]) * 100
+        found.append({
+            'row': hit, 'rule': "sign_flip", 'metric': column, 'value': values[hit], 'previous': prev[hit],
+            'score': base_score + np.nan_to_num(swing, posinf=0) / FLIP_SWING_PCT,
+            'good': (values[hit] > 0) == HIGHER_IS_BETTER[column],
+        })
+    return found
+
+
+def threshold_alerts(frame, starts, thresholds=DEBT_TO_FCF_THRESHOLDS, base_score=Z_THRESHOLD):
+    ratio = frame['debt_to_fcf'].to_numpy(dtype=np.float64)
+    ratio = np.where(frame['free_cash_flow'].to_numpy(dtype=np.float64) > 0, ratio, np.nan)
+    prev = metrics.shift_previous(ratio, starts)
+    levels = np.asarray(thresholds)[:, None]
+    with np.errstate(invalid='ignore'):
+        # Thresholds between the previous and the current ratio, per row
+        crossed = ((prev < levels) & (ratio >= levels)) | ((ratio < levels) & (prev >= levels))
+    n = crossed.sum(axis=0)
+    hit = np.flatnonzero(n)
+    rising = ratio[hit] > prev[hit]
+    # The threshold furthest along the move: highest when rising, lowest when falling
+    crossed_hit = crossed[:, hit]
+    highest = len(thresholds) - 1 - np.argmax(crossed_hit[::-1], axis=0)
+    lowest = np.argmax(crossed_hit, axis=0)
+    return [{
+        'row': hit, 'rule': "threshold", 'metric': "debt_to_fcf", 'value': ratio[hit], 'previous': prev[hit],
+        'score': base_score + n[hit] - 1, 'good': rising == HIGHER_IS_BETTER['debt_to_fcf'],
+        'level': np.asarray(thresholds)[np.where(rising, highest, lowest)],
+    }]
+
+
+# Scan a metric table (metrics.compute_metrics output, sorted by company then
+# period) for every rule at once and return the alerts ranked by score,
+# highest first; `top` keeps only the first rows. The result stays columnar
+# (rule and metric are categoricals); describe() adds readable messages.
+def scan(frame, top=None):
+    frame = frame.reset_index(drop=True)
+    starts = metrics.group_starts(frame)
+    found = zscore_alerts(frame, starts) + sign_flip_alerts(frame, starts) + threshold_alerts(frame, starts)
+
+    sizes = [len(f['row']) for f in found]
+    rows = np.concatenate([f['row'] for f in found])
+    score = np.concatenate([f['score'] for f in found])
+    order = np.lexsort((rows, -score))[:top]
+
+    def column(name, fill=np.nan):
+        return np.concatenate([f.get(name, np.full(size, fill)) for f, size in zip(found, sizes)])[order]
+
+    def labels(name):
+        names = list(dict.fromkeys(f[name] for f in found))
+        codes = np.repeat([names.index(f[name]) for f in found], sizes)[order]
+        return pd.Categorical.from_codes(codes, names)
+
+    rows = rows[order]
+    keys = {key: frame[key].take(rows).to_numpy() for key in KEY_COLUMNS if key in frame}
+    return pd.DataFrame({
+        **keys,
+        'rule': labels('rule'),
+        'metric': labels('metric'),
+        'value': column('value'),
+        'previous': column('previous'),
+        'score': score[order],
+        'good': column('good', False).astype(bool),
+        'level': column('level'),
+    })
+
+
+def message(alert):
+    label, unit = LABELS[alert.metric]
+    if alert.rule == "zscore":
+        direction = "above" if alert.value > alert.previous else "below"
+        return (f"{label} {alert.value:+.1f}{unit} is {alert.score:.1f}σ {direction} its trailing mean "
+                f"({alert.previous:+.1f}{unit})")
+    if alert.rule == "sign_flip":
+        turned = "positive" if alert.value > 0 else "negative"
+        return f"{label} turned {turned}: £{alert.previous:.1f}B → £{alert.value:.1f}B"
+    moved = "rose above" if alert.value > alert.previous else "fell below"
+    return f"{label} {moved} {alert.level:g}x: {alert.previous:.1f}x → {alert.value:.1f}x"
+
+
+# Alerts with a one-line message each; meant for the rows actually shown
+def describe(alerts):
+    return alerts.assign(message=[message(alert) for alert in alerts.itertuples()])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan every company in the store for metric anomalies")
+    parser.add_argument("companies", nargs="*", help="company ids to scan (default: every company)")
+    parser.add_argument("--top", type=int, default=20, help="number of alerts to print")
+    parser.add_argument("--store", help="store directory (default: FINANCIALS_STORE or data/store)")
+    args = parser.parse_args()
+
+    frame = store.load_financials(args.companies or None, path=args.store, columns=store.SCHEMA.names)
+    start = time.perf_counter()
+    alerts = scan(metrics.compute_metrics(frame))
+    elapsed = time.perf_counter() - start
+    with pd.option_context('display.max_colwidth', None, 'display.width', 200):
+        print(describe(alerts.head(args.top))[['company', 'fiscal_years', 'score', 'message']].to_string(index=False))
+    print(f"{len(alerts):,} alerts over {len(frame):,} rows in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,17 @@
+import functools
+
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from matplotlib.ticker import FuncFormatter
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+
+import commentary
+import cube
+import disk_cache
+import figures
+import financials
+import peers
+import profiling
+import scenarios
+import store
 
 # Set page configuration
 st.set_page_config(
@@ -16,26 +21,61 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Define the data
-fiscal_years = ['FY21/22', 'FY22/23', 'FY23/24']
-data = pd.DataFrame({
-    'fiscal_years': fiscal_years,
-    'revenue': [18.3, 22.8, 29.0],  # in billion £
-    'net_profit': [-0.4, -0.1, 2.2],  # in billion £, profit before tax & exceptional items
-    'free_cash_flow': [-1.1, 0.5, 2.3],  # in billion £
-    'net_debt': [3.2, 3.0, 0.7],  # in billion £
-    'unit_sales': [376381, 354662, 431733]  # number of units
-})
-
-# Calculate year-over-year changes
-data['revenue_yoy'] = data['revenue'].pct_change() * 100
-data['net_profit_yoy'] = data['net_profit'].diff()
-data['free_cash_flow_yoy'] = data['free_cash_flow'].diff()
-data['net_debt_yoy'] = data['net_debt'].pct_change() * 100
-data['unit_sales_yoy'] = data['unit_sales'].pct_change() * 100
-
-# Replace NaN values with 0 for the first year
-data.fillna(0, inplace=True)
+# Opt-in timing of this rerun: FINANCIALS_PROFILE=1 for every session, or
+# ?profile=1 for this one
+profile = profiling.ENABLED or st.query_params.get("profile") == "1"
+profiling.start_run("rerun", profile)
+
+# Sidebar
+st.sidebar.image("logo.webp", width=200)
+st.sidebar.title("About This Analysis")
+about = st.sidebar.empty()
+
+# End this run with a message when there is nothing to show
+def stop(message):
+    st.info(message)
+    profiling.finish_run()
+    st.stop()
+
+# Company and period range shown by every section. Changing either reruns
+# the whole script; the controls inside sections are fragments and rerun
+# only themselves.
+companies = financials.list_companies()
+if not companies:
+    stop("The data source has no companies yet.")
+company = st.sidebar.selectbox(
+    "Company", companies, key="company",
+    index=companies.index(financials.DEFAULT_COMPANY) if financials.DEFAULT_COMPANY in companies else 0
+)
+with profiling.span("load_periods", "data"):
+    periods = financials.load_periods(company)
+labels = list(periods['fiscal_years'])
+start = end = None
+if len(labels) > 1:
+    first, last = st.sidebar.select_slider("Periods", labels, value=(labels[0], labels[-1]), key="periods")
+    ends = dict(zip(labels, periods['period_end']))
+    start = None if first == labels[0] else ends[first]
+    end = None if last == labels[-1] else ends[last]
+
+# Load the data (cached across reruns)
+with profiling.span("load_metrics", "data"):
+    data = financials.load_metrics(company, start, end)
+if data.empty:
+    stop(f"No financials for {company} in the current data source.")
+with profiling.span("data_version", "data"):
+    version = financials.data_version(company, start, end)
+with profiling.span("load_commentary", "data"):
+    text = financials.load_commentary(company, start, end)
+period_range = f"{data['fiscal_years'].iloc[0]} - {data['fiscal_years'].iloc[-1]}"
+latest = data['fiscal_years'].iloc[-1]
+
+# Headings name the selected company; the programme-specific ones only show
+# for companies with written narrative
+name = store.load_companies().set_index('company')['name'].get(company, company)
+narrative = commentary.NARRATIVE.get(company, {})
+headings = commentary.headings(company)
+about.markdown(f"This dashboard presents a comprehensive analysis of {name}'s financial performance "
+               f"from {data['fiscal_years'].iloc[0]} to {latest}.")
 
 # Function to format large numbers
 def format_number(num):
@@ -52,42 +92,46 @@ def format_number(num):
 def format_pct(num):
     return f"{num:.1f}%"
 
-# Set custom Seaborn theme
-sns.set_theme(style="whitegrid")
-plt.rcParams.update({'font.size': 12})
+# Function to format a rank as an ordinal: 1st, 2nd, 3rd, 4th, 11th, 21st
+def format_ordinal(num):
+    suffix = "th" if 11 <= num % 100 <= 13 else {1: "st", 2: "nd", 3: "rd"}.get(num % 10, "th")
+    return f"{num}{suffix}"
 
-# Custom color palette
-jlr_colors = ["#0C2340", "#2F6F7E", "#41B6E6", "#A4C639", "#D32F2F"]
+# Draw a cached figure; timed as one span covering the figure lookup or
+# build and Streamlit's serialization of it
+def plotly_chart(chart_id, data, version):
+    with profiling.span(f"plotly_chart:{chart_id}", "chart"):
+        st.plotly_chart(figures.get_figure(chart_id, data, version), use_container_width=True)
+
+# An interactive unit: a widget change inside it reruns only this function,
+# not the script. The script's profiling run is over by then, so a fragment
+# rerun is profiled as a run of its own.
+def fragment(func):
+    @st.fragment
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if profiling.current_run() is not None:
+            return func(*args, **kwargs)
+        profiling.start_run(f"fragment:{func.__name__}", profile)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiling.finish_run()
+    return wrapper
 
 # Header
-st.title("Jaguar Land Rover Financial Analysis Dashboard")
-st.markdown("### FY21/22 - FY23/24")
-st.markdown("*Analysis of JLR's financial performance during its 'Reimagine' strategic transformation*")
+st.title(f"{name} Financial Analysis Dashboard")
+st.markdown(f"### {period_range}")
+if 'strategy' in narrative:
+    st.markdown(f"*Analysis of {company}'s financial performance during its '{narrative['strategy']}' "
+                "strategic transformation*")
 
 # Overview section
 st.header("1. Overview & Strategic Context")
-st.markdown("""
-    Jaguar Land Rover has been executing its "Reimagine" strategy with remarkable results. 
-    This dashboard analyzes the financial impact of JLR's transformation across three key pillars:
-    
-    * **Electrification**: Transitioning to electric-powered models including the flagship Range Rover Electric
-    * **Modern Luxury & Brand Distinction**: Repositioning its brands to deliver distinctive luxury experiences
-    * **Operational & Financial Turnaround**: Successfully addressing supply chain issues, reducing debt, and improving cash flow
-    
-    The analysis below demonstrates how these strategic initiatives have driven significant financial improvements.
-""")
-
-# Create tabs for different sections
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "Dashboard",
-    "Revenue & Sales",
-    "Profitability",
-    "Cash Flow & Debt",
-    "Strategic Analysis"
-])
-
-# Tab 1: Dashboard
-with tab1:
+st.markdown(text['overview'])
+
+# Section 1: Dashboard
+def render_dashboard():
     st.header("Financial Performance Dashboard")
     
     # Key metrics in columns
@@ -95,7 +139,7 @@ with tab1:
     
     with col1:
         st.metric(
-            "Revenue FY23/24", 
+            f"Revenue {latest}", 
             f"£{data['revenue'].iloc[-1]}B", 
             f"{data['revenue_yoy'].iloc[-1]:.1f}%",
             delta_color="normal"
@@ -103,7 +147,7 @@ with tab1:
     
     with col2:
         st.metric(
-            "Net Profit FY23/24", 
+            f"Net Profit {latest}", 
             f"£{data['net_profit'].iloc[-1]}B", 
             f"{data['net_profit_yoy'].iloc[-1]:.1f}B",
             delta_color="normal"
@@ -111,7 +155,7 @@ with tab1:
     
     with col3:
         st.metric(
-            "Free Cash Flow FY23/24", 
+            f"Free Cash Flow {latest}", 
             f"£{data['free_cash_flow'].iloc[-1]}B", 
             f"{data['free_cash_flow_yoy'].iloc[-1]:.1f}B",
             delta_color="normal"
@@ -120,675 +164,328 @@ with tab1:
     with col4:
         # Net debt reduction is good, so reverse the delta color
         st.metric(
-            "Net Debt FY23/24", 
+            f"Net Debt {latest}", 
             f"£{data['net_debt'].iloc[-1]}B", 
             f"{data['net_debt_yoy'].iloc[-1]:.1f}%",
             delta_color="inverse"
         )
     
-    # Combined dashboard using Plotly
-    st.subheader("Key Financial Metrics (FY21/22 - FY23/24)")
-    
-    fig = make_subplots(
-        rows=2, cols=2,
-        specs=[[{"type": "scatter"}, {"type": "bar"}],
-               [{"type": "scatter"}, {"type": "scatter"}]],
-        subplot_titles=("Revenue (Billion £)", "Net Profit (Billion £)", 
-                       "Free Cash Flow (Billion £)", "Net Debt (Billion £)"),
-        vertical_spacing=0.12,
-        horizontal_spacing=0.08
-    )
-    
-    # Revenue plot
-    fig.add_trace(
-        go.Scatter(
-            x=fiscal_years, 
-            y=data['revenue'], 
-            mode='lines+markers+text',
-            name='Revenue',
-            line=dict(color=jlr_colors[0], width=3),
-            marker=dict(size=12),
-            text=[f"£{val}B" for val in data['revenue']],
-            textposition="top center"
-        ),
-        row=1, col=1
-    )
-    
-    # Net profit plot
-    colors = ['#D32F2F' if x < 0 else '#4CAF50' for x in data['net_profit']]
-    for i, (year, profit, color) in enumerate(zip(fiscal_years, data['net_profit'], colors)):
-        fig.add_trace(
-            go.Bar(
-                x=[year], 
-                y=[profit],
-                name=year if i == 0 else None,
-                marker_color=color,
-                text=[f"£{profit}B"],
-                textposition="outside",
-                showlegend=False
-            ),
-            row=1, col=2
+    # Anomalies and threshold crossings, most significant first
+    with profiling.span("load_alerts", "compute"):
+        company_alerts = financials.load_alerts(company, start, end)
+    if not company_alerts.empty:
+        st.subheader("Alerts")
+        table = company_alerts.assign(
+            signal=company_alerts['good'].map({True: "▲ favourable", False: "▼ adverse"})
+        )[['fiscal_years', 'signal', 'message', 'score']]
+        st.dataframe(
+            table.rename(columns={'fiscal_years': "Period", 'signal': "Signal", 'message': "Alert", 'score': "Score"}),
+            hide_index=True, use_container_width=True, column_config={"Score": st.column_config.NumberColumn(format="%.1f")}
         )
+
+    # Combined dashboard using Plotly
+    st.subheader(f"Key Financial Metrics ({period_range})")
     
-    # Free cash flow
-    fig.add_trace(
-        go.Scatter(
-            x=fiscal_years, 
-            y=data['free_cash_flow'], 
-            mode='lines+markers+text',
-            name='Free Cash Flow',
-            line=dict(color=jlr_colors[2], width=3),
-            marker=dict(size=12),
-            text=[f"£{val}B" for val in data['free_cash_flow']],
-            textposition="top center",
-            showlegend=False
-        ),
-        row=2, col=1
-    )
-    
-    # Net debt
-    fig.add_trace(
-        go.Scatter(
-            x=fiscal_years, 
-            y=data['net_debt'], 
-            mode='lines+markers+text',
-            name='Net Debt',
-            line=dict(color=jlr_colors[4], width=3),
-            marker=dict(size=12),
-            text=[f"£{val}B" for val in data['net_debt']],
-            textposition="top center",
-            showlegend=False
-        ),
-        row=2, col=2
-    )
-    
-    # Add zero reference lines
-    fig.add_hline(y=0, line=dict(color="black", width=1), row=1, col=2)
-    fig.add_hline(y=0, line=dict(color="black", width=1), row=2, col=1)
-    
-    fig.update_layout(
-        height=700,
-        title_text="",
-        hovermode="x unified",
-        template="plotly_white",
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart("dashboard", data, version)
     
     # Unit sales chart
     st.subheader("Unit Sales Performance")
     
-    fig_units = px.line(
-        data, 
-        x='fiscal_years', 
-        y='unit_sales',
-        markers=True,
-        labels={'unit_sales': 'Units Sold', 'fiscal_years': 'Fiscal Year'},
-        template="plotly_white",
-        color_discrete_sequence=[jlr_colors[3]]
-    )
-    
-    fig_units.update_traces(
-        line=dict(width=3),
-        marker=dict(size=12),
-        text=[f"{val:,}" for val in data['unit_sales']],
-        textposition="top center"
-    )
-    
-    fig_units.update_layout(
-        height=400,
-        yaxis=dict(title='Units Sold'),
-        xaxis=dict(title='Fiscal Year'),
-        hovermode="x unified"
-    )
-    
-    st.plotly_chart(fig_units, use_container_width=True)
+    plotly_chart("unit_sales_overview", data, version)
+
+    render_metric_explorer()
+
+# Single-metric charts the explorer can show
+EXPLORER_CHARTS = {
+    'revenue': "Revenue", 'unit_sales': "Unit Sales", 'revenue_per_unit': "Revenue per Unit",
+    'net_profit': "Net Profit", 'profit_margin': "Profit Margin", 'free_cash_flow': "Free Cash Flow",
+    'net_debt': "Net Debt",
+}
+
+@fragment
+def render_metric_explorer():
+    st.subheader("Metric Explorer")
+    chart_id = st.selectbox("Metric", list(EXPLORER_CHARTS), format_func=EXPLORER_CHARTS.get, key="explorer_metric")
+    plotly_chart(chart_id, data, version)
 
-# Tab 2: Revenue & Sales
-with tab2:
+# Section 2: Revenue & Sales
+def render_revenue_sales():
     st.header("2. Revenue & Unit Sales Analysis")
     
     col1, col2 = st.columns(2)
     
     with col1:
         # Revenue chart
-        fig_rev = px.line(
-            data, 
-            x='fiscal_years', 
-            y='revenue',
-            markers=True,
-            labels={'revenue': 'Revenue (Billion £)', 'fiscal_years': 'Fiscal Year'},
-            template="plotly_white",
-            color_discrete_sequence=[jlr_colors[0]]
-        )
-        
-        fig_rev.update_traces(
-            line=dict(width=3),
-            marker=dict(size=12),
-            text=[f"£{val}B" for val in data['revenue']],
-            textposition="top center"
-        )
-        
-        fig_rev.update_layout(
-            title="Revenue Trend",
-            height=400,
-            yaxis=dict(title='Revenue (Billion £)'),
-            xaxis=dict(title='Fiscal Year'),
-            hovermode="x unified"
-        )
-        
-        st.plotly_chart(fig_rev, use_container_width=True)
+        plotly_chart("revenue", data, version)
         
         # Revenue analysis
         st.subheader("Revenue Analysis")
-        st.markdown("""
-        **Key Observations:**
-        * **FY21/22 to FY22/23:** 24% increase from £18.3B to £22.8B
-        * **FY22/23 to FY23/24:** 27% increase from £22.8B to £29.0B
-        * **Overall Growth:** 58% increase over the three-year period
-        
-        **Reasoning:**
-        * **Improved Production & Supply Chain:** Resolution of semiconductor shortages and supply chain constraints
-        * **Premium Product Mix:** Successful launches of new Range Rover models and SV Edition vehicles
-        * **Electrification Strategy:** Growing market interest in JLR's electrified offerings
-        * **Recovery in Global Demand:** Strengthening consumer confidence in luxury vehicle segment
-        """)
+        st.markdown(text['revenue_analysis'])
     
     with col2:
         # Unit sales chart
-        fig_units = px.line(
-            data, 
-            x='fiscal_years', 
-            y='unit_sales',
-            markers=True,
-            labels={'unit_sales': 'Units Sold', 'fiscal_years': 'Fiscal Year'},
-            template="plotly_white",
-            color_discrete_sequence=[jlr_colors[3]]
-        )
-        
-        fig_units.update_traces(
-            line=dict(width=3),
-            marker=dict(size=12),
-            text=[f"{val:,}" for val in data['unit_sales']],
-            textposition="top center"
-        )
-        
-        fig_units.update_layout(
-            title="Unit Sales Performance",
-            height=400,
-            yaxis=dict(title='Units Sold'),
-            xaxis=dict(title='Fiscal Year'),
-            hovermode="x unified"
-        )
-        
-        st.plotly_chart(fig_units, use_container_width=True)
+        plotly_chart("unit_sales", data, version)
         
         # Unit sales analysis
         st.subheader("Unit Sales Analysis")
-        st.markdown("""
-        **Key Observations:**
-        * **FY21/22 to FY22/23:** 5.8% decrease from 376,381 to 354,662 units
-        * **FY22/23 to FY23/24:** 21.7% increase from 354,662 to 431,733 units
-        * **Overall Growth:** 14.7% increase over the three-year period
-        
-        **Reasoning:**
-        * **Initial Decline:** Production constraints and market uncertainty in FY22/23
-        * **Strong Recovery:** Supply improvements and pent-up demand in FY23/24
-        * **Market Confidence:** Return of consumer confidence in JLR's luxury offerings
-        * **New Model Impact:** Success of refreshed Range Rover and Discovery product lines
-        """)
+        st.markdown(text['unit_sales_analysis'])
     
     # Additional insights
     st.subheader("Revenue vs. Unit Sales Relationship")
     
-    # Calculate revenue per unit
-    data['revenue_per_unit'] = (data['revenue'] * 1e9) / data['unit_sales']
-    
     col1, col2 = st.columns(2)
     
     with col1:
-        # Create the chart
-        fig_rev_unit = px.bar(
-            data,
-            x='fiscal_years',
-            y='revenue_per_unit',
-            labels={'revenue_per_unit': 'Revenue per Unit (£)', 'fiscal_years': 'Fiscal Year'},
-            template="plotly_white",
-            color_discrete_sequence=[jlr_colors[1]]
-        )
-        
-        fig_rev_unit.update_traces(
-            text=[f"£{val:,.0f}" for val in data['revenue_per_unit']],
-            textposition="outside"
-        )
-        
-        fig_rev_unit.update_layout(
-            title="Revenue per Unit",
-            height=400,
-            yaxis=dict(title='Revenue per Unit (£)'),
-            xaxis=dict(title='Fiscal Year')
-        )
-        
-        st.plotly_chart(fig_rev_unit, use_container_width=True)
+        plotly_chart("revenue_per_unit", data, version)
     
     with col2:
-        st.markdown("""
-        **Revenue per Unit Analysis:**
-        
-        * **FY21/22:** £48,620 per vehicle
-        * **FY22/23:** £64,286 per vehicle
-        * **FY23/24:** £67,171 per vehicle
-        
-        **Key Insights:**
-        * **Premium Mix Shift:** The significant increase in revenue per unit (32% from FY21/22 to FY22/23) indicates a successful shift toward higher-margin vehicles
-        * **Value Enhancement:** JLR's "Modern Luxury" strategy is yielding higher transaction prices
-        * **Brand Strength:** The ability to command premium pricing demonstrates the strength of JLR's brand positioning
-        * **Profitable Growth:** This metric shows that growth is coming from both volume and value, supporting improved profitability
-        """)
-
-# Tab 3: Profitability
-with tab3:
+        st.markdown(text['revenue_per_unit_analysis'])
+
+# Section 3: Profitability
+def render_profitability():
     st.header("3. Profitability & Operating Performance")
     
     col1, col2 = st.columns(2)
     
     with col1:
         # Net profit chart
-        colors = ['#D32F2F' if x < 0 else '#4CAF50' for x in data['net_profit']]
-        
-        fig_profit = go.Figure()
-        
-        for i, (year, profit, color) in enumerate(zip(fiscal_years, data['net_profit'], colors)):
-            fig_profit.add_trace(
-                go.Bar(
-                    x=[year], 
-                    y=[profit],
-                    name=year,
-                    marker_color=color,
-                    text=[f"£{profit}B"],
-                    textposition="outside",
-                    showlegend=False
-                )
-            )
-        
-        fig_profit.add_hline(y=0, line=dict(color="black", width=1))
+        plotly_chart("net_profit", data, version)
         
-        fig_profit.update_layout(
-            title="Net Profit Before Tax & Exceptional Items",
-            height=400,
-            yaxis=dict(title='Net Profit (Billion £)'),
-            xaxis=dict(title='Fiscal Year'),
-            template="plotly_white"
-        )
-        
-        st.plotly_chart(fig_profit, use_container_width=True)
-        
-        # Profit margin calculation and chart
-        data['profit_margin'] = (data['net_profit'] / data['revenue']) * 100
-        
-        fig_margin = px.line(
-            data, 
-            x='fiscal_years', 
-            y='profit_margin',
-            markers=True,
-            labels={'profit_margin': 'Profit Margin (%)', 'fiscal_years': 'Fiscal Year'},
-            template="plotly_white",
-            color_discrete_sequence=[jlr_colors[2]]
-        )
-        
-        fig_margin.update_traces(
-            line=dict(width=3),
-            marker=dict(size=12),
-            text=[f"{val:.1f}%" for val in data['profit_margin']],
-            textposition="top center"
-        )
-        
-        fig_margin.add_hline(y=0, line=dict(color="black", width=1))
-        
-        fig_margin.update_layout(
-            title="Profit Margin",
-            height=400,
-            yaxis=dict(title='Profit Margin (%)'),
-            xaxis=dict(title='Fiscal Year'),
-            hovermode="x unified"
-        )
-        
-        st.plotly_chart(fig_margin, use_container_width=True)
+        # Profit margin chart
+        plotly_chart("profit_margin", data, version)
     
     with col2:
         # Net profit analysis
         st.subheader("Profitability Analysis")
-        st.markdown("""
-        **Key Observations:**
-        * **FY21/22:** £0.4B loss
-        * **FY22/23:** £0.1B loss (75% reduction in losses)
-        * **FY23/24:** £2.2B profit (dramatic turnaround)
-        
-        **Reasoning:**
-        * **Operational Efficiencies:** Resolution of production bottlenecks and supply chain optimization
-        * **Economies of Scale:** Higher production volumes lowering per-unit costs
-        * **Premium Product Mix:** Higher-margin vehicles improving overall profitability
-        * **Strategic Investments Paying Off:** Technology investments yielding productivity improvements
-        * **Cost Discipline:** Successful implementation of cost-saving initiatives
-        
-        **Profit Margin Transformation:**
-        * **FY21/22:** -2.2% margin
-        * **FY22/23:** -0.4% margin
-        * **FY23/24:** 7.6% margin
-        
-        This represents a nearly 10 percentage point improvement in profit margin, demonstrating the effectiveness of JLR's "Reimagine" strategy in transforming its business model.
-        """)
+        st.markdown(text['profitability_analysis'])
         
         # Operating efficiency
         st.subheader("Operating Efficiency")
-        st.markdown("""
-        **Key Efficiency Drivers:**
-        
-        1. **Supply Chain Optimization:**
-           * Resolution of semiconductor shortages
-           * Improved component sourcing
-           * Enhanced logistics management
-        
-        2. **Production Improvements:**
-           * Increased plant utilization
-           * Streamlined manufacturing processes
-           * Higher throughput with better quality control
-        
-        3. **Strategic Cost Management:**
-           * Fixed cost optimization
-           * Targeted reduction in non-essential spending
-           * Better supplier partnerships and negotiations
-        
-        4. **Technology Integration:**
-           * Digital transformation initiatives
-           * Automation of key processes
-           * Data-driven decision making
-        
-        The combined effect has transformed JLR from an operationally challenged business to one demonstrating industry-competitive margins and financial performance.
-        """)
+        st.markdown(text['operating_efficiency'])
 
-# Tab 4: Cash Flow & Debt
-with tab4:
+# Section 4: Cash Flow & Debt
+def render_cash_flow_debt():
     st.header("4. Cash Flow & Debt Management")
     
     col1, col2 = st.columns(2)
     
     with col1:
         # Free cash flow chart
-        fig_fcf = px.line(
-            data, 
-            x='fiscal_years', 
-            y='free_cash_flow',
-            markers=True,
-            labels={'free_cash_flow': 'Free Cash Flow (Billion £)', 'fiscal_years': 'Fiscal Year'},
-            template="plotly_white",
-            color_discrete_sequence=[jlr_colors[2]]
-        )
-        
-        fig_fcf.update_traces(
-            line=dict(width=3),
-            marker=dict(size=12),
-            text=[f"£{val}B" for val in data['free_cash_flow']],
-            textposition="top center"
-        )
-        
-        fig_fcf.add_hline(y=0, line=dict(color="black", width=1))
-        
-        fig_fcf.update_layout(
-            title="Free Cash Flow Trend",
-            height=400,
-            yaxis=dict(title='Free Cash Flow (Billion £)'),
-            xaxis=dict(title='Fiscal Year'),
-            hovermode="x unified"
-        )
-        
-        st.plotly_chart(fig_fcf, use_container_width=True)
+        plotly_chart("free_cash_flow", data, version)
         
         # Cash flow analysis
         st.subheader("Free Cash Flow Analysis")
-        st.markdown("""
-        **Key Observations:**
-        * **FY21/22:** -£1.1B (negative free cash flow)
-        * **FY22/23:** £0.5B (transition to positive cash flow)
-        * **FY23/24:** £2.3B (strong positive free cash flow generation)
-        
-        **Reasoning:**
-        * **Working Capital Management:** Improved inventory management and accounts receivable/payable processes
-        * **Operational Efficiencies:** Higher earnings from core operations
-        * **Capital Expenditure Optimization:** More targeted and efficient use of capital investments
-        * **Cash Flow Discipline:** Strategic focus on cash generation across the organization
-        
-        This remarkable improvement in free cash flow has been a key enabler of JLR's debt reduction strategy.
-        """)
+        st.markdown(text['free_cash_flow_analysis'])
     
     with col2:
         # Net debt chart
-        fig_debt = px.line(
-            data, 
-            x='fiscal_years', 
-            y='net_debt',
-            markers=True,
-            labels={'net_debt': 'Net Debt (Billion £)', 'fiscal_years': 'Fiscal Year'},
-            template="plotly_white",
-            color_discrete_sequence=[jlr_colors[4]]
-        )
-        
-        fig_debt.update_traces(
-            line=dict(width=3),
-            marker=dict(size=12),
-            text=[f"£{val}B" for val in data['net_debt']],
-            textposition="top center"
-        )
-        
-        fig_debt.update_layout(
-            title="Net Debt Reduction",
-            height=400,
-            yaxis=dict(title='Net Debt (Billion £)'),
-            xaxis=dict(title='Fiscal Year'),
-            hovermode="x unified"
-        )
-        
-        st.plotly_chart(fig_debt, use_container_width=True)
+        plotly_chart("net_debt", data, version)
         
         # Debt analysis
         st.subheader("Net Debt Analysis")
-        st.markdown("""
-        **Key Observations:**
-        * **FY21/22:** £3.2B net debt
-        * **FY22/23:** £3.0B net debt (6.3% reduction)
-        * **FY23/24:** £0.7B net debt (76.7% reduction)
-        
-        **Reasoning:**
-        * **Enhanced Free Cash Flow:** Surplus cash deployed to pay down debt
-        * **Deleveraging Strategy:** Focused effort to strengthen the balance sheet
-        * **Financial Resilience Building:** Creating capacity for future strategic investments
-        * **Lower Interest Burden:** Reduced debt leads to lower interest expenses, further improving profitability
-        
-        The dramatic 78% reduction in net debt over the three-year period highlights the effectiveness of JLR's financial management strategy and positions the company for future growth investments, particularly in electrification.
-        """)
-        
-        # Debt to Free Cash Flow Ratio
-        data['debt_to_fcf'] = data['net_debt'] / data['free_cash_flow'].replace(0, float('nan'))
-        data['debt_to_fcf'] = data['debt_to_fcf'].replace([float('inf'), float('-inf')], float('nan'))
-        
-        st.markdown("""
-        **Debt to Free Cash Flow Ratio:**
-        * **FY22/23:** 6.0x
-        * **FY23/24:** 0.3x
+        st.markdown(text['net_debt_analysis'])
         
-        This dramatic improvement in debt to free cash flow ratio indicates that JLR has achieved a significantly more sustainable financial position, with debt levels that can be serviced comfortably by operating cash flows.
-        """)
+        st.markdown(text['debt_to_fcf_analysis'])
 
-# Tab 5: Strategic Analysis
-with tab5:
+# Section 5: Strategic Analysis
+def render_strategic_analysis():
     st.header("5. Strategic Analysis & Future Outlook")
     
-    # Key drivers of turnaround
-    st.subheader("Key Drivers of JLR's Financial Turnaround")
-    
-    col1, col2 = st.columns(2)
+    # Key drivers of turnaround; written per company, so not every company has them
+    if text['operational_drivers'] or text['strategic_drivers']:
+        st.subheader(headings['drivers'])
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown(text['operational_drivers'])
+
+        with col2:
+            st.markdown(text['strategic_drivers'])
     
+    # Visualization of strategic pillars
+    st.subheader(headings['strategy'])
+    plotly_chart("strategy_indicators", data, version)
+
+    render_scenarios()
+
+    # Future outlook
+    if text['outlook']:
+        st.subheader(headings['outlook'])
+
+        st.markdown(text['outlook'])
+
+# Monte Carlo projection of the metrics under adjustable assumptions
+@fragment
+def render_scenarios():
+    st.subheader("Scenario Projections")
+    defaults = scenarios.ASSUMPTIONS
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.markdown("""
-        ### Operational Drivers
-        
-        1. **Supply Chain Resilience:**
-           * Resolution of semiconductor constraints
-           * Diversification of supplier base
-           * Enhanced logistics operations
-        
-        2. **Production Optimization:**
-           * Improved manufacturing efficiency
-           * Better capacity utilization
-           * Quality improvements reducing waste
-        
-        3. **Premium Product Mix:**
-           * Focus on higher-margin vehicles
-           * Successful Range Rover portfolio update
-           * "Modern Luxury" positioning driving higher transaction prices
-        
-        4. **Cost Discipline:**
-           * Fixed cost optimization 
-           * Strategic sourcing initiatives
-           * Digital transformation reducing operational costs
-        """)
-    
+        years = st.slider("Horizon (years)", 1, 10, defaults['years'], key="scenario_years")
+        runs = st.slider("Scenarios", 1000, 20000, defaults['runs'], step=1000, key="scenario_runs")
     with col2:
-        st.markdown("""
-        ### Strategic Drivers
-        
-        1. **"Reimagine" Strategy Execution:**
-           * Clear strategic direction
-           * Focused implementation of key initiatives
-           * Measurable outcomes and accountability
-        
-        2. **Electrification Progress:**
-           * Investment in electric vehicle platforms
-           * Announcement of Range Rover Electric
-           * Building capabilities for future growth
-        
-        3. **Brand Strengthening:**
-           * Enhanced brand differentiation
-           * Customer experience improvements
-           * Higher perceived value in marketplace
-        
-        4. **Financial Management:**
-           * Working capital optimization
-           * Disciplined capital allocation
-           * Strategic debt reduction
-        """)
-    
-    # Visualization of strategic pillars
-    st.subheader("'Reimagine' Strategy Impact on Financial Performance")
-        
-    # Create a figure with subplots - removed subplot titles to avoid overlap
-    fig = make_subplots(
-        rows=1, cols=3,
-        specs=[[{"type": "domain"}, {"type": "domain"}, {"type": "domain"}]],
-    )
+        unit_growth = st.slider("Unit sales growth (%/yr)", -10.0, 15.0, defaults['unit_growth'], step=0.5,
+                                key="scenario_unit_growth")
+        price_growth = st.slider("Revenue per unit growth (%/yr)", -5.0, 10.0, defaults['price_growth'], step=0.5,
+                                 key="scenario_price_growth")
+    with col3:
+        target_margin = st.slider("Target profit margin (%)", -5.0, 15.0, defaults['target_margin'], step=0.5,
+                                  key="scenario_target_margin")
+        fcf_conversion = st.slider("FCF / net profit", 0.0, 1.5, defaults['fcf_conversion'], step=0.05,
+                                   key="scenario_fcf_conversion")
+    with col4:
+        paydown = st.slider("FCF used for debt paydown", 0.0, 1.0, defaults['paydown'], step=0.05,
+                            key="scenario_paydown")
+        volatility = st.slider("Volatility (x default)", 0.0, 3.0, 1.0, step=0.25, key="scenario_volatility")
 
-    # Electrification KPIs
-    fig.add_trace(
-        go.Indicator(
-            mode="number+delta",
-            value=29.0,
-            title={"text": "<b>Electrification</b><br>Revenue (£B)", "font": {"size": 14}},
-            delta={"reference": 18.3, "relative": True, "valueformat": ".1%"},
-            domain={"row": 0, "column": 0}
-        ),
-        row=1, col=1
+    assumptions = dict(
+        years=years, runs=runs, unit_growth=unit_growth, price_growth=price_growth,
+        target_margin=target_margin, fcf_conversion=fcf_conversion, paydown=paydown,
+        **{name: defaults[name] * volatility for name in
+           ('unit_volatility', 'price_volatility', 'margin_volatility', 'conversion_volatility')}
     )
+    with profiling.span("scenarios.project", "compute", runs=runs, years=years):
+        projection = scenarios.project(data, **assumptions)
+    scenario_version = f"{version}-{scenarios.fingerprint(assumptions)}"
 
-    # Modern Luxury KPIs
-    fig.add_trace(
-        go.Indicator(
-            mode="number+delta",
-            value=67171,
-            title={"text": "<b>Modern Luxury</b><br>Revenue per Unit (£)", "font": {"size": 14}},
-            delta={"reference": 48620, "relative": True, "valueformat": ".1%"},
-            number={"valueformat": ",.0f"},
-            domain={"row": 0, "column": 1}
-        ),
-        row=1, col=2
-    )
+    plotly_chart("scenario_indicators", projection, scenario_version)
+    plotly_chart("scenario_fan", projection, scenario_version)
+    st.caption(f"{runs:,} scenarios. Shaded bands: 5th-95th and 25th-75th percentiles; dashed line: median.")
 
-    # Operational Turnaround KPIs
-    fig.add_trace(
-        go.Indicator(
-            mode="number+delta",
-            value=0.7,
-            title={"text": "<b>Operational Turnaround</b><br>Net Debt (£B)", "font": {"size": 14}},
-            delta={"reference": 3.2, "relative": True, "valueformat": ".1%", "increasing": {"color": "red"}, "decreasing": {"color": "green"}},
-            domain={"row": 0, "column": 2}
-        ),
-        row=1, col=3
-    )
+# The peer index is built offline and memory-mapped once per server process
+# and index version, so a rebuild is picked up on the next rerun; each lookup
+# reads only the selected company's rows
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_peer_index(version):
+    return peers.PeerIndex.open()
+
+# Section 6: Peer Comparison
+def render_peer_comparison():
+    st.header("6. Peer Comparison")
+
+    built = peers.index_version()
+    index = None if built is None else load_peer_index(built)
+    if index is None:
+        st.info("The peer index has not been built yet. Run `python peers.py build` to create it.")
+        return
+
+    render_peer_lookup(index)
+
+@fragment
+def render_peer_lookup(index):
+    peer_companies = index.companies
+    default = peer_companies.index(company) if company in peer_companies else 0
+    col1, col2 = st.columns(2)
+    with col1:
+        peer = st.selectbox("Company", peer_companies, index=default, key="peer_company")
+    with col2:
+        peer_periods = index.periods(peer)
+        period = st.selectbox("Period", peer_periods, index=len(peer_periods) - 1, key="peer_period")
+
+    with profiling.span("peers.lookup", "data"):
+        result = index.lookup(peer, period)
+    groups = result['groups']
+    st.caption(f"Sector: {groups['sector']} · Region: {groups['region']}")
+
+    labels = {
+        'revenue_per_unit': ("Revenue per Unit", lambda v: f"£{v:,.0f}"),
+        'profit_margin': ("Profit Margin", format_pct),
+        'debt_to_fcf': ("Net Debt / FCF", lambda v: f"{v:.1f}x"),
+    }
+    for column, record in zip(st.columns(len(result['ratios'])), result['ratios']):
+        label, fmt = labels[record['ratio']]
+        with column:
+            st.metric(label, fmt(record['value']) if pd.notna(record['value']) else "n/a")
+            for group in index.meta['groups']:
+                pct = record[f'{group}_percentile']
+                rank = f"{format_ordinal(round(pct))} percentile" if pd.notna(pct) else "not ranked"
+                st.markdown(f"**{groups[group]}:** {rank} of {record[f'{group}_peers']}")
+    st.caption("Percentiles rank from lowest to highest value: higher is better for revenue per unit and "
+               "profit margin, lower is better for net debt / FCF. Net debt / FCF is not ranked while "
+               "free cash flow is negative.")
+
+# Section 7: Sales Drill-down. Every selection reads one precomputed rollup
+# of the sales cube; raw sales rows are never grouped here
+def render_drilldown():
+    st.header("7. Sales Drill-down")
+
+    meta = cube.load_meta()
+    if meta is None:
+        st.info("No sales cube has been built yet. Load sales rows with `store.write_sales`, "
+                "then run `python cube.py build`.")
+        return
+    if company not in meta['companies']:
+        st.info(f"No sales data for {company}.")
+        return
+
+    render_rollup(meta)
+
+@fragment
+def render_rollup(meta):
+    values = meta['values']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        measure = st.radio("Measure", ["unit_sales", "revenue"], horizontal=True, key="drill_measure",
+                           format_func={'unit_sales': "Unit Sales", 'revenue': "Revenue"}.get)
+    with col2:
+        by = st.selectbox("Break down by", cube.DIMENSIONS, key="drill_by", format_func=str.title)
+    with col3:
+        brand = st.selectbox("Brand", ["All", *values['brand']], key="drill_brand")
+    with col4:
+        region = st.selectbox("Region", ["All", *values['region']], key="drill_region")
+
+    filters = tuple((dim, value) for dim, value in (('brand', brand), ('region', region)) if value != "All")
+    with profiling.span("load_rollup", "data", by=by):
+        rollup = financials.load_rollup((by,), filters, company=company, version=meta['version'])
 
-    fig.update_layout(
-        height=300,
-        grid={"rows": 1, "columns": 3, "pattern": "independent"},
-        margin=dict(t=30, b=0, l=30, r=30)
+    fig_version = f"{meta['version']}-{company}-{by}-{measure}-{filters}"
+    plotly_chart("drilldown", {'rollup': rollup, 'by': by, 'measure': measure}, fig_version)
+
+    # Latest period, largest first
+    latest = rollup[rollup['period_end'] == rollup['period_end'].max()]
+    table = latest[[by, 'unit_sales', 'revenue']].sort_values(measure, ascending=False)
+    st.dataframe(
+        table.rename(columns={by: by.title(), 'unit_sales': "Units", 'revenue': "Revenue (£B)"}),
+        hide_index=True, use_container_width=True
     )
 
-    st.plotly_chart(fig, use_container_width=True) 
-       
-    # Future outlook
-    st.subheader("Future Outlook & Strategic Implications")
-    
-    st.markdown("""
-    ### Key Strategic Implications
-    
-    Based on JLR's financial transformation over the past three years, several strategic implications emerge:
-    
-    1. **Financial Foundation for Electrification**
-       * The improved financial position provides the foundation for accelerating JLR's electrification strategy
-       * Reduced debt and strong cash flow enable higher R&D and capital investments in electric vehicle platforms
-       * JLR can now self-fund its transition to electrification rather than relying on external financing
-    
-    2. **Competitive Positioning**
-       * JLR has strengthened its competitive position in the luxury automotive segment
-       * The combination of improved operations, distinctive brand positioning, and financial resilience creates a sustainable advantage
-       * The company is better positioned to respond to market shifts and competitive threats
-    
-    3. **Growth Potential**
-       * With operational excellence established, JLR can focus on strategic growth initiatives
-       * The strong unit sales recovery indicates market receptiveness to JLR's modern luxury positioning
-       * Future product launches, particularly in the electrified segment, can build on this momentum
-    
-    4. **Risk Management**
-       * Significantly lower net debt reduces financial risk
-       * Operational improvements create resilience against supply chain disruptions
-       * The business can better withstand economic cycles and industry shifts
-    
-    ### Future Outlook
-    
-    JLR's transformation positions the company for continued success, though several factors will influence its future trajectory:
-    
-    1. **Electrification Execution**
-       * Success of Range Rover Electric and other EV launches
-       * Consumer adoption rates of luxury electric vehicles
-       * Charging infrastructure development
-    
-    2. **Global Market Conditions**
-       * Economic growth in key markets
-       * Luxury consumer confidence
-       * Regulatory environment for automotive manufacturers
-    
-    3. **Supply Chain Evolution**
-       * Component availability for electric vehicles
-       * Raw material costs, especially for batteries
-       * Global logistics developments
-    
-    4. **Competitive Landscape**
-       * Actions by traditional luxury automotive competitors
-       * New entrants from technology sector
-       * Evolution of mobility models and consumer preferences
-    
-    The financial data clearly indicates that JLR's "Reimagine" strategy is delivering tangible results. With continued disciplined execution, the company is well-positioned to capitalize on the luxury electric vehicle opportunity while maintaining its distinctive brand positioning.
-    """)
+# Sections are rendered lazily: only the selected one runs on a rerun, so
+# hidden sections cost neither server CPU nor websocket payload
+SECTIONS = {
+    "Dashboard": render_dashboard,
+    "Revenue & Sales": render_revenue_sales,
+    "Profitability": render_profitability,
+    "Cash Flow & Debt": render_cash_flow_debt,
+    "Strategic Analysis": render_strategic_analysis,
+    "Peer Comparison": render_peer_comparison,
+    "Sales Drill-down": render_drilldown,
+}
 
-# Sidebar
-st.sidebar.image("logo.webp", width=200)
-st.sidebar.title("About This Analysis")
-st.sidebar.markdown("""
-This dashboard presents a comprehensive analysis of Jaguar Land Rover's financial performance from FY21/22 to FY23/24, during the implementation""")
\ No newline at end of file
+section = st.radio(
+    "Section",
+    list(SECTIONS),
+    horizontal=True,
+    label_visibility="collapsed",
+    key="section"
+)
+with profiling.span(f"section:{section}", "section"):
+    SECTIONS[section]()
+
+with st.sidebar.expander("Cache statistics"):
+    st.dataframe(financials.cache_stats(), hide_index=True, use_container_width=True)
+    st.caption("Figure cache: {hits} hits, {misses} misses, {size}/{maxsize} entries".format(**figures.cache_info()))
+    disk = disk_cache.info()
+    st.caption("Disk cache: {hits} hits, {misses} misses, {entries} entries, {mb:.1f}/{max_mb:.0f} MB".format(
+        mb=disk['bytes'] / 2**20, max_mb=disk['max_bytes'] / 2**20, **disk
+    ))
+
+run = profiling.finish_run()
+if run is not None:
+    with st.sidebar.expander("Profile", expanded=True):
+        st.caption(f"Rerun: {run.duration / 1e6:.1f} ms")
+        st.dataframe(profiling.breakdown(run), hide_index=True, use_container_width=True,
+                     column_order=['span', 'calls', 'self_ms', 'total_ms', 'share_pct'])
+        st.download_button("Download trace", profiling.trace_json(run), file_name="rerun-trace.json",
+                           mime="application/json")
+        st.caption(f"All reruns of this process: {profiling.trace_path()}")
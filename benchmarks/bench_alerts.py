@@ -0,0 +1,35 @@
+import argparse
+
+import alerts
+import metrics
+from benchmarks import harness
+from benchmarks.synthetic import make_universe
+
+# (companies, quarters) sizes
+SIZES = [(1_000, 80), (10_000, 80), (25_000, 80)]
+
+
+def run(sizes=SIZES, repeat=3):
+    results = []
+    for n_companies, n_periods in sizes:
+        frame = metrics.compute_metrics(make_universe(n_companies, n_periods))
+        dataset = f"rows={len(frame):,}"
+        results.append(harness.record("scan", dataset, "all alerts", harness.timed(lambda: alerts.scan(frame), repeat)))
+        results.append(harness.record("scan", dataset, "top 100", harness.timed(lambda: alerts.scan(frame, top=100), repeat)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alert scan time over the whole universe")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = run(repeat=args.repeat)
+    harness.print_results(results)
+    if args.json:
+        harness.write_results(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import functools
+import io
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import pyarrow as pa
+import streamlit as st
+from streamlit.testing.v1 import AppTest, local_script_runner
+
+import cube
+import disk_cache
+import figures
+import financials
+import peers
+import scenarios
+import store
+import Visualization
+from benchmarks import harness
+from benchmarks.synthetic import make_companies, make_sales, make_universe
+
+APP = str(Path(__file__).resolve().parent.parent / "app.py")
+
+# Periods per synthetic dataset; the dashboard shows one company at a time
+SIZES = [3, 40, 400]
+DPIS = [72, 150, 300]
+
+# Interactive controls timed by bench_interactions: (section, widget type,
+# key, values to alternate between so every rerun sees a change)
+INTERACTIONS = [
+    ("Dashboard", "selectbox", "explorer_metric", ["net_profit", "free_cash_flow"]),
+    ("Strategic Analysis", "slider", "scenario_unit_growth", [2.0, 4.0]),
+    ("Peer Comparison", "selectbox", "peer_company", ["C00001", "C00002"]),
+    ("Sales Drill-down", "selectbox", "drill_by", ["region", "model"]),
+]
+PEER_COMPANIES = 20
+SALES_ROWS = 20_000
+
+
+# Write a one-company synthetic store the dashboard will pick up
+def synthetic_store(root, n_periods):
+    frame = make_universe(1, n_periods)
+    frame['company'] = financials.DEFAULT_COMPANY
+    store.write_financials(frame, path=root)
+
+
+# A store in which every section has something to show: peers of the
+# dashboard company, their reference rows, the peer index and a sales cube
+def interactive_store(root, n_periods):
+    frame = make_universe(PEER_COMPANIES, n_periods)
+    companies = make_companies(PEER_COMPANIES)
+    for table in (frame, companies):
+        table['company'] = table['company'].replace({"C00000": financials.DEFAULT_COMPANY})
+    store.write_financials(frame, path=root)
+    store.write_companies(companies, path=root)
+    store.write_sales(make_sales(SALES_ROWS, financials.DEFAULT_COMPANY), path=root)
+    peers.build(root)
+    cube.build(root)
+
+
+# Drop the in-process caches; with disk=True also the shared on-disk tier
+def reset_caches(disk=True):
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    figures.clear_cache()
+    if disk:
+        disk_cache.clear()
+
+
+# Full script runs: the first (cold caches) run, then warm reruns per section
+def bench_app(dataset, repeat):
+    results = []
+    reset_caches()
+    at = AppTest.from_file(APP, default_timeout=120)
+    results.append(harness.record("app_cold_run", dataset, "first run", harness.timed(at.run, 1)))
+
+    # A new process after a deploy: empty in-process caches, disk cache warm
+    # from the run above (it only holds the first section's figures)
+    def restart():
+        reset_caches(disk=False)
+        AppTest.from_file(APP, default_timeout=120).run()
+    results.append(harness.record("app_cold_run", dataset, "first run, disk cache warm", harness.timed(restart, repeat)))
+
+    for section in at.radio(key="section").options:
+        at.radio(key="section").set_value(section).run()
+        if at.exception:
+            raise RuntimeError(f"{section}: {at.exception[0].message}")
+        results.append(harness.record("app_rerun", dataset, section, harness.timed(at.run, repeat)))
+    return results
+
+
+# AppTest always reruns the whole script, while the frontend reruns only the
+# fragment holding a changed widget. Queueing the fragments registered by the
+# last full run (the open section's) makes AppTest do the same.
+@contextmanager
+def fragment_reruns(at):
+    rerun_data = local_script_runner.RerunData
+    ids = list(at._fragment_storage._fragments)
+    local_script_runner.RerunData = functools.partial(rerun_data, fragment_id_queue=ids)
+    try:
+        yield
+    finally:
+        local_script_runner.RerunData = rerun_data
+
+
+# Latency of changing each interactive control: the whole-script rerun it
+# would cost outside a fragment, and the fragment rerun it costs now
+def bench_interactions(dataset, repeat):
+    results = []
+    at = AppTest.from_file(APP, default_timeout=120).run()
+    for section, widget, key, values in INTERACTIONS:
+        at.radio(key="section").set_value(section).run()
+        for scope in ["script", "fragment"]:
+            times = []
+            for i in range(repeat):
+                getattr(at, widget)(key=key).set_value(values[i % len(values)])
+                if scope == "fragment":
+                    with fragment_reruns(at):
+                        times.append(harness.timed(at.run, 1)['median_ms'])
+                    # The fragment rerun's tree holds only the fragment; a
+                    # full run brings back the rest of the page
+                    at.session_state["section"] = section
+                    at.run()
+                else:
+                    times.append(harness.timed(at.run, 1)['median_ms'])
+                if at.exception:
+                    raise RuntimeError(f"{section} / {key}: {at.exception[0].message}")
+            results.append(harness.record("interaction", dataset, f"{key} ({scope} rerun)", harness.summarize(times)))
+    return results
+
+
+# What the dashboard passes the charts that are not drawn from the metric
+# table: the scenario charts get a projection with the default assumptions,
+# the drill-down a brand rollup of synthetic sales rows
+def figure_inputs(data):
+    sales = pa.Table.from_pandas(make_sales(SALES_ROWS, financials.DEFAULT_COMPANY), preserve_index=False)
+    rollup = cube.aggregate(sales, cube.KEYS + ['brand']).to_pandas(date_as_object=False)
+    projection = scenarios.project(data)
+    return {
+        'scenario_fan': projection,
+        'scenario_indicators': projection,
+        'drilldown': {'rollup': rollup, 'by': 'brand', 'measure': 'revenue'},
+    }
+
+
+# Plotly figure construction and JSON serialization, uncached
+def bench_figures(dataset, data, repeat):
+    inputs = figure_inputs(data)
+    results = []
+    for chart_id in figures.BUILDERS:
+        chart_data = inputs.get(chart_id, data)
+        results.append(harness.record(
+            "figure_build", dataset, chart_id,
+            harness.timed(lambda: figures.build_figure(chart_id, chart_data), repeat)
+        ))
+        fig = figures.build_figure(chart_id, chart_data)
+        results.append(harness.record("figure_serialize", dataset, chart_id, harness.timed(fig.to_json, repeat)))
+    return results
+
+
+# Matplotlib chart render time per dpi, reusing one template per chart
+def bench_matplotlib(dataset, data, repeat, dpis=DPIS):
+    results = []
+    for chart_id, (_, template) in Visualization.CHARTS.items():
+        chart = template()
+        for dpi in dpis:
+            stats = harness.timed(lambda: chart.save(data, io.BytesIO(), dpi), repeat)
+            results.append(harness.record("mpl_render", dataset, f"{chart_id}@{dpi}dpi", stats))
+        chart.close()
+    plt.close("all")
+    return results
+
+
+# Point the app at a fresh synthetic store (and disk cache) built by `build`
+@contextmanager
+def synthetic_root(build, n_periods):
+    with tempfile.TemporaryDirectory() as root:
+        build(root, n_periods)
+        store.STORE_PATH = Path(root)
+        disk_cache.CACHE_PATH = str(Path(root) / "cache.sqlite")
+        reset_caches()
+        yield
+
+
+def run(sizes=SIZES, repeat=5, include=("app", "figures", "matplotlib", "interactions")):
+    results = []
+    original_path, original_cache = store.STORE_PATH, disk_cache.CACHE_PATH
+    try:
+        for n_periods in sizes:
+            dataset = f"periods={n_periods}"
+            with synthetic_root(synthetic_store, n_periods):
+                data = financials.load_metrics()
+
+                if "app" in include:
+                    results += bench_app(dataset, repeat)
+                if "figures" in include:
+                    results += bench_figures(dataset, data, repeat)
+                if "matplotlib" in include:
+                    results += bench_matplotlib(dataset, data, repeat)
+            if "interactions" in include:
+                with synthetic_root(interactive_store, n_periods):
+                    results += bench_interactions(dataset, repeat)
+    finally:
+        store.STORE_PATH = original_path
+        disk_cache.CACHE_PATH = original_cache
+        reset_caches(disk=False)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard rerun latency and chart render throughput")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma-separated period counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", default="app,figures,matplotlib,interactions",
+                        help="comma-separated subset of: app, figures, matplotlib, interactions")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        harness.compare(*args.compare)
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    results = run(sizes, args.repeat, args.only.split(","))
+    harness.print_results(results)
+    if args.json:
+        harness.write_results(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import tempfile
+
+import pyarrow.dataset as ds
+
+import cube
+import store
+from benchmarks import harness
+from benchmarks.synthetic import make_sales
+
+# Sales rows per synthetic store
+SIZES = [1_000_000, 10_000_000]
+
+# Drill-down selections: (break down by, filters)
+CLICKS = [
+    ('brand', {}),
+    ('model', {'brand': 'Range Rover'}),
+    ('region', {'brand': 'Jaguar'}),
+    ('model', {'brand': 'Land Rover', 'region': 'UK'}),
+]
+
+
+# What a click costs without the cube: filter the raw sales rows and group them
+def group_raw(root, by, filters):
+    dataset = ds.dataset(store._dataset_path(root, "sales"), format="parquet", partitioning=store.PARTITIONING)
+    expr = ds.field('company') == 'JLR'
+    for dim, value in filters.items():
+        expr = expr & (ds.field(dim) == value)
+    table = dataset.to_table(columns=cube.KEYS + [by] + cube.MEASURES, filter=expr)
+    return cube.aggregate(table, cube.KEYS + [by]).to_pandas()
+
+
+def run(sizes=SIZES, repeat=5):
+    results = []
+    for n_rows in sizes:
+        dataset = f"rows={n_rows:,}"
+        with tempfile.TemporaryDirectory() as root:
+            store.write_sales(make_sales(n_rows), path=root)
+
+            results.append(harness.record("cube_build", dataset, "all levels", harness.timed(lambda: cube.build(root), 1)))
+
+            for by, filters in CLICKS:
+                case = f"{by} | {','.join(filters.values()) or 'all'}"
+                results.append(harness.record(
+                    "click_rollup", dataset, case,
+                    harness.timed(lambda: cube.load_rollup([by], 'JLR', filters, root), repeat)
+                ))
+                results.append(harness.record(
+                    "click_raw_groupby", dataset, case,
+                    harness.timed(lambda: group_raw(root, by, filters), repeat)
+                ))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sales cube build time and drill-down latency vs grouping raw rows")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma-separated sales row counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = run([int(s) for s in args.sizes.split(",")], args.repeat)
+    harness.print_results(results)
+    if args.json:
+        harness.write_results(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import ast
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks import harness
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "app.py"
+
+# Packages the Streamlit path must never import
+FORBIDDEN = ("matplotlib", "seaborn")
+
+
+# Top-level modules imported by app.py, in source order
+def app_imports(path=APP):
+    modules = []
+    for node in ast.parse(path.read_text()).body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+# Import `modules` in a fresh interpreter under -X importtime and return
+# {module: (self_us, cumulative_us, depth)} for everything it loaded
+def import_profile(modules):
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        profile[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return profile
+
+
+def run(repeat=5, top=10):
+    modules = app_imports()
+    totals = []
+    per_module = defaultdict(list)
+    loaded = set()
+    for _ in range(repeat):
+        profile = import_profile(modules)
+        loaded |= set(profile)
+        # Top-level entries (depth 0) partition the whole import time
+        roots = {name: cumulative for name, (_, cumulative, depth) in profile.items() if depth == 0}
+        totals.append(sum(roots.values()) / 1000)
+        for name, cumulative in roots.items():
+            per_module[name].append(cumulative / 1000)
+
+    def stats(times):
+        return {'runs': len(times), 'min_ms': min(times), 'median_ms': statistics.median(times), 'max_ms': max(times)}
+
+    results = [harness.record("import_app", "app.py", "total", stats(totals))]
+    slowest = sorted(per_module.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, times in slowest[:top]:
+        results.append(harness.record("import_app", "app.py", name, stats(times)))
+
+    forbidden = sorted(m for m in loaded if m.split(".")[0] in FORBIDDEN)
+    return results, forbidden
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of the modules app.py loads (-X importtime)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="report the N slowest top-level imports")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        harness.compare(*args.compare)
+        return
+
+    results, forbidden = run(args.repeat, args.top)
+    harness.print_results(results)
+    if args.json:
+        harness.write_results(args.json, results)
+    if forbidden:
+        sys.exit(f"app.py imports {', '.join(forbidden[:5])}{' ...' if len(forbidden) > 5 else ''}")
+
+
+if __name__ == "__main__":
+    main()
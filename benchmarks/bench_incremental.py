@@ -0,0 +1,60 @@
+import argparse
+import tempfile
+import time
+
+import incremental
+import store
+from benchmarks import harness
+from benchmarks.synthetic import make_universe
+
+# (companies, stored quarters) sizes; each run appends APPENDS more quarters
+SIZES = [(500, 40), (2_000, 40)]
+APPENDS = 3
+
+
+def once(ms):
+    return {'runs': 1, 'min_ms': ms, 'median_ms': ms, 'max_ms': ms}
+
+
+# A quarterly update for every company: the incremental append against
+# recomputing and rewriting the whole metric table
+def run(sizes=SIZES, appends=APPENDS):
+    results = []
+    for n_companies, n_periods in sizes:
+        frame = make_universe(n_companies, n_periods + appends)
+        quarters = sorted(frame['period_end'].unique())
+        dataset = f"companies={n_companies:,} quarters={n_periods}"
+        with tempfile.TemporaryDirectory() as root:
+            store.write_financials(frame[frame['period_end'] <= quarters[n_periods - 1]], path=root)
+
+            start = time.perf_counter()
+            incremental.rebuild(root)
+            results.append(harness.record("full_recompute", dataset, "all rows", once((time.perf_counter() - start) * 1000)))
+
+            times = []
+            for quarter in quarters[n_periods:]:
+                start = time.perf_counter()
+                incremental.append_periods(frame[frame['period_end'] == quarter], root)
+                times.append((time.perf_counter() - start) * 1000)
+            times.sort()
+            results.append(harness.record("append_quarter", dataset, f"{n_companies:,} new rows", {
+                'runs': len(times), 'min_ms': times[0], 'median_ms': times[len(times) // 2], 'max_ms': times[-1],
+            }))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Appending a quarter of metrics vs recomputing the whole table")
+    parser.add_argument("--sizes", default=",".join(f"{c}x{p}" for c, p in SIZES),
+                        help="comma-separated COMPANIESxQUARTERS sizes")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = run([tuple(int(n) for n in size.split("x")) for size in args.sizes.split(",")])
+    harness.print_results(results)
+    if args.json:
+        harness.write_results(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
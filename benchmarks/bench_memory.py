@@ -0,0 +1,70 @@
+import argparse
+import json
+import tracemalloc
+
+import metrics
+from benchmarks import harness
+from benchmarks.synthetic import make_universe
+
+# (companies, quarters) sizes
+SIZES = [(1_000, 80), (10_000, 80)]
+
+
+# Bytes per column of a frame, strings and categories included
+def footprint(frame):
+    return frame.memory_usage(index=False, deep=True)
+
+
+# Peak bytes traced while computing the metric table (NumPy buffers are traced)
+def peak_bytes(frame, compact):
+    tracemalloc.start()
+    try:
+        metrics.compute_metrics(frame, compact=compact)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes=SIZES):
+    results = []
+    for n_companies, n_periods in sizes:
+        frame = make_universe(n_companies, n_periods)
+        per_million = 1e6 / len(frame)
+        for layout, compact in [("default", False), ("compact", True)]:
+            usage = footprint(metrics.compute_metrics(frame, compact=compact))
+            results.append({
+                'companies': n_companies,
+                'periods': n_periods,
+                'rows': len(frame),
+                'layout': layout,
+                'mb_per_million_rows': usage.sum() * per_million / 2**20,
+                'peak_mb_per_million_rows': peak_bytes(frame, compact) * per_million / 2**20,
+                'columns_mb_per_million_rows': {c: b * per_million / 2**20 for c, b in usage.items()},
+            })
+    return results
+
+
+def print_results(results, columns=False):
+    for r in results:
+        print(f"{r['companies']:>6} companies x {r['periods']} periods ({r['rows']:>9,} rows) {r['layout']:<8} "
+              f"{r['mb_per_million_rows']:7.1f} MB per 1M rows  (peak during compute {r['peak_mb_per_million_rows']:7.1f})")
+        if columns:
+            for column, mb in r['columns_mb_per_million_rows'].items():
+                print(f"    {column:<20} {mb:6.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory footprint of the metric table, default vs compact layout")
+    parser.add_argument("--columns", action="store_true", help="also print the per-column breakdown")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = run()
+    print_results(results, args.columns)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'environment': harness.environment(), 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
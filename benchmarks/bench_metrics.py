@@ -0,0 +1,84 @@
+import argparse
+import json
+import time
+
+import pandas as pd
+
+import metrics
+from benchmarks.synthetic import make_universe
+
+# (companies, quarters) sizes, up to the 10k x 80 target
+SIZES = [(100, 80), (1_000, 80), (10_000, 80)]
+
+
+# The per-company loop this engine replaces, kept as a baseline
+def per_company_metrics(frame):
+    parts = []
+    for _, group in frame.groupby('company', sort=False):
+        group = group.copy()
+        group['revenue_yoy'] = group['revenue'].pct_change() * 100
+        group['net_profit_yoy'] = group['net_profit'].diff()
+        group['free_cash_flow_yoy'] = group['free_cash_flow'].diff()
+        group['net_debt_yoy'] = group['net_debt'].pct_change() * 100
+        group['unit_sales_yoy'] = group['unit_sales'].pct_change() * 100
+        group.fillna(0, inplace=True)
+        group['revenue_per_unit'] = (group['revenue'] * 1e9) / group['unit_sales']
+        group['profit_margin'] = (group['net_profit'] / group['revenue']) * 100
+        group['debt_to_fcf'] = group['net_debt'] / group['free_cash_flow'].replace(0, float('nan'))
+        group['debt_to_fcf'] = group['debt_to_fcf'].replace([float('inf'), float('-inf')], float('nan'))
+        parts.append(group)
+    return pd.concat(parts)
+
+
+# Best-of-`repeat` wall time of fn(frame)
+def best_time(fn, frame, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(frame)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes=SIZES, repeat=3, baseline_limit=1_000):
+    results = []
+    for n_companies, n_periods in sizes:
+        frame = make_universe(n_companies, n_periods)
+        seconds = best_time(metrics.compute_metrics, frame, repeat)
+        result = {
+            'companies': n_companies,
+            'periods': n_periods,
+            'rows': len(frame),
+            'seconds': seconds,
+            'rows_per_second': len(frame) / seconds,
+        }
+        # The loop baseline is too slow to run at full size on every invocation
+        if n_companies <= baseline_limit:
+            result['baseline_seconds'] = best_time(per_company_metrics, frame, 1)
+            result['speedup'] = result['baseline_seconds'] / seconds
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the vectorized metric engine")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline-limit", type=int, default=1_000,
+                        help="largest company count to also time with the per-company loop")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = run(repeat=args.repeat, baseline_limit=args.baseline_limit)
+    for r in results:
+        line = f"{r['companies']:>6} companies x {r['periods']} periods: {r['rows']:>9,} rows in {r['seconds']*1000:8.1f} ms ({r['rows_per_second']:,.0f} rows/s)"
+        if 'speedup' in r:
+            line += f", {r['speedup']:.0f}x faster than per-company loop"
+        print(line)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
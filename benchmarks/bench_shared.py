@@ -0,0 +1,117 @@
+import argparse
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import shared_data
+from benchmarks import harness
+from benchmarks.synthetic import make_universe
+
+# (companies, quarters) sizes
+SIZES = [(1_000, 80), (10_000, 80), (25_000, 80)]
+WORKERS = 4
+
+
+# Resident memory of this process in MB, from /proc (Linux): anonymous
+# (private heap) pages, and the proportional set size, which divides shared
+# pages between the processes mapping them
+def memory_mb():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {'anon_mb': fields['Anonymous'], 'pss_mb': fields['Pss'], 'rss_mb': fields['Rss']}
+
+
+# One dashboard worker: hold the whole financials table, either loaded into
+# its own frame (what every worker does without the snapshot) or attached
+# from the memory-mapped snapshot, touch every value and report memory once
+# all workers hold it
+def worker(mode, file, ready, results):
+    before = memory_mb()
+    start = time.perf_counter()
+    if mode == "private":
+        with pa.OSFile(str(file)) as source:
+            data = pa.ipc.open_file(source).read_all().to_pandas(date_as_object=False)
+        total = data['revenue'].sum() + data['unit_sales'].sum() + data['company'].str.len().sum()
+    else:
+        data = shared_data.Snapshot(file).table
+        total = pc.sum(data['revenue']).as_py() + pc.sum(data['unit_sales']).as_py() + \
+            pc.sum(pc.utf8_length(data['company'])).as_py()
+    load_ms = (time.perf_counter() - start) * 1000
+    ready.wait()
+    after = memory_mb()
+    results.put({
+        'load_ms': load_ms, 'checksum': float(total),
+        **{key: after[key] - before[key] for key in after},
+    })
+    ready.wait()
+
+
+def run(sizes=SIZES, workers=WORKERS):
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for n_companies, n_periods in sizes:
+        frame = make_universe(n_companies, n_periods)
+        dataset = f"companies={n_companies:,} quarters={n_periods} rows={len(frame):,}"
+        with tempfile.TemporaryDirectory() as root:
+            snapshot = Path(root) / "financials-bench.arrow"
+            start = time.perf_counter()
+            shared_data.write_snapshot(frame, snapshot, "bench")
+            publish_ms = (time.perf_counter() - start) * 1000
+
+            for mode in ["private", "shared"]:
+                ready = context.Barrier(workers + 1)
+                queue = context.Queue()
+                processes = [context.Process(target=worker, args=(mode, snapshot, ready, queue)) for _ in range(workers)]
+                for process in processes:
+                    process.start()
+                ready.wait()
+                rows = [queue.get() for _ in processes]
+                ready.wait()
+                for process in processes:
+                    process.join()
+
+                loads = sorted(r['load_ms'] for r in rows)
+                record = harness.record(mode, dataset, f"{workers} workers", {
+                    'runs': workers, 'min_ms': loads[0], 'median_ms': loads[len(loads) // 2], 'max_ms': loads[-1],
+                })
+                for key in ['anon_mb', 'pss_mb', 'rss_mb']:
+                    record[f"worker_{key}"] = sum(r[key] for r in rows) / workers
+                if mode == "shared":
+                    record['publish_ms'] = publish_ms
+                    record['snapshot_mb'] = snapshot.stat().st_size / 2**20
+                results.append(record)
+    return results
+
+
+def print_results(results):
+    harness.print_results(results)
+    print()
+    for r in results:
+        print(f"{r['benchmark']:<7} {r['dataset']:<45} per worker: anon {r['worker_anon_mb']:7.1f} MB  "
+              f"pss {r['worker_pss_mb']:7.1f} MB  rss {r['worker_rss_mb']:7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker memory: a private copy of the financials vs the shared snapshot")
+    parser.add_argument("--sizes", default=",".join(f"{c}x{p}" for c, p in SIZES),
+                        help="comma-separated COMPANIESxQUARTERS sizes")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = run([tuple(int(n) for n in size.split("x")) for size in args.sizes.split(",")], args.workers)
+    print_results(results)
+    if args.json:
+        harness.write_results(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+
+
+# Run fn `repeat` times and summarise the wall times in milliseconds
+def timed(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return summarize(times)
+
+
+# Wall times in milliseconds, measured by the caller, as a result's stats
+def summarize(times):
+    return {
+        'runs': len(times),
+        'min_ms': min(times),
+        'median_ms': statistics.median(times),
+        'max_ms': max(times),
+    }
+
+
+def record(benchmark, dataset, case, stats):
+    return {'benchmark': benchmark, 'dataset': dataset, 'case': case, **stats}
+
+
+# Where and on what the results were measured
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    packages = {}
+    for name in ["streamlit", "pandas", "numpy", "plotly", "matplotlib", "pyarrow"]:
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            pass
+
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'packages': packages,
+    }
+
+
+def write_results(path, results):
+    with open(path, "w") as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+
+
+def print_results(results):
+    for r in results:
+        print(f"{r['benchmark']:<18} {r['dataset']:<14} {r['case']:<28} "
+              f"median {r['median_ms']:9.2f} ms  (min {r['min_ms']:9.2f}, n={r['runs']})")
+
+
+# Print median-time ratios between two result files, new / old
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    key = lambda r: (r['benchmark'], r['dataset'], r['case'])
+    baseline = {key(r): r for r in old['results']}
+    print(f"{old['environment'].get('commit')} -> {new['environment'].get('commit')}")
+    for r in new['results']:
+        before = baseline.get(key(r))
+        if before is None:
+            continue
+        ratio = r['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        print(f"{r['benchmark']:<18} {r['dataset']:<14} {r['case']:<28} "
+              f"{before['median_ms']:9.2f} -> {r['median_ms']:9.2f} ms  ({ratio:.2f}x)")
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+
+# Synthetic long (company, period) table shaped like the store's financials:
+# quarterly periods, random-walk revenue and unit sales, mixed-sign profit
+# and cash flow. Sorted by company then period.
+def make_universe(n_companies, n_periods, seed=0):
+    rng = np.random.default_rng(seed)
+    n = n_companies * n_periods
+
+    period_end = pd.date_range("2000-03-31", periods=n_periods, freq="QE")
+    companies = np.array([f"C{i:05d}" for i in range(n_companies)])
+
+    growth = rng.normal(0.01, 0.05, size=(n_companies, n_periods))
+    revenue = rng.uniform(0.5, 30.0, size=(n_companies, 1)) * np.exp(np.cumsum(growth, axis=1))
+    price = rng.uniform(20_000, 90_000, size=(n_companies, 1)) * np.exp(rng.normal(0, 0.02, size=(n_companies, n_periods)))
+    unit_sales = np.maximum((revenue * 1e9 / price).round(), 1)
+
+    return pd.DataFrame({
+        'company': np.repeat(companies, n_periods),
+        'fiscal_years': np.tile(period_end.to_period("Q").astype(str), n_companies),
+        'period_end': np.tile(period_end.values, n_companies),
+        'revenue': revenue.ravel().round(3),
+        'net_profit': (revenue * rng.normal(0.04, 0.06, size=(n_companies, n_periods))).ravel().round(3),
+        'free_cash_flow': (revenue * rng.normal(0.03, 0.08, size=(n_companies, n_periods))).ravel().round(3),
+        'net_debt': (revenue * rng.uniform(0.0, 0.6, size=(n_companies, n_periods))).ravel().round(3),
+        'unit_sales': unit_sales.ravel().astype(np.int64),
+    }, index=pd.RangeIndex(n))
+
+
+# Company reference rows for make_universe's ids, spread over a few sectors and regions
+def make_companies(n_companies, seed=0):
+    rng = np.random.default_rng(seed)
+    sectors = np.array(['Automotive', 'Industrials', 'Consumer', 'Technology'])
+    regions = np.array(['Europe', 'North America', 'Asia'])
+    return pd.DataFrame({
+        'company': [f"C{i:05d}" for i in range(n_companies)],
+        'name': [f"Company {i}" for i in range(n_companies)],
+        'sector': sectors[rng.integers(len(sectors), size=n_companies)],
+        'region': regions[rng.integers(len(regions), size=n_companies)],
+    })
+
+
+# JLR-style model lines: (model, brand, base price £)
+MODEL_LINES = [
+    ('F-PACE', 'Jaguar', 55_000), ('E-PACE', 'Jaguar', 38_000), ('I-PACE', 'Jaguar', 70_000),
+    ('F-TYPE', 'Jaguar', 75_000), ('XF', 'Jaguar', 42_000), ('XE', 'Jaguar', 36_000),
+    ('Discovery', 'Land Rover', 62_000), ('Discovery Sport', 'Land Rover', 40_000),
+    ('Range Rover', 'Range Rover', 110_000), ('Range Rover Sport', 'Range Rover', 85_000),
+    ('Range Rover Velar', 'Range Rover', 58_000), ('Range Rover Evoque', 'Range Rover', 42_000),
+    ('Defender', 'Defender', 65_000),
+]
+SALES_REGIONS = ['UK', 'North America', 'Europe', 'China', 'Overseas']
+
+
+# Synthetic sales rows in the store's sales schema: one row per sale record
+# (a few units of one model line in one region), over annual fiscal periods
+# ending FY23/24. String columns are categorical to keep large frames small.
+def make_sales(n_rows, company="JLR", n_periods=3, seed=0):
+    rng = np.random.default_rng(seed)
+    models, brands, prices = (np.array(column) for column in zip(*MODEL_LINES))
+
+    last_year = 2024
+    years = np.arange(last_year - n_periods + 1, last_year + 1)
+    labels = np.array([f"FY{(y - 1) % 100:02d}/{y % 100:02d}" for y in years])
+    period_ends = pd.to_datetime([f"{y}-03-31" for y in years])
+
+    period = rng.integers(n_periods, size=n_rows)
+    model = rng.choice(len(models), size=n_rows, p=np.linspace(2, 1, len(models)) / np.linspace(2, 1, len(models)).sum())
+    region = rng.integers(len(SALES_REGIONS), size=n_rows)
+    units = rng.integers(1, 6, size=n_rows)
+    price = prices[model] * rng.lognormal(0, 0.1, size=n_rows)
+
+    order = np.lexsort((model, region, period))
+    return pd.DataFrame({
+        'company': pd.Categorical.from_codes(np.zeros(n_rows, dtype=np.int8), [company]),
+        'fiscal_years': pd.Categorical.from_codes(period[order], labels),
+        'period_end': period_ends[period[order]],
+        'brand': pd.Categorical(brands[model[order]]),
+        'region': pd.Categorical.from_codes(region[order], SALES_REGIONS),
+        'model': pd.Categorical.from_codes(model[order], models),
+        'unit_sales': units[order],
+        'revenue': (units * price / 1e9)[order],
+    })
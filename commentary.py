@@ -0,0 +1,527 @@
+import argparse
+import itertools
+import operator
+import time
+from pathlib import Path
+
+import jinja2
+
+import metrics
+import store
+
+# Sections of the written analysis, in dashboard order
+SECTIONS = [
+    'overview', 'revenue_analysis', 'unit_sales_analysis', 'revenue_per_unit_analysis', 'profitability_analysis',
+    'operating_efficiency', 'free_cash_flow_analysis', 'net_debt_analysis', 'debt_to_fcf_analysis',
+    'operational_drivers', 'strategic_drivers', 'outlook',
+]
+
+# Period-by-period observations cover at most this many of the latest periods
+RECENT_PERIODS = 5
+
+# Free cash flow of at least this share of revenue counts as strong
+STRONG_FCF_PCT = 5.0
+
+NUMBER_WORDS = ['zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten']
+
+# Written analysis for individual companies: qualitative context the metric
+# table cannot supply, spliced into the rendered sections. `strategy` names
+# the company's strategic programme in the dashboard headings.
+NARRATIVE = {
+    'JLR': {
+        'strategy': "Reimagine",
+        'overview': """
+Jaguar Land Rover has been executing its "Reimagine" strategy with remarkable results.
+This dashboard analyzes the financial impact of JLR's transformation across three key pillars:
+
+* **Electrification**: Transitioning to electric-powered models including the flagship Range Rover Electric
+* **Modern Luxury & Brand Distinction**: Repositioning its brands to deliver distinctive luxury experiences
+* **Operational & Financial Turnaround**: Successfully addressing supply chain issues, reducing debt, and improving cash flow
+
+The analysis below demonstrates how these strategic initiatives have driven significant financial improvements.
+""",
+        'revenue_reasoning': """
+* **Improved Production & Supply Chain:** Resolution of semiconductor shortages and supply chain constraints
+* **Premium Product Mix:** Successful launches of new Range Rover models and SV Edition vehicles
+* **Electrification Strategy:** Growing market interest in JLR's electrified offerings
+* **Recovery in Global Demand:** Strengthening consumer confidence in luxury vehicle segment
+""",
+        'unit_sales_reasoning': """
+* **Initial Decline:** Production constraints and market uncertainty in FY22/23
+* **Strong Recovery:** Supply improvements and pent-up demand in FY23/24
+* **Market Confidence:** Return of consumer confidence in JLR's luxury offerings
+* **New Model Impact:** Success of refreshed Range Rover and Discovery product lines
+""",
+        'revenue_per_unit_insights': """
+* **Value Enhancement:** JLR's "Modern Luxury" strategy is yielding higher transaction prices
+* **Brand Strength:** The ability to command premium pricing demonstrates the strength of JLR's brand positioning
+* **Profitable Growth:** This metric shows that growth is coming from both volume and value, supporting improved profitability
+""",
+        'profitability_reasoning': """
+* **Operational Efficiencies:** Resolution of production bottlenecks and supply chain optimization
+* **Economies of Scale:** Higher production volumes lowering per-unit costs
+* **Premium Product Mix:** Higher-margin vehicles improving overall profitability
+* **Strategic Investments Paying Off:** Technology investments yielding productivity improvements
+* **Cost Discipline:** Successful implementation of cost-saving initiatives
+""",
+        'profitability_conclusion': """
+This demonstrates the effectiveness of JLR's "Reimagine" strategy in transforming its business model.
+""",
+        'operating_efficiency': """
+**Key Efficiency Drivers:**
+
+1. **Supply Chain Optimization:**
+   * Resolution of semiconductor shortages
+   * Improved component sourcing
+   * Enhanced logistics management
+
+2. **Production Improvements:**
+   * Increased plant utilization
+   * Streamlined manufacturing processes
+   * Higher throughput with better quality control
+
+3. **Strategic Cost Management:**
+   * Fixed cost optimization
+   * Targeted reduction in non-essential spending
+   * Better supplier partnerships and negotiations
+
+4. **Technology Integration:**
+   * Digital transformation initiatives
+   * Automation of key processes
+   * Data-driven decision making
+
+The combined effect has transformed JLR from an operationally challenged business to one demonstrating industry-competitive margins and financial performance.
+""",
+        'free_cash_flow_reasoning': """
+* **Working Capital Management:** Improved inventory management and accounts receivable/payable processes
+* **Operational Efficiencies:** Higher earnings from core operations
+* **Capital Expenditure Optimization:** More targeted and efficient use of capital investments
+* **Cash Flow Discipline:** Strategic focus on cash generation across the organization
+
+This remarkable improvement in free cash flow has been a key enabler of JLR's debt reduction strategy.
+""",
+        'net_debt_reasoning': """
+* **Enhanced Free Cash Flow:** Surplus cash deployed to pay down debt
+* **Deleveraging Strategy:** Focused effort to strengthen the balance sheet
+* **Financial Resilience Building:** Creating capacity for future strategic investments
+* **Lower Interest Burden:** Reduced debt leads to lower interest expenses, further improving profitability
+""",
+        'net_debt_conclusion': """
+This highlights the effectiveness of JLR's financial management strategy and positions the company for future growth investments, particularly in electrification.
+""",
+        'debt_to_fcf_conclusion': """
+JLR has achieved a significantly more sustainable financial position, with debt levels that can be serviced comfortably by operating cash flows.
+""",
+        'operational_drivers': """
+### Operational Drivers
+
+1. **Supply Chain Resilience:**
+   * Resolution of semiconductor constraints
+   * Diversification of supplier base
+   * Enhanced logistics operations
+
+2. **Production Optimization:**
+   * Improved manufacturing efficiency
+   * Better capacity utilization
+   * Quality improvements reducing waste
+
+3. **Premium Product Mix:**
+   * Focus on higher-margin vehicles
+   * Successful Range Rover portfolio update
+   * "Modern Luxury" positioning driving higher transaction prices
+
+4. **Cost Discipline:**
+   * Fixed cost optimization
+   * Strategic sourcing initiatives
+   * Digital transformation reducing operational costs
+""",
+        'strategic_drivers': """
+### Strategic Drivers
+
+1. **"Reimagine" Strategy Execution:**
+   * Clear strategic direction
+   * Focused implementation of key initiatives
+   * Measurable outcomes and accountability
+
+2. **Electrification Progress:**
+   * Investment in electric vehicle platforms
+   * Announcement of Range Rover Electric
+   * Building capabilities for future growth
+
+3. **Brand Strengthening:**
+   * Enhanced brand differentiation
+   * Customer experience improvements
+   * Higher perceived value in marketplace
+
+4. **Financial Management:**
+   * Working capital optimization
+   * Disciplined capital allocation
+   * Strategic debt reduction
+""",
+        'outlook': """
+### Key Strategic Implications
+
+Based on JLR's financial transformation over the past three years, several strategic implications emerge:
+
+1. **Financial Foundation for Electrification**
+   * The improved financial position provides the foundation for accelerating JLR's electrification strategy
+   * Reduced debt and strong cash flow enable higher R&D and capital investments in electric vehicle platforms
+   * JLR can now self-fund its transition to electrification rather than relying on external financing
+
+2. **Competitive Positioning**
+   * JLR has strengthened its competitive position in the luxury automotive segment
+   * The combination of improved operations, distinctive brand positioning, and financial resilience creates a sustainable advantage
+   * The company is better positioned to respond to market shifts and competitive threats
+
+3. **Growth Potential**
+   * With operational excellence established, JLR can focus on strategic growth initiatives
+   * The strong unit sales recovery indicates market receptiveness to JLR's modern luxury positioning
+   * Future product launches, particularly in the electrified segment, can build on this momentum
+
+4. **Risk Management**
+   * Significantly lower net debt reduces financial risk
+   * Operational improvements create resilience against supply chain disruptions
+   * The business can better withstand economic cycles and industry shifts
+
+### Future Outlook
+
+JLR's transformation positions the company for continued success, though several factors will influence its future trajectory:
+
+1. **Electrification Execution**
+   * Success of Range Rover Electric and other EV launches
+   * Consumer adoption rates of luxury electric vehicles
+   * Charging infrastructure development
+
+2. **Global Market Conditions**
+   * Economic growth in key markets
+   * Luxury consumer confidence
+   * Regulatory environment for automotive manufacturers
+
+3. **Supply Chain Evolution**
+   * Component availability for electric vehicles
+   * Raw material costs, especially for batteries
+   * Global logistics developments
+
+4. **Competitive Landscape**
+   * Actions by traditional luxury automotive competitors
+   * New entrants from technology sector
+   * Evolution of mobility models and consumer preferences
+
+The financial data clearly indicates that JLR's "Reimagine" strategy is delivering tangible results. With continued disciplined execution, the company is well-positioned to capitalize on the luxury electric vehicle opportunity while maintaining its distinctive brand positioning.
+""",
+    },
+}
+
+# Section templates, rendered from the context built by `context`
+SOURCES = {
+    'overview': """
+{% if narrative.overview %}
+{{ narrative.overview|trim }}
+{% else %}
+This dashboard analyzes {{ name }}'s financial performance from {{ first.label }} to {{ last.label }}.
+Revenue went from {{ first.revenue|money }} to {{ last.revenue|money }} ({{ growth(last.revenue, first.revenue, 0) }}), \
+and {{ last.label }} closed with a net {{ 'profit' if last.net_profit >= 0 else 'loss' }} of {{ last.net_profit|abs|money }}.
+{% endif %}
+""",
+    'revenue_analysis': """
+**Key Observations:**
+{% for p in changes %}
+* **{{ p.prev.label }} to {{ p.label }}:** {{ growth(p.revenue, p.prev.revenue, 0) }} from {{ p.prev.revenue|money }} to {{ p.revenue|money }}
+{% endfor %}
+{% if periods|length > 2 %}
+* **Overall Growth:** {{ growth(last.revenue, first.revenue, 0) }} over the {{ span }}
+{% endif %}
+{% if narrative.revenue_reasoning %}
+
+**Reasoning:**
+{{ narrative.revenue_reasoning|trim }}
+{% endif %}
+""",
+    'unit_sales_analysis': """
+**Key Observations:**
+{% for p in changes %}
+* **{{ p.prev.label }} to {{ p.label }}:** {{ growth(p.unit_sales, p.prev.unit_sales) }} from {{ p.prev.unit_sales|units }} to {{ p.unit_sales|units }} units
+{% endfor %}
+{% if periods|length > 2 %}
+* **Overall Growth:** {{ growth(last.unit_sales, first.unit_sales) }} over the {{ span }}
+{% endif %}
+{% if narrative.unit_sales_reasoning %}
+
+**Reasoning:**
+{{ narrative.unit_sales_reasoning|trim }}
+{% endif %}
+""",
+    'revenue_per_unit_analysis': """
+**Revenue per Unit Analysis:**
+
+{% for p in recent %}
+* **{{ p.label }}:** £{{ p.revenue_per_unit|units }} per {{ unit_name }}
+{% endfor %}
+{% if biggest_price_move %}
+{% set p = biggest_price_move %}
+{% set change = pct_change(p.revenue_per_unit, p.prev.revenue_per_unit) %}
+
+**Key Insights:**
+{% if change > 0 %}
+* **Premium Mix Shift:** The {{ 'significant ' if change >= 10 }}increase in revenue per unit ({{ '%.0f'|format(change) }}% from {{ p.prev.label }} to {{ p.label }}) indicates a shift toward higher-value products
+{% else %}
+* **Mix Pressure:** Revenue per unit fell {{ '%.0f'|format(-change) }}% from {{ p.prev.label }} to {{ p.label }}, pointing to a lower-value mix or pricing pressure
+{% endif %}
+{% if narrative.revenue_per_unit_insights %}
+{{ narrative.revenue_per_unit_insights|trim }}
+{% endif %}
+{% endif %}
+""",
+    'profitability_analysis': """
+**Key Observations:**
+{% for p in recent %}
+* **{{ p.label }}:** {{ p.net_profit|abs|money }} {{ 'profit' if p.net_profit >= 0 else 'loss' }}{{ profit_note(p) }}
+{% endfor %}
+{% if narrative.profitability_reasoning %}
+
+**Reasoning:**
+{{ narrative.profitability_reasoning|trim }}
+{% endif %}
+
+**Profit Margin{{ ' Transformation' if margin_change|abs >= 5 }}:**
+{% for p in recent %}
+* **{{ p.label }}:** {{ '%.1f'|format(p.profit_margin) }}% margin
+{% endfor %}
+{% if periods|length > 1 %}
+
+This represents a {{ '%.1f'|format(margin_change|abs) }} percentage point {{ 'improvement' if margin_change >= 0 else 'decline' }} in profit margin over the {{ span }}.
+{%- if narrative.profitability_conclusion %} {{ narrative.profitability_conclusion|trim }}{% endif %}
+
+{% endif %}
+""",
+    'operating_efficiency': """
+{{ narrative.operating_efficiency|trim }}
+""",
+    'free_cash_flow_analysis': """
+**Key Observations:**
+{% for p in recent %}
+* **{{ p.label }}:** {{ p.free_cash_flow|money }} ({{ cash_flow_note(p) }})
+{% endfor %}
+{% if narrative.free_cash_flow_reasoning %}
+
+**Reasoning:**
+{{ narrative.free_cash_flow_reasoning|trim }}
+{% endif %}
+""",
+    'net_debt_analysis': """
+**Key Observations:**
+{% for p in recent %}
+* **{{ p.label }}:** {{ p.net_debt|abs|money }} {{ 'net debt' if p.net_debt >= 0 else 'net cash' }}{{ debt_note(p) }}
+{% endfor %}
+{% if narrative.net_debt_reasoning %}
+
+**Reasoning:**
+{{ narrative.net_debt_reasoning|trim }}
+{% endif %}
+{% if periods|length > 1 and first.net_debt > 0 and last.net_debt >= 0 %}
+{% set change = pct_change(last.net_debt, first.net_debt) %}
+
+Net debt {{ 'fell' if change < 0 else 'rose' }} {{ '%.0f'|format(change|abs) }}% over the {{ span }}.
+{%- if narrative.net_debt_conclusion %} {{ narrative.net_debt_conclusion|trim }}{% endif %}
+
+{% endif %}
+""",
+    'debt_to_fcf_analysis': """
+**Debt to Free Cash Flow Ratio:**
+{% for p in covered %}
+* **{{ p.label }}:** {{ '%.1f'|format(p.debt_to_fcf) }}x
+{% endfor %}
+{% if not covered %}
+* Free cash flow was not positive in the periods shown, so the ratio is not meaningful
+{% elif covered|length > 1 %}
+{% set start, end = covered[0].debt_to_fcf, covered[-1].debt_to_fcf %}
+
+The ratio {{ 'improved' if end < start else 'rose' }} from {{ '%.1f'|format(start) }}x to {{ '%.1f'|format(end) }}x: \
+net debt now equals about {{ '%.1f'|format(end) }} years of free cash flow.
+{%- if end < start and narrative.debt_to_fcf_conclusion %} {{ narrative.debt_to_fcf_conclusion|trim }}{% endif %}
+
+{% endif %}
+""",
+    'operational_drivers': """
+{{ narrative.operational_drivers|trim }}
+""",
+    'strategic_drivers': """
+{{ narrative.strategic_drivers|trim }}
+""",
+    'outlook': """
+{{ narrative.outlook|trim }}
+""",
+}
+
+
+def money(value):
+    return f"-£{-value:.1f}B" if value < 0 else f"£{value:.1f}B"
+
+
+def units(value):
+    return f"{value:,.0f}"
+
+
+def pct_change(new, old):
+    return (new / old - 1) * 100 if old else float('nan')
+
+
+# "24% increase", "5.8% decrease"
+def growth(new, old, digits=1):
+    change = pct_change(new, old)
+    if change != change:
+        return "no comparable change"
+    return f"{abs(change):.{digits}f}% {'increase' if change >= 0 else 'decrease'}"
+
+
+def profit_note(p):
+    prev = p['prev']
+    if prev is None or prev['net_profit'] == 0:
+        return ""
+    old, new = prev['net_profit'], p['net_profit']
+    if old < 0 <= new:
+        return " (turnaround to profit)"
+    if new < 0 <= old:
+        return " (swing to a loss)"
+    change = abs(pct_change(new, old))
+    if old < 0:
+        return f" ({change:.0f}% {'reduction in' if new > old else 'wider'} losses)"
+    return f" ({change:.0f}% {'increase' if new >= old else 'decrease'})"
+
+
+def cash_flow_note(p):
+    prev, value = p['prev'], p['free_cash_flow']
+    if value < 0:
+        return "negative free cash flow"
+    if prev is not None and prev['free_cash_flow'] < 0:
+        return "transition to positive cash flow"
+    if p['revenue'] and value / p['revenue'] * 100 >= STRONG_FCF_PCT:
+        return "strong positive free cash flow generation"
+    return "positive free cash flow"
+
+
+def debt_note(p):
+    prev = p['prev']
+    if prev is None or prev['net_debt'] <= 0 or p['net_debt'] < 0:
+        return ""
+    change = pct_change(p['net_debt'], prev['net_debt'])
+    return f" ({abs(change):.1f}% {'reduction' if change < 0 else 'increase'})"
+
+
+# Templates are compiled once, at import; rendering a company only evaluates them
+ENV = jinja2.Environment(trim_blocks=True, lstrip_blocks=True, undefined=jinja2.ChainableUndefined)
+ENV.filters.update(money=money, units=units)
+ENV.globals.update(pct_change=pct_change, growth=growth, profit_note=profit_note, cash_flow_note=cash_flow_note,
+                   debt_note=debt_note)
+TEMPLATES = {name: ENV.from_string(SOURCES[name].strip("\n")) for name in SECTIONS}
+
+
+# "three-year period" for fiscal years, "12-quarter period" for quarters
+def span_label(labels):
+    n = len(labels)
+    unit = "year" if str(labels[0]).startswith("FY") else "quarter"
+    return f"{NUMBER_WORDS[n] if n < len(NUMBER_WORDS) else n}-{unit} period"
+
+
+# Columns of the metric table the templates read
+COLUMNS = ['fiscal_years', *metrics.BASE_COLUMNS, 'revenue_per_unit', 'profit_margin', 'debt_to_fcf']
+
+
+# Template context for one company's periods (metric table rows as dicts,
+# oldest first): every period linked to the one before it, plus the figures
+# the summaries need
+def context(rows, company, name=None, sector=None):
+    periods = []
+    for row in rows:
+        period = {column: row[column] for column in COLUMNS}
+        period['label'] = period.pop('fiscal_years')
+        period['prev'] = periods[-1] if periods else None
+        periods.append(period)
+
+    recent = periods[-RECENT_PERIODS:]
+    changes = [p for p in recent if p['prev'] is not None]
+    moves = [p for p in changes if p['prev']['revenue_per_unit']]
+    return {
+        'company': company,
+        'name': name or company,
+        'unit_name': "vehicle" if sector == "Automotive" else "unit",
+        'narrative': NARRATIVE.get(company, {}),
+        'periods': periods,
+        'recent': recent,
+        'changes': changes,
+        'covered': [p for p in recent if p['free_cash_flow'] > 0],
+        'first': periods[0],
+        'last': periods[-1],
+        'span': span_label([p['label'] for p in periods]),
+        'margin_change': periods[-1]['profit_margin'] - periods[0]['profit_margin'],
+        'biggest_price_move': max(
+            moves, key=lambda p: abs(pct_change(p['revenue_per_unit'], p['prev']['revenue_per_unit'])), default=None
+        ),
+    }
+
+
+def render_rows(rows, company, name=None, sector=None):
+    if not rows:
+        return dict.fromkeys(SECTIONS, "")
+    values = context(rows, company, name, sector)
+    return {section: TEMPLATES[section].render(values).strip() for section in SECTIONS}
+
+
+# Every section of the written analysis for one company's metric table, as markdown
+def render(data, company, name=None, sector=None):
+    return render_rows(data[COLUMNS].to_dict('records'), company, name, sector)
+
+
+# Render every company of a long metric table sorted by company then period;
+# yields (company, sections). The table is converted to rows once, not per
+# company. `companies` is the company reference table, for names and sectors.
+def render_all(frame, companies=None):
+    info = {} if companies is None else companies.set_index('company')[['name', 'sector']].to_dict('index')
+    rows = frame[['company', *COLUMNS]].to_dict('records')
+    for company, group in itertools.groupby(rows, key=operator.itemgetter('company')):
+        details = info.get(company, {})
+        yield company, render_rows(list(group), company, details.get('name'), details.get('sector'))
+
+
+# Section 5 headings for a company, shared by the dashboard and the exported
+# report: the strategy heading names the company's programme when NARRATIVE
+# has one
+def headings(company):
+    strategy = NARRATIVE.get(company, {}).get('strategy')
+    return {
+        'drivers': f"Key Drivers of {company}'s Financial Turnaround",
+        'strategy': f"'{strategy}' Strategy Impact on Financial Performance" if strategy else "Strategic Indicators",
+        'outlook': "Future Outlook & Strategic Implications",
+    }
+
+
+# All sections as one markdown document
+def to_markdown(name, sections):
+    body = "\n\n".join(text for text in sections.values() if text)
+    return f"# {name}\n\n{body}\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the written analysis for companies in the store")
+    parser.add_argument("companies", nargs="*", help="company ids (default: every company in the store)")
+    parser.add_argument("--output-dir", default="commentary")
+    parser.add_argument("--store", help="store directory (default: FINANCIALS_STORE or data/store)")
+    args = parser.parse_args()
+
+    frame = store.load_financials(args.companies or None, path=args.store, columns=store.SCHEMA.names)
+    companies = store.load_companies(args.store)
+    names = dict(zip(companies['company'], companies['name']))
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    count = 0
+    for company, sections in render_all(metrics.compute_metrics(frame), companies):
+        (output_dir / f"{company}.md").write_text(to_markdown(names.get(company, company), sections), encoding="utf-8")
+        count += 1
+    elapsed = time.perf_counter() - start
+    print(f"Wrote commentary for {count:,} companies in {elapsed:.2f}s ({elapsed / max(count, 1) * 1000:.2f} ms each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import argparse
+import itertools
+import json
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import store
+
+# Drill-down dimensions of the sales rows, coarsest first
+DIMENSIONS = ['brand', 'region', 'model']
+
+# Every rollup keeps the company and period
+KEYS = ['company', 'fiscal_years', 'period_end']
+MEASURES = ['unit_sales', 'revenue']
+
+# Partial aggregates are merged once this many have accumulated, bounding
+# memory however many sales rows are scanned
+MERGE_EVERY = 64
+
+
+def default_path(store_path=None):
+    return Path(store_path or store.STORE_PATH) / "cube"
+
+
+# File stem of the rollup grouped by `dims` (any order); "total" for none
+def level_name(dims):
+    return "+".join(d for d in DIMENSIONS if d in dims) or "total"
+
+
+# Every subset of DIMENSIONS: the grouping sets of the cube
+def grouping_sets():
+    return [dims for n in range(len(DIMENSIONS) + 1) for dims in itertools.combinations(DIMENSIONS, n)]
+
+
+# Sum the measures of `table` by `keys`
+def aggregate(table, keys):
+    out = table.group_by(keys).aggregate([(m, "sum") for m in MEASURES])
+    out = out.rename_columns([c.removesuffix("_sum") for c in out.column_names])
+    return out.select(keys + MEASURES)
+
+
+# Build the cube offline: one streaming pass over the sales rows aggregates
+# them to the finest level (every dimension), and each coarser rollup is
+# summed from that much smaller table. Rollups are written as one Parquet
+# file per grouping set.
+def build(store_path=None, out=None):
+    out = Path(out or default_path(store_path))
+    source = store._dataset_path(store_path, "sales")
+    if not source.exists():
+        raise FileNotFoundError(f"no sales rows in {source}; write some with store.write_sales")
+
+    dataset = ds.dataset(source, format="parquet", partitioning=store.PARTITIONING)
+    finest_keys = KEYS + DIMENSIONS
+    partials = []
+    rows = 0
+    for batch in dataset.to_batches(columns=finest_keys + MEASURES):
+        rows += batch.num_rows
+        partials.append(aggregate(pa.Table.from_batches([batch]), finest_keys))
+        if len(partials) >= MERGE_EVERY:
+            partials = [aggregate(pa.concat_tables(partials), finest_keys)]
+    finest = aggregate(pa.concat_tables(partials), finest_keys)
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    scratch = Path(tempfile.mkdtemp(dir=out.parent, prefix=".cube-"))
+    levels = {}
+    for dims in grouping_sets():
+        keys = KEYS + list(dims)
+        rollup = aggregate(finest, keys).sort_by([(k, "ascending") for k in keys])
+        pq.write_table(rollup, scratch / f"{level_name(dims)}.parquet")
+        levels[level_name(dims)] = rollup.num_rows
+
+    meta = {
+        'version': uuid.uuid4().hex,
+        'built_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'source_rows': rows,
+        'levels': levels,
+        'companies': sorted(finest['company'].unique().to_pylist()),
+        'values': {d: sorted(finest[d].unique().to_pylist()) for d in DIMENSIONS},
+    }
+    with open(scratch / "meta.json", "w") as f:
+        json.dump(meta, f)
+    store.swap_directory(scratch, out)
+    return meta
+
+
+# Metadata of the built cube, or None if it has not been built
+def load_meta(store_path=None):
+    path = default_path(store_path) / "meta.json"
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+# Rows of the rollup grouped by `by`, restricted to `company` and to
+# `filters` ({dimension: value}). Filtered dimensions are part of the
+# rollup read, so the result has one row per period and `by` combination.
+def load_rollup(by, company=None, filters=None, store_path=None):
+    filters = {d: v for d, v in (filters or {}).items() if v is not None}
+    path = default_path(store_path) / f"{level_name(set(by) | set(filters))}.parquet"
+    expr = [('company', '=', company)] if company is not None else []
+    expr += [(d, '=', v) for d, v in filters.items()]
+    table = pq.read_table(path, filters=expr or None)
+    return table.to_pandas(date_as_object=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the sales drill-down cube")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="rebuild every rollup from the sales rows in the store")
+    build_parser.add_argument("--store", help="store directory (default: FINANCIALS_STORE or data/store)")
+    query_parser = sub.add_parser("query", help="print one rollup")
+    query_parser.add_argument("--by", default="brand", help="comma-separated dimensions")
+    query_parser.add_argument("--company")
+    query_parser.add_argument("--filter", action="append", default=[], metavar="DIM=VALUE")
+    query_parser.add_argument("--store", help="store directory (default: FINANCIALS_STORE or data/store)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        meta = build(args.store)
+        print(f"Rolled up {meta['source_rows']:,} sales rows into {len(meta['levels'])} levels "
+              f"({sum(meta['levels'].values()):,} rows) in {time.perf_counter() - start:.1f}s")
+    else:
+        filters = dict(f.split("=", 1) for f in args.filter)
+        start = time.perf_counter()
+        rollup = load_rollup(args.by.split(","), args.company, filters, args.store)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(rollup.to_string(index=False))
+        print(f"read in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pyarrow as pa
+
+# SQLite file shared by every app process on the host; override with the
+# FINANCIALS_CACHE env var, or set it to "off" to disable the disk tier
+CACHE_PATH = os.environ.get("FINANCIALS_CACHE", str(Path(__file__).parent / "data" / "cache.sqlite"))
+
+# Total payload size kept on disk; least recently used entries are evicted past it
+MAX_BYTES = int(os.environ.get("FINANCIALS_CACHE_MB", "256")) * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+# Drop the oldest entries whose running size (newest first) overflows the budget
+EVICT = """
+DELETE FROM entries WHERE key IN (
+    SELECT key FROM (
+        SELECT key, SUM(size) OVER (ORDER BY accessed DESC, key) AS running FROM entries
+    ) WHERE running > ?
+)
+"""
+
+_local = threading.local()
+_stats = {"hits": 0, "misses": 0, "errors": 0}
+_stats_lock = threading.Lock()
+
+
+def enabled():
+    return CACHE_PATH.lower() not in ("", "off")
+
+
+# One connection per thread (sqlite3 connections are not shared across
+# threads); reopened when CACHE_PATH changes
+def _connect():
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == CACHE_PATH:
+        return conn
+
+    Path(CACHE_PATH).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(CACHE_PATH, timeout=30, isolation_level=None)
+    # WAL lets readers in other processes proceed while one process writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    _local.conn, _local.path = conn, CACHE_PATH
+    return conn
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+# Cache key from any reprs: a content hash, so callers can pass data
+# fingerprints, code versions and arguments together
+def make_key(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+# Hash of a module's source file; part of a key so a deploy with changed code
+# never serves results computed by the old code
+def source_version(module):
+    return hashlib.sha1(Path(module.__file__).read_bytes()).hexdigest()[:16]
+
+
+# Cached bytes for `key`, or None. The disk tier is an optimization only:
+# any SQLite error counts as a miss.
+def get(key):
+    if not enabled():
+        return None
+    try:
+        conn = _connect()
+        row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+    except sqlite3.Error:
+        _count("errors")
+        return None
+    _count("misses" if row is None else "hits")
+    return None if row is None else row[0]
+
+
+# Store bytes under `key`; the insert and the eviction commit as one
+# transaction, so other processes see either the old or the new state
+def set(key, value):
+    if not enabled():
+        return
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time())
+            )
+            conn.execute(EVICT, (MAX_BYTES,))
+    except sqlite3.Error:
+        _count("errors")
+
+
+# DataFrames are stored as Arrow IPC streams, which keep dtypes and decode
+# without parsing
+def get_frame(key):
+    payload = get(key)
+    if payload is None:
+        return None
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+
+def set_frame(key, frame):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    set(key, sink.getvalue().to_pybytes())
+
+
+def info():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update(entries=0, bytes=0, max_bytes=MAX_BYTES)
+    if enabled():
+        try:
+            entries, size = _connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            stats.update(entries=entries, bytes=size)
+        except sqlite3.Error:
+            pass
+    return stats
+
+
+def clear():
+    with _stats_lock:
+        _stats.update(hits=0, misses=0, errors=0)
+    if enabled():
+        _connect().execute("DELETE FROM entries")
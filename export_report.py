@@ -0,0 +1,392 @@
+import argparse
+import html
+import logging
+import os
+import re
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import markdown
+
+# financials caches with st.cache_data, which outside `streamlit run` falls
+# back to an in-process cache and logs a warning for every cached function.
+# Streamlit resets its loggers' levels when it loads its config, so the
+# logger is disabled rather than raised to ERROR.
+logging.getLogger("streamlit.runtime.caching.cache_data_api").disabled = True
+
+import commentary
+import figures
+import financials
+import scenarios
+import store
+
+# The five dashboard sections as (title, blocks). A block is ("figure", chart
+# id), ("commentary", section) for a section of the company's written
+# analysis, ("subheading", text), ("heading", key) for a company-specific
+# subheading from commentary.headings, ("metrics", None) for the headline
+# metric cards, or ("columns", [blocks, blocks]) for a two-column row.
+REPORT = [
+    ("Financial Performance Dashboard", [
+        ("commentary", "overview"),
+        ("metrics", None),
+        ("subheading", "Key Financial Metrics"),
+        ("figure", "dashboard"),
+        ("subheading", "Unit Sales Performance"),
+        ("figure", "unit_sales_overview"),
+    ]),
+    ("Revenue & Unit Sales Analysis", [
+        ("columns", [
+            [("figure", "revenue"), ("subheading", "Revenue Analysis"), ("commentary", "revenue_analysis")],
+            [("figure", "unit_sales"), ("subheading", "Unit Sales Analysis"), ("commentary", "unit_sales_analysis")],
+        ]),
+        ("subheading", "Revenue vs. Unit Sales Relationship"),
+        ("columns", [
+            [("figure", "revenue_per_unit")],
+            [("commentary", "revenue_per_unit_analysis")],
+        ]),
+    ]),
+    ("Profitability & Operating Performance", [
+        ("columns", [
+            [("figure", "net_profit"), ("figure", "profit_margin")],
+            [("subheading", "Profitability Analysis"), ("commentary", "profitability_analysis"),
+             ("subheading", "Operating Efficiency"), ("commentary", "operating_efficiency")],
+        ]),
+    ]),
+    ("Cash Flow & Debt Management", [
+        ("columns", [
+            [("figure", "free_cash_flow"), ("subheading", "Free Cash Flow Analysis"),
+             ("commentary", "free_cash_flow_analysis")],
+            [("figure", "net_debt"), ("subheading", "Net Debt Analysis"), ("commentary", "net_debt_analysis"),
+             ("commentary", "debt_to_fcf_analysis")],
+        ]),
+    ]),
+    ("Strategic Analysis & Future Outlook", [
+        ("heading", "drivers"),
+        ("columns", [
+            [("commentary", "operational_drivers")],
+            [("commentary", "strategic_drivers")],
+        ]),
+        ("heading", "strategy"),
+        ("figure", "strategy_indicators"),
+        ("subheading", "Scenario Projections"),
+        ("figure", "scenario_indicators"),
+        ("figure", "scenario_fan"),
+        ("heading", "outlook"),
+        ("commentary", "outlook"),
+    ]),
+]
+
+# Charts drawn from a scenario projection (default assumptions) rather than
+# the metric table
+SCENARIO_CHARTS = {'scenario_fan', 'scenario_indicators'}
+
+STYLE = """
+body { font-family: -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; color: #0C2340;
+       max-width: 1200px; margin: 0 auto; padding: 24px; line-height: 1.5; }
+h1 { margin-bottom: 0; }
+h2 { border-bottom: 2px solid #41B6E6; padding-bottom: 4px; margin-top: 48px; }
+.columns { display: grid; grid-template-columns: 1fr 1fr; gap: 24px; }
+.metrics { display: grid; grid-template-columns: repeat(4, 1fr); gap: 16px; margin: 16px 0; }
+.metric { border: 1px solid #ddd; border-radius: 6px; padding: 12px; }
+.metric .value { font-size: 1.8em; }
+.up { color: #2e7d32; } .down { color: #D32F2F; }
+.chart { width: 100%; min-height: 450px; }
+@media print { h2 { page-break-before: always; } .chart { page-break-inside: avoid; } }
+"""
+
+# Headline metric cards: (label, column, delta column, delta format, lower is better)
+HEADLINES = [
+    ("Revenue", 'revenue', 'revenue_yoy', "{:.1f}%", False),
+    ("Net Profit", 'net_profit', 'net_profit_yoy', "{:.1f}B", False),
+    ("Free Cash Flow", 'free_cash_flow', 'free_cash_flow_yoy', "{:.1f}B", False),
+    ("Net Debt", 'net_debt', 'net_debt_yoy', "{:.1f}%", True),
+]
+
+# A bullet or numbered list item, possibly nested
+LIST_ITEM = re.compile(r'\s*(?:[*-]|\d+\.) ')
+
+# Text page layout of the PDF (A4 portrait, in inches and points)
+PAGE_SIZE = (8.27, 11.69)
+MARGIN = 0.8
+LINE_CHARS = 95
+FONT_SIZES = {'title': 20, 'heading': 15, 'subheading': 12, 'text': 9.5}
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+# Every block of the report, columns flattened
+def walk_blocks(blocks):
+    for kind, value in blocks:
+        if kind == "columns":
+            for column in value:
+                yield from walk_blocks(column)
+        else:
+            yield kind, value
+
+
+# One company's blocks as drawn: ("heading", key) becomes that company's
+# subheading, commentary sections with no text are left out, and so is a
+# subheading left with nothing under it before the next one
+def resolve_blocks(blocks, text, headings):
+    resolved = []
+    for kind, value in blocks:
+        if kind == "heading":
+            kind, value = "subheading", headings[value]
+        elif kind == "commentary" and not text[value].strip():
+            continue
+        elif kind == "columns":
+            value = [resolve_blocks(column, text, headings) for column in value]
+            if not any(value):
+                continue
+        resolved.append((kind, value))
+    return [
+        (kind, value) for i, (kind, value) in enumerate(resolved)
+        if kind != "subheading" or (i + 1 < len(resolved) and resolved[i + 1][0] != "subheading")
+    ]
+
+
+# Chart ids of the report, in order of appearance
+def chart_ids():
+    return list(dict.fromkeys(value for _, blocks in REPORT for kind, value in walk_blocks(blocks) if kind == "figure"))
+
+
+# Serialized plotly JSON for one chart of one company. Runs in a worker
+# process; figures come from the disk cache shared with the app whenever the
+# company's data and the figure code are unchanged.
+def figure_json(company, chart_id):
+    data = financials.load_metrics(company)
+    version = financials.data_version(company)
+    if chart_id in SCENARIO_CHARTS:
+        data = scenarios.project(data)
+        version = f"{version}-{scenarios.fingerprint(scenarios.ASSUMPTIONS)}"
+    return company, chart_id, figures.get_figure_json(chart_id, data, version)
+
+
+# Python-Markdown wants a blank line before a list and four-space nesting;
+# the commentary is written for Streamlit's renderer, which needs neither
+def to_html(text):
+    lines, previous = [], ''
+    for line in text.splitlines():
+        stripped = line.lstrip()
+        is_item = LIST_ITEM.match(line) is not None
+        if is_item and previous.strip() and not LIST_ITEM.match(previous):
+            lines.append('')
+        if is_item and line != stripped:
+            line = '    ' + stripped
+        lines.append(line)
+        previous = line
+    return markdown.markdown("\n".join(lines))
+
+
+def render_metrics(data):
+    latest = data.iloc[-1]
+    cards = []
+    for label, column, delta, fmt, inverse in HEADLINES:
+        change = latest[delta]
+        good = (change < 0) if inverse else (change >= 0)
+        cards.append(
+            f'<div class="metric"><div>{label} {html.escape(latest["fiscal_years"])}</div>'
+            f'<div class="value">£{latest[column]}B</div>'
+            f'<div class="{"up" if good else "down"}">{fmt.format(change)}</div></div>'
+        )
+    return f'<div class="metrics">{"".join(cards)}</div>'
+
+
+def render_blocks(blocks, data, text, specs, ids):
+    parts = []
+    for kind, value in blocks:
+        if kind == "commentary":
+            parts.append(to_html(text[value]))
+        elif kind == "subheading":
+            parts.append(f"<h3>{html.escape(value)}</h3>")
+        elif kind == "metrics":
+            parts.append(render_metrics(data))
+        elif kind == "columns":
+            columns = "".join(f"<div>{render_blocks(column, data, text, specs, ids)}</div>" for column in value)
+            parts.append(f'<div class="columns">{columns}</div>')
+        elif kind == "figure":
+            div_id = f"chart-{len(ids)}"
+            ids.append(div_id)
+            # "</" would end the script element early
+            spec = specs[value].replace("</", "<\\/")
+            parts.append(
+                f'<div id="{div_id}" class="chart"></div>'
+                f'<script>(function () {{ var fig = {spec}; '
+                f'Plotly.newPlot("{div_id}", fig.data, fig.layout, {{responsive: true}}); }})();</script>'
+            )
+    return "".join(parts)
+
+
+# One self-contained HTML page: plotly.js is inlined once in <head> and every
+# chart is a div plus its serialized figure
+def render_html(company, data, text, specs, plotly_js):
+    ids = []
+    headings = commentary.headings(company)
+    sections = "".join(
+        f"<h2>{i}. {html.escape(title)}</h2>"
+        f"{render_blocks(resolve_blocks(blocks, text, headings), data, text, specs, ids)}"
+        for i, (title, blocks) in enumerate(REPORT, 1)
+    )
+    periods = f"{data['fiscal_years'].iloc[0]} - {data['fiscal_years'].iloc[-1]}"
+    return (
+        f'<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<title>{html.escape(company)} Financial Analysis</title>'
+        f'<style>{STYLE}</style><script type="text/javascript">{plotly_js}</script></head>'
+        f'<body><h1>{html.escape(company)} Financial Analysis</h1><p><strong>{html.escape(periods)}</strong></p>'
+        f'{sections}</body></html>'
+    )
+
+
+def plotly_bundle():
+    from plotly.offline import get_plotlyjs
+    return get_plotlyjs()
+
+
+# Markdown reduced to (style, line) pairs for the PDF text pages: emphasis
+# markers dropped, bullets drawn as "•", nested items indented
+def text_lines(text):
+    lines = []
+    for raw in text.splitlines():
+        stripped = raw.strip()
+        if stripped.startswith('#'):
+            lines.append(('subheading', stripped.lstrip('#').strip()))
+            continue
+        indent = '    ' * (1 + (len(raw) - len(raw.lstrip()) > 0)) if LIST_ITEM.match(raw) else ''
+        if stripped.startswith(('* ', '- ')):
+            stripped = '• ' + stripped[2:]
+        wrapped = textwrap.wrap(stripped.replace('**', ''), LINE_CHARS - len(indent),
+                                initial_indent=indent, subsequent_indent=indent + '   ')
+        lines += [('text', line) for line in wrapped or ['']]
+    return lines
+
+
+# Writes styled lines top to bottom, starting a new A4 page when one is full
+class TextPages:
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self.fig = None
+
+    def add(self, style, line):
+        import matplotlib.pyplot as plt
+        height = FONT_SIZES[style] * 1.6 / 72
+        if self.fig is None or self.y - height < MARGIN:
+            self.flush()
+            self.fig = plt.figure(figsize=PAGE_SIZE)
+            self.y = PAGE_SIZE[1] - MARGIN
+        self.y -= height
+        weight = 'normal' if style == 'text' else 'bold'
+        self.fig.text(MARGIN / PAGE_SIZE[0], self.y / PAGE_SIZE[1], line,
+                      fontsize=FONT_SIZES[style], fontweight=weight, color='#0C2340')
+
+    def flush(self):
+        import matplotlib.pyplot as plt
+        if self.fig is not None:
+            self.pdf.savefig(self.fig)
+            plt.close(self.fig)
+            self.fig = None
+
+
+# The report as a PDF: commentary on text pages, and after each section the
+# charts that have a static matplotlib template in Visualization.py, reusing
+# the worker's templates across companies. Runs in a worker process.
+def write_pdf(company, path):
+    from matplotlib.backends.backend_pdf import PdfPages
+    import render_charts
+    import Visualization
+
+    data = store.load_financials([company], columns=Visualization.COLUMNS)
+    headline = financials.load_metrics(company).iloc[-1]
+    text = financials.load_commentary(company)
+    headings = commentary.headings(company)
+    with PdfPages(path) as pdf:
+        pages = TextPages(pdf)
+        pages.add('title', f"{company} Financial Analysis")
+        pages.add('subheading', f"{data['fiscal_years'].iloc[0]} - {data['fiscal_years'].iloc[-1]}")
+        for i, (title, blocks) in enumerate(REPORT, 1):
+            pages.add('text', '')
+            pages.add('heading', f"{i}. {title}")
+            charts = []
+            for kind, value in walk_blocks(resolve_blocks(blocks, text, headings)):
+                if kind == "commentary":
+                    for style, line in text_lines(text[value]):
+                        pages.add(style, line)
+                elif kind == "subheading":
+                    pages.add('subheading', value)
+                elif kind == "metrics":
+                    for label, column, delta, fmt, _ in HEADLINES:
+                        pages.add('text', f"{label} {headline['fiscal_years']}: £{headline[column]}B "
+                                          f"({fmt.format(headline[delta])})")
+                elif kind == "figure" and value in Visualization.CHARTS:
+                    charts.append(value)
+            pages.flush()
+            for chart_id in charts:
+                pdf.savefig(render_charts.get_template(chart_id).update(data))
+    return company, path
+
+
+# Export the report for every company. Figures are serialized in parallel,
+# one task per (company, chart), and each company's PDF is drawn in a worker
+# of the same pool; the HTML pages are assembled here from the results.
+def export(companies, output_dir, formats=("html", "pdf"), workers=None):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    specs = {company: {} for company in companies}
+    written = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = []
+        if "html" in formats:
+            futures += [pool.submit(figure_json, company, chart_id)
+                        for company in companies for chart_id in chart_ids()]
+        if "pdf" in formats:
+            futures += [pool.submit(write_pdf, company, output_dir / f"{company}.pdf") for company in companies]
+
+        for future in as_completed(futures):
+            result = future.result()
+            if len(result) == 3:
+                company, chart_id, spec = result
+                specs[company][chart_id] = spec
+            else:
+                written.append(result[1])
+
+    if "html" in formats:
+        plotly_js = plotly_bundle()
+        for company in companies:
+            path = output_dir / f"{company}.html"
+            page = render_html(company, financials.load_metrics(company), financials.load_commentary(company),
+                               specs[company], plotly_js)
+            path.write_text(page, encoding="utf-8")
+            written.append(path)
+    return sorted(written)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the dashboard as a static HTML and PDF report per company")
+    parser.add_argument("companies", nargs="*",
+                        help=f"company ids to export (default: {financials.DEFAULT_COMPANY}; --all for every company)")
+    parser.add_argument("--all", action="store_true", help="export every company in the store")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--format", default="html,pdf", help="comma-separated formats from: html, pdf")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    formats = [f.strip() for f in args.format.split(",") if f.strip()]
+    unknown = sorted(set(formats) - {"html", "pdf"})
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(unknown)}")
+
+    companies = store.list_companies() if args.all else (args.companies or [financials.DEFAULT_COMPANY])
+
+    start = time.perf_counter()
+    written = export(companies, args.output_dir, formats, args.workers)
+    print(f"Wrote {len(written)} files for {len(companies)} companies to {args.output_dir} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,576 @@
+import importlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from importlib import metadata
+
+import numpy as np
+
+import disk_cache
+import profiling
+import scenarios
+
+
+# A module imported on first attribute access
+class Deferred:
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self.name), attr)
+
+
+# Plotly is only imported when a figure is actually built, so importing this
+# module and serving figures from the caches never pay for it
+go = Deferred("plotly.graph_objects")
+subplots = Deferred("plotly.subplots")
+
+# Custom color palette
+jlr_colors = ["#0C2340", "#2F6F7E", "#41B6E6", "#A4C639", "#D32F2F"]
+
+DEFAULT_THEME = "plotly_white"
+
+# Maximum number of serialized figures kept in memory
+CACHE_SIZE = 128
+
+# Rendered width in pixels of a full-width chart in the wide layout
+FULL_WIDTH = 1200
+
+# Long series are reduced to at most this many points per pixel of chart width
+POINTS_PER_PIXEL = 2
+
+# Traces with more points than this are drawn with WebGL (Scattergl)
+GL_THRESHOLD = 1000
+
+# Series with at most this many points get a marker and label on every point;
+# longer ones are labelled only at their extremes and last point
+LABEL_LIMIT = 24
+
+# Chart id -> builder function and its width in pixels, filled in by @chart
+BUILDERS = {}
+WIDTHS = {}
+
+# Figure code and plotly version, part of every on-disk figure key
+CODE_VERSION = f"{disk_cache.source_version(sys.modules[__name__])}-{metadata.version('plotly')}"
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+# Register a figure builder under a chart id
+def chart(chart_id, width=FULL_WIDTH):
+    def register(builder):
+        BUILDERS[chart_id] = builder
+        WIDTHS[chart_id] = width
+        return builder
+    return register
+
+
+# Build a chart uncached; builders get the point budget for their width
+def build_figure(chart_id, data, theme=DEFAULT_THEME):
+    return BUILDERS[chart_id](data, theme, WIDTHS[chart_id] * POINTS_PER_PIXEL)
+
+
+# Return the figure for `chart_id` as serialized plotly JSON, building it only
+# when (chart id, data version, theme) is in neither the in-process LRU nor the
+# on-disk cache shared with other app processes
+def get_figure_json(chart_id, data, version, theme=DEFAULT_THEME):
+    key = (chart_id, version, theme)
+    with _cache_lock:
+        spec = _cache.get(key)
+        if spec is not None:
+            _cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+
+    if spec is None:
+        disk_key = disk_cache.make_key("figure", CODE_VERSION, *key)
+        with profiling.span("disk_cache.get", "cache"):
+            payload = disk_cache.get(disk_key)
+        if payload is not None:
+            spec = payload.decode()
+        else:
+            with profiling.span(f"build_figure:{chart_id}", "figure"):
+                spec = build_figure(chart_id, data, theme).to_json()
+            disk_cache.set(disk_key, spec.encode())
+        with _cache_lock:
+            _cache_stats["misses"] += 1
+            _cache[key] = spec
+            _cache.move_to_end(key)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    return spec
+
+
+# The cached figure as a plotly dict
+def get_figure(chart_id, data, version, theme=DEFAULT_THEME):
+    return json.loads(get_figure_json(chart_id, data, version, theme))
+
+
+def cache_info():
+    with _cache_lock:
+        return dict(_cache_stats, size=len(_cache), maxsize=CACHE_SIZE)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+        _cache_stats.update(hits=0, misses=0)
+
+
+# Indices kept when reducing `y` to at most `max_points` points: the first and
+# last point plus the minimum and maximum of every bucket, so peaks and troughs
+# survive. Computed for all buckets at once.
+def downsample_indices(y, max_points):
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    buckets = max(1, (max_points - 2) // 2)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+
+    # Trailing buckets may be entirely padding
+    valid = ~np.all(np.isnan(padded), axis=1)
+    offsets = np.arange(buckets)[valid] * size
+    filled = padded[valid]
+    lows = offsets + np.nanargmin(filled, axis=1)
+    highs = offsets + np.nanargmax(filled, axis=1)
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+# Which of the kept points get a text label
+def label_mask(y):
+    if len(y) <= LABEL_LIMIT:
+        return np.ones(len(y), dtype=bool)
+    mask = np.zeros(len(y), dtype=bool)
+    mask[[np.argmin(y), np.argmax(y), len(y) - 1]] = True
+    return mask
+
+
+# Line trace for a possibly very long series: downsampled to `max_points`,
+# labelled sparsely, and switched to WebGL above GL_THRESHOLD points
+def series_trace(x, y, fmt, max_points, show_text=False, **style):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    keep = downsample_indices(y, max_points)
+    x, y = x[keep], y[keep]
+
+    mask = label_mask(y)
+    text = [fmt(val) if labelled else "" for val, labelled in zip(y, mask)]
+
+    mode = "lines+markers" if len(y) <= LABEL_LIMIT else "lines"
+    if show_text:
+        mode += "+text"
+
+    trace = go.Scattergl if len(y) > GL_THRESHOLD else go.Scatter
+    return trace(x=x, y=y, mode=mode, text=text, textposition="top center", **style)
+
+
+# Shared styling for the single-metric line charts
+def _line_chart(data, column, label, color, fmt, theme, max_points, title=None, zero_line=False):
+    fig = go.Figure(series_trace(
+        data['fiscal_years'], data[column], fmt, max_points,
+        line=dict(color=color, width=3),
+        marker=dict(size=12),
+        hovertemplate=f"Fiscal Year=%{{x}}<br>{label}=%{{y}}<extra></extra>",
+        showlegend=False
+    ))
+
+    if zero_line:
+        fig.add_hline(y=0, line=dict(color="black", width=1))
+
+    fig.update_layout(
+        template=theme,
+        height=400,
+        yaxis=dict(title=label),
+        xaxis=dict(title='Fiscal Year'),
+        hovermode="x unified"
+    )
+    if title:
+        fig.update_layout(title=title)
+
+    return fig
+
+
+def billions(val):
+    return f"£{float(val)}B"
+
+
+def units(val):
+    return f"{val:,.0f}"
+
+
+def percent(val):
+    return f"{val:.1f}%"
+
+
+# Bars coloured by sign, one trace for the whole series, downsampled like lines
+def signed_bar(x, y, max_points, **style):
+    y = np.asarray(y, dtype=float)
+    keep = downsample_indices(y, max_points)
+    x, y = np.asarray(x)[keep], y[keep]
+    mask = label_mask(y)
+    return go.Bar(
+        x=x,
+        y=y,
+        marker_color=np.where(y < 0, '#D32F2F', '#4CAF50'),
+        text=[billions(val) if labelled else "" for val, labelled in zip(y, mask)],
+        textposition="outside",
+        showlegend=False,
+        **style
+    )
+
+
+@chart("dashboard")
+def dashboard(data, theme, max_points):
+    fiscal_years = data['fiscal_years']
+
+    # Each panel is half the chart width
+    max_points //= 2
+
+    fig = subplots.make_subplots(
+        rows=2, cols=2,
+        specs=[[{"type": "scatter"}, {"type": "bar"}],
+               [{"type": "scatter"}, {"type": "scatter"}]],
+        subplot_titles=("Revenue (Billion £)", "Net Profit (Billion £)",
+                       "Free Cash Flow (Billion £)", "Net Debt (Billion £)"),
+        vertical_spacing=0.12,
+        horizontal_spacing=0.08
+    )
+
+    # Revenue plot
+    fig.add_trace(
+        series_trace(
+            fiscal_years, data['revenue'], billions, max_points, show_text=True,
+            name='Revenue',
+            line=dict(color=jlr_colors[0], width=3),
+            marker=dict(size=12)
+        ),
+        row=1, col=1
+    )
+
+    # Net profit plot
+    fig.add_trace(
+        signed_bar(fiscal_years, data['net_profit'], max_points, name='Net Profit'),
+        row=1, col=2
+    )
+
+    # Free cash flow
+    fig.add_trace(
+        series_trace(
+            fiscal_years, data['free_cash_flow'], billions, max_points, show_text=True,
+            name='Free Cash Flow',
+            line=dict(color=jlr_colors[2], width=3),
+            marker=dict(size=12),
+            showlegend=False
+        ),
+        row=2, col=1
+    )
+
+    # Net debt
+    fig.add_trace(
+        series_trace(
+            fiscal_years, data['net_debt'], billions, max_points, show_text=True,
+            name='Net Debt',
+            line=dict(color=jlr_colors[4], width=3),
+            marker=dict(size=12),
+            showlegend=False
+        ),
+        row=2, col=2
+    )
+
+    # Add zero reference lines
+    fig.add_hline(y=0, line=dict(color="black", width=1), row=1, col=2)
+    fig.add_hline(y=0, line=dict(color="black", width=1), row=2, col=1)
+
+    fig.update_layout(
+        height=700,
+        title_text="",
+        hovermode="x unified",
+        template=theme,
+    )
+
+    return fig
+
+
+@chart("unit_sales_overview")
+def unit_sales_overview(data, theme, max_points):
+    return _line_chart(data, 'unit_sales', 'Units Sold', jlr_colors[3], units, theme, max_points)
+
+
+@chart("unit_sales", width=FULL_WIDTH // 2)
+def unit_sales(data, theme, max_points):
+    return _line_chart(
+        data, 'unit_sales', 'Units Sold', jlr_colors[3], units, theme, max_points,
+        title="Unit Sales Performance"
+    )
+
+
+@chart("revenue", width=FULL_WIDTH // 2)
+def revenue(data, theme, max_points):
+    return _line_chart(
+        data, 'revenue', 'Revenue (Billion £)', jlr_colors[0], billions, theme, max_points,
+        title="Revenue Trend"
+    )
+
+
+@chart("revenue_per_unit", width=FULL_WIDTH // 2)
+def revenue_per_unit(data, theme, max_points):
+    values = data['revenue_per_unit'].to_numpy(dtype=float)
+    keep = downsample_indices(values, max_points)
+    values = values[keep]
+    mask = label_mask(values)
+
+    fig = go.Figure(go.Bar(
+        x=data['fiscal_years'].to_numpy()[keep],
+        y=values,
+        marker_color=jlr_colors[1],
+        text=[f"£{val:,.0f}" if labelled else "" for val, labelled in zip(values, mask)],
+        textposition="outside",
+        hovertemplate="Fiscal Year=%{x}<br>Revenue per Unit (£)=%{y}<extra></extra>",
+        showlegend=False
+    ))
+
+    fig.update_layout(
+        template=theme,
+        title="Revenue per Unit",
+        height=400,
+        yaxis=dict(title='Revenue per Unit (£)'),
+        xaxis=dict(title='Fiscal Year')
+    )
+
+    return fig
+
+
+@chart("net_profit", width=FULL_WIDTH // 2)
+def net_profit(data, theme, max_points):
+    fig = go.Figure(signed_bar(data['fiscal_years'], data['net_profit'], max_points, name='Net Profit'))
+
+    fig.add_hline(y=0, line=dict(color="black", width=1))
+
+    fig.update_layout(
+        title="Net Profit Before Tax & Exceptional Items",
+        height=400,
+        yaxis=dict(title='Net Profit (Billion £)'),
+        xaxis=dict(title='Fiscal Year'),
+        template=theme
+    )
+
+    return fig
+
+
+@chart("profit_margin", width=FULL_WIDTH // 2)
+def profit_margin(data, theme, max_points):
+    return _line_chart(
+        data, 'profit_margin', 'Profit Margin (%)', jlr_colors[2], percent, theme, max_points,
+        title="Profit Margin", zero_line=True
+    )
+
+
+@chart("free_cash_flow", width=FULL_WIDTH // 2)
+def free_cash_flow(data, theme, max_points):
+    return _line_chart(
+        data, 'free_cash_flow', 'Free Cash Flow (Billion £)', jlr_colors[2], billions, theme, max_points,
+        title="Free Cash Flow Trend", zero_line=True
+    )
+
+
+@chart("net_debt", width=FULL_WIDTH // 2)
+def net_debt(data, theme, max_points):
+    return _line_chart(
+        data, 'net_debt', 'Net Debt (Billion £)', jlr_colors[4], billions, theme, max_points,
+        title="Net Debt Reduction"
+    )
+
+
+@chart("strategy_indicators")
+def strategy_indicators(data, theme, max_points):
+    first, last = data.iloc[0], data.iloc[-1]
+
+    # Create a figure with subplots - no subplot titles to avoid overlap
+    fig = subplots.make_subplots(
+        rows=1, cols=3,
+        specs=[[{"type": "domain"}, {"type": "domain"}, {"type": "domain"}]],
+    )
+
+    # Electrification KPIs
+    fig.add_trace(
+        go.Indicator(
+            mode="number+delta",
+            value=last['revenue'],
+            title={"text": "<b>Electrification</b><br>Revenue (£B)", "font": {"size": 14}},
+            delta={"reference": first['revenue'], "relative": True, "valueformat": ".1%"},
+            domain={"row": 0, "column": 0}
+        ),
+        row=1, col=1
+    )
+
+    # Modern Luxury KPIs
+    fig.add_trace(
+        go.Indicator(
+            mode="number+delta",
+            value=int(last['revenue_per_unit']),
+            title={"text": "<b>Modern Luxury</b><br>Revenue per Unit (£)", "font": {"size": 14}},
+            delta={"reference": int(first['revenue_per_unit']), "relative": True, "valueformat": ".1%"},
+            number={"valueformat": ",.0f"},
+            domain={"row": 0, "column": 1}
+        ),
+        row=1, col=2
+    )
+
+    # Operational Turnaround KPIs
+    fig.add_trace(
+        go.Indicator(
+            mode="number+delta",
+            value=last['net_debt'],
+            title={"text": "<b>Operational Turnaround</b><br>Net Debt (£B)", "font": {"size": 14}},
+            delta={"reference": first['net_debt'], "relative": True, "valueformat": ".1%", "increasing": {"color": "red"}, "decreasing": {"color": "green"}},
+            domain={"row": 0, "column": 2}
+        ),
+        row=1, col=3
+    )
+
+    fig.update_layout(
+        height=300,
+        grid={"rows": 1, "columns": 3, "pattern": "independent"},
+        margin=dict(t=30, b=0, l=30, r=30)
+    )
+
+    return fig
+
+
+def _rgba(color, alpha):
+    r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return f"rgba({r}, {g}, {b}, {alpha})"
+
+
+# Percentile bands of one projected series: P5-P95 and P25-P75 shaded, P50 dashed
+def fan_traces(projection, series, color, name):
+    x = projection['labels']
+    traces = []
+    for low, high, alpha in [(5, 95, 0.15), (25, 75, 0.3)]:
+        traces.append(go.Scatter(
+            x=x, y=scenarios.percentile(projection, series, low), mode="lines", line=dict(width=0),
+            hoverinfo="skip", showlegend=False
+        ))
+        traces.append(go.Scatter(
+            x=x, y=scenarios.percentile(projection, series, high), mode="lines", line=dict(width=0),
+            fill="tonexty", fillcolor=_rgba(color, alpha), name=f"P{low}-P{high}",
+            hoverinfo="skip", showlegend=False
+        ))
+    traces.append(go.Scatter(
+        x=x, y=scenarios.percentile(projection, series, 50), mode="lines", name=f"{name} (median)",
+        line=dict(color=color, width=2, dash="dash"),
+        hovertemplate=f"%{{x}}<br>{name} median=%{{y:.2f}}<extra></extra>", showlegend=False
+    ))
+    return traces
+
+
+# Fan charts of the Monte Carlo projection; `data` is a scenarios.project() result
+@chart("scenario_fan")
+def scenario_fan(data, theme, max_points):
+    history = data['history']
+    panels = [
+        ('revenue', "Revenue (Billion £)", jlr_colors[0]),
+        ('net_profit', "Net Profit (Billion £)", jlr_colors[1]),
+        ('free_cash_flow', "Free Cash Flow (Billion £)", jlr_colors[2]),
+        ('net_debt', "Net Debt (Billion £)", jlr_colors[4]),
+    ]
+
+    fig = subplots.make_subplots(
+        rows=2, cols=2,
+        subplot_titles=[title for _, title, _ in panels],
+        vertical_spacing=0.12,
+        horizontal_spacing=0.08
+    )
+    for i, (series, title, color) in enumerate(panels):
+        row, col = i // 2 + 1, i % 2 + 1
+        fig.add_trace(
+            series_trace(
+                history['fiscal_years'], history[series], billions, max_points // 2,
+                name=title, line=dict(color=color, width=3), marker=dict(size=8), showlegend=False
+            ),
+            row=row, col=col
+        )
+        for trace in fan_traces(data, series, color, title):
+            fig.add_trace(trace, row=row, col=col)
+        if series in ('net_profit', 'free_cash_flow', 'net_debt'):
+            fig.add_hline(y=0, line=dict(color="black", width=1), row=row, col=col)
+
+    fig.update_layout(
+        height=700,
+        template=theme,
+        hovermode="x unified",
+    )
+    return fig
+
+
+# Median projected values at the horizon against the last actual period, with
+# the P5-P95 range in the title
+@chart("scenario_indicators")
+def scenario_indicators(data, theme, max_points):
+    horizon = data['labels'][-1]
+    panels = [
+        ('revenue', "Revenue (£B)", ",.1f", {}),
+        ('revenue_per_unit', "Revenue per Unit (£)", ",.0f", {}),
+        ('net_debt', "Net Debt (£B)", ",.1f", {"increasing": {"color": "red"}, "decreasing": {"color": "green"}}),
+    ]
+
+    fig = subplots.make_subplots(
+        rows=1, cols=3,
+        specs=[[{"type": "domain"}, {"type": "domain"}, {"type": "domain"}]],
+    )
+    for i, (series, title, fmt, delta_colors) in enumerate(panels):
+        low, median, high = (scenarios.percentile(data, series, p)[-1] for p in (5, 50, 95))
+        fig.add_trace(
+            go.Indicator(
+                mode="number+delta",
+                value=median,
+                title={"text": f"<b>{horizon} median</b><br>{title}<br>"
+                               f"<span style='font-size:11px'>P5 {low:{fmt}} · P95 {high:{fmt}}</span>",
+                       "font": {"size": 14}},
+                delta={"reference": data['paths'][series][0, 0], "relative": True, "valueformat": ".1%",
+                       **delta_colors},
+                number={"valueformat": fmt},
+                domain={"row": 0, "column": i}
+            ),
+            row=1, col=i + 1
+        )
+
+    fig.update_layout(
+        height=300,
+        grid={"rows": 1, "columns": 3, "pattern": "independent"},
+        margin=dict(t=60, b=0, l=30, r=30)
+    )
+    return fig
+
+
+# Stacked bars of a cube rollup per period; `data` is
+# {'rollup': frame, 'by': dimension, 'measure': column}
+@chart("drilldown")
+def drilldown(data, theme, max_points):
+    rollup, by, measure = data['rollup'], data['by'], data['measure']
+    label, fmt = {'unit_sales': ("Units Sold", ",.0f"), 'revenue': ("Revenue (Billion £)", ",.2f")}[measure]
+
+    fig = go.Figure()
+    for value, group in rollup.groupby(by, sort=True):
+        fig.add_trace(go.Bar(
+            x=group['fiscal_years'], y=group[measure], name=value,
+            hovertemplate=f"{value}: %{{y:{fmt}}}<extra></extra>"
+        ))
+
+    fig.update_layout(
+        template=theme,
+        barmode="stack",
+        height=500,
+        yaxis=dict(title=label),
+        xaxis=dict(title='Fiscal Year', type='category'),
+        hovermode="x unified",
+        legend=dict(title=by.title())
+    )
+    return fig
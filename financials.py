@@ -0,0 +1,195 @@
+import functools
+import hashlib
+import inspect
+import threading
+
+import pandas as pd
+import streamlit as st
+
+import alerts
+import commentary
+import cube
+import disk_cache
+import metrics
+import profiling
+import shared_data
+import sources
+import store
+
+# Hit/miss counters for every cached loader, keyed by function name
+_cache_stats = {}
+_stats_lock = threading.Lock()
+
+
+# Memoize a loader with st.cache_data and count how often it is recomputed.
+# The wrapped body only runs on a cache miss, so hits = calls - misses.
+# Entries expire after `ttl` seconds when one is given.
+def cached(func=None, ttl=None):
+    if func is None:
+        return functools.partial(cached, ttl=ttl)
+
+    stats = _cache_stats.setdefault(func.__name__, {"calls": 0, "misses": 0})
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def compute(*args, **kwargs):
+        with _stats_lock:
+            stats["misses"] += 1
+        return func(*args, **kwargs)
+
+    cached_compute = st.cache_data(show_spinner=False, ttl=ttl)(compute)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _stats_lock:
+            stats["calls"] += 1
+        # Bind defaults so f() and f(default) share one cache entry
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return cached_compute(*bound.args)
+
+    wrapper.clear = cached_compute.clear
+    return wrapper
+
+
+# Snapshot of the cache counters, one row per cached function
+def cache_stats():
+    with _stats_lock:
+        return pd.DataFrame([
+            {
+                "function": name,
+                "calls": stats["calls"],
+                "hits": stats["calls"] - stats["misses"],
+                "misses": stats["misses"],
+            }
+            for name, stats in _cache_stats.items()
+        ])
+
+
+# Company shown by the dashboard
+DEFAULT_COMPANY = "JLR"
+
+# Columns the dashboard needs from the store
+COLUMNS = ['company', 'fiscal_years', 'revenue', 'net_profit', 'free_cash_flow', 'net_debt', 'unit_sales']
+
+
+# Derived data expires with the live source's TTL when one is configured, or
+# after the shared snapshot's TTL so a republished snapshot is picked up;
+# store-backed data is cached until cleared
+if sources.SOURCE_URL:
+    TTL = sources.CACHE_TTL
+elif shared_data.ENABLED:
+    TTL = shared_data.TTL
+else:
+    TTL = None
+
+
+def hash_frame(frame):
+    return hashlib.sha1(pd.util.hash_pandas_object(frame, index=True).values.tobytes()).hexdigest()
+
+
+# Raw financials for one company's whole history, from the live source
+# (FINANCIALS_SOURCE_URL), the shared snapshot (FINANCIALS_SHARED) or the
+# columnar store; period_end is kept so ranges can be cut from it
+@cached(ttl=TTL)
+def load_data(company=DEFAULT_COMPANY):
+    columns = COLUMNS + ['period_end']
+    if sources.SOURCE_URL:
+        return sources.load([company])[columns]
+    if shared_data.ENABLED:
+        return shared_data.load_financials([company], columns=columns)
+    return store.load_financials([company], columns=columns)
+
+
+# Companies the dashboard can show, from the same backend load_data reads
+@cached(ttl=TTL)
+def list_companies():
+    if sources.SOURCE_URL:
+        return sources.list_companies()
+    if shared_data.ENABLED:
+        return shared_data.list_companies()
+    return store.list_companies()
+
+
+# Reporting periods of a company, oldest first, as fiscal_years label and
+# period_end; the dashboard's period range is picked from these
+@cached(ttl=TTL)
+def load_periods(company=DEFAULT_COMPANY):
+    return load_data(company)[['fiscal_years', 'period_end']]
+
+
+# Change marker for a company's raw data, used in the disk cache key: the
+# store files (or the snapshot built from them), or for a live source the
+# fetched rows themselves
+def data_fingerprint(company):
+    if sources.SOURCE_URL:
+        return hash_frame(load_data(company))
+    if shared_data.ENABLED:
+        return shared_data.fingerprint([company])
+    return store.fingerprint([company])
+
+
+# Financials plus every derived column over a company's whole history, so
+# the first period of any range shown still has its previous period, in the
+# compact layout (categorical labels, float32 values), which the disk cache
+# round-trips as is. Backed by the on-disk cache shared with other app
+# processes, keyed on the raw data and the metrics code, so a fresh process
+# skips both the read and the compute.
+@cached(ttl=TTL)
+def load_history(company=DEFAULT_COMPANY):
+    key = disk_cache.make_key(
+        "metrics", "compact", disk_cache.source_version(metrics), data_fingerprint(company), company
+    )
+    with profiling.span("disk_cache.get_frame", "cache"):
+        data = disk_cache.get_frame(key)
+    if data is None:
+        with profiling.span("load_data", "data", company=company):
+            raw = load_data(company)
+        with profiling.span("compute_metrics", "compute", rows=len(raw)):
+            data = metrics.compute_metrics(raw, compact=True)
+        with profiling.span("disk_cache.set_frame", "cache"):
+            disk_cache.set_frame(key, data)
+    return data
+
+
+# The dashboard's metric table: the company's history cut to the periods
+# ending in [start, end] (None leaves that side open)
+@cached(ttl=TTL)
+def load_metrics(company=DEFAULT_COMPANY, start=None, end=None):
+    data = load_history(company)
+    keep = pd.Series(True, index=data.index)
+    if start is not None:
+        keep &= data['period_end'] >= pd.Timestamp(start)
+    if end is not None:
+        keep &= data['period_end'] <= pd.Timestamp(end)
+    return data[keep].drop(columns='period_end').reset_index(drop=True)
+
+
+# Ranked anomaly and threshold alerts in a company's metric table, with messages
+@cached(ttl=TTL)
+def load_alerts(company=DEFAULT_COMPANY, start=None, end=None):
+    return alerts.describe(alerts.scan(load_metrics(company, start, end)))
+
+
+# Written analysis of a company's metric table, one markdown string per
+# commentary section, rendered once per (company, period range)
+@cached(ttl=TTL)
+def load_commentary(company=DEFAULT_COMPANY, start=None, end=None):
+    companies = store.load_companies().set_index('company')
+    details = companies.loc[company] if company in companies.index else {}
+    return commentary.render(load_metrics(company, start, end), company, details.get('name'), details.get('sector'))
+
+
+# Content hash of the metric table; figure caches key on it so charts are
+# rebuilt only when the numbers change
+@cached(ttl=TTL)
+def data_version(company=DEFAULT_COMPANY, start=None, end=None):
+    return hash_frame(load_metrics(company, start, end))
+
+
+# One drill-down rollup of the sales cube; `filters` is a tuple of
+# (dimension, value) pairs and `version` the cube build, so a rebuilt cube
+# is never served from a stale entry
+@cached
+def load_rollup(by, filters=(), company=DEFAULT_COMPANY, version=None):
+    return cube.load_rollup(by, company, dict(filters))
@@ -0,0 +1,133 @@
+import argparse
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import metrics
+import store
+
+# Metric table as persisted in the store: the reported columns plus every
+# derived column, partitioned like the financials under <store>/metrics
+METRIC_SCHEMA = pa.schema(list(store.SCHEMA) + [pa.field(c, pa.float64()) for c in metrics.METRIC_COLUMNS])
+
+# Each company's last stored period: all a new period's derived columns need
+STATE_SCHEMA = pa.schema([store.SCHEMA.field(c) for c in ['company', 'fiscal_years', 'period_end', *metrics.BASE_COLUMNS]])
+
+
+def state_path(path=None):
+    return Path(path or store.STORE_PATH) / "metric_state.parquet"
+
+
+# Last stored period per company, or None before the first rebuild
+def load_state(path=None):
+    target = state_path(path)
+    if not target.exists():
+        return None
+    return pq.read_table(target).to_pandas(date_as_object=False)
+
+
+# Replace the state file in one rename, so readers never see a partial one
+def write_state(state, path=None):
+    target = state_path(path)
+    table = pa.Table.from_pandas(state[STATE_SCHEMA.names], schema=STATE_SCHEMA, preserve_index=False)
+    tmp = target.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, target)
+
+
+# Last row of every company in a frame sorted by company then period
+def last_periods(frame):
+    return frame.drop_duplicates('company', keep='last')
+
+
+# Recompute the whole metric table from the financials and write it, with
+# the per-company state, in place of the existing one. Needed once before
+# the first append, and after past periods are rewritten.
+def rebuild(path=None):
+    financials = store.load_financials(path=path, columns=store.SCHEMA.names)
+    derived = metrics.compute_metrics(financials)
+
+    root = Path(path or store.STORE_PATH)
+    scratch = Path(tempfile.mkdtemp(dir=root, prefix=".metrics-"))
+    store.write_financials(derived, path=scratch, name="metrics", schema=METRIC_SCHEMA)
+    store.swap_directory(scratch / "metrics", root / "metrics")
+    scratch.rmdir()
+    write_state(last_periods(financials), path)
+    return len(derived)
+
+
+# Add new (company, period) rows to the store and derive their metrics from
+# each company's stored last period, without reading or rewriting any
+# existing partition. Every row must be later than its company's last stored
+# period; corrections to past periods go through store.upsert_financials and
+# rebuild(). Returns the derived rows.
+def append_periods(frame, path=None):
+    frame = frame[store.SCHEMA.names].copy()
+    frame['period_end'] = pd.to_datetime(frame['period_end'])
+    frame = frame.sort_values(['company', 'period_end'], kind="stable").reset_index(drop=True)
+    if frame.duplicated(['company', 'period_end']).any():
+        raise ValueError("new rows repeat a (company, period_end)")
+
+    state = load_state(path)
+    if state is None:
+        rebuild(path)
+        state = load_state(path)
+    state = state.set_index('company')
+
+    last = state['period_end'].reindex(frame['company'].to_numpy()).to_numpy()
+    stale = frame.loc[frame['period_end'].to_numpy() <= last, 'company'].unique()
+    if len(stale):
+        names = ", ".join(sorted(stale)[:5]) + (f" and {len(stale) - 5} more" if len(stale) > 5 else "")
+        raise ValueError(f"rows for {names} are not after their last stored period; "
+                         "correct them with store.upsert_financials, which keeps the other periods of "
+                         "their years, and run `python incremental.py rebuild`")
+
+    derived = metrics.compute_metrics(frame, previous=state)
+    store.write_financials(frame, path=path, mode="append")
+    store.write_financials(derived, path=path, mode="append", name="metrics", schema=METRIC_SCHEMA)
+
+    # State goes last; after an interrupted append, rebuild() before retrying
+    state = pd.concat([state.reset_index(), last_periods(frame)])
+    write_state(last_periods(state.sort_values(['company', 'period_end'], kind="stable")), path)
+    return derived
+
+
+# Persisted metric rows, read like store.load_financials
+def load_metrics(companies=None, start=None, end=None, columns=None, path=None):
+    return store.load_financials(companies, start, end, columns, path=path, name="metrics")
+
+
+def read_rows(file):
+    if str(file).endswith(".csv"):
+        return pd.read_csv(file, parse_dates=['period_end'])
+    return pd.read_parquet(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the persisted metric table incrementally")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = sub.add_parser("rebuild", help="recompute every metric row from the financials")
+    rebuild_parser.add_argument("--store", help="store directory (default: FINANCIALS_STORE or data/store)")
+    append_parser = sub.add_parser("append", help="append new periods from a CSV or Parquet file")
+    append_parser.add_argument("file")
+    append_parser.add_argument("--store", help="store directory (default: FINANCIALS_STORE or data/store)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "rebuild":
+        rows = rebuild(args.store)
+        print(f"Recomputed {rows:,} metric rows in {time.perf_counter() - start:.2f}s")
+    else:
+        derived = append_periods(read_rows(args.file), args.store)
+        print(f"Appended {len(derived):,} rows for {derived['company'].nunique():,} companies "
+              f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import argparse
+import re
+import time
+from itertools import islice
+from pathlib import Path
+
+import pandas as pd
+
+import store
+
+# Section headings that say which metric the following period lines report
+HEADINGS = [
+    (re.compile(r'^Revenue Trends?\b.*:$', re.I), 'revenue'),
+    (re.compile(r'^Unit Sales\b.*:$', re.I), 'unit_sales'),
+    (re.compile(r'^(Net )?Profit \(Before Tax\b.*:$', re.I), 'net_profit'),
+    (re.compile(r'^Free Cash Flow\b.*:$', re.I), 'free_cash_flow'),
+    (re.compile(r'^Net Debt\b.*:$', re.I), 'net_debt'),
+]
+
+# Lines that end the current metric section
+SECTION_END = re.compile(r'^(Reasoning:|\d+\.\s)')
+
+# "FY21/22: Revenue stood at £18.3 billion." or "2023Q4: ..."; fiscal years
+# may also be written FY2021/22, FY2021/2022, FY22 or FY2022
+PERIOD_LINE = re.compile(r'^(FY(?:\d{4}|\d{2})(?:/(?:\d{4}|\d{2}))?|\d{4}Q[1-4]):\s*(.*)$')
+
+# Two-digit years from this one up are read as 19xx, below it as 20xx
+CENTURY_PIVOT = 70
+
+# Money amounts; a parenthesised amount, "(–£1.1)" or "£(0.4)", is negative
+MONEY = re.compile(
+    r'(?P<open>\(\s*[-–]?\s*)?£\s*(?P<paren>\()?\s*(?P<num>\d[\d,]*(?:\.\d+)?)\s*\)?\s*'
+    r'(?P<scale>billion|bn|million|m)\b',
+    re.I
+)
+UNITS = re.compile(r'(?P<num>\d{1,3}(?:,\d{3})+|\d+)\s*units\b', re.I)
+LOSS = re.compile(r'\bloss\b', re.I)
+
+# Money is stored in billion £
+SCALE = {'billion': 1.0, 'bn': 1.0, 'million': 1e-3, 'm': 1e-3}
+
+
+# Yield (path, line iterator) for every report file, reading lazily
+def iter_documents(paths):
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.rglob("*.txt")) if path.is_dir() else [path]
+        for file in files:
+            with open(file, encoding="utf-8") as f:
+                yield file, (line.strip() for line in f)
+
+
+# Yield (metric, fiscal year, value, unit) tuples from one document's lines
+def extract_records(lines):
+    metric = None
+    for line in lines:
+        if not line:
+            continue
+
+        for pattern, name in HEADINGS:
+            if pattern.match(line):
+                metric = name
+                break
+        else:
+            if SECTION_END.match(line):
+                metric = None
+                continue
+
+            match = PERIOD_LINE.match(line) if metric else None
+            if match is None:
+                continue
+            period, text = match.groups()
+
+            if metric == 'unit_sales':
+                units = UNITS.search(text)
+                if units:
+                    yield metric, period, int(units['num'].replace(',', '')), 'units'
+                continue
+
+            money = MONEY.search(text)
+            if money:
+                value = float(money['num'].replace(',', '')) * SCALE[money['scale'].lower()]
+                if money['open'] or money['paren'] or LOSS.search(text[:money.start()]):
+                    value = -value
+                yield metric, period, value, '£bn'
+
+
+# Calendar year a fiscal label ends in: FY2021/22 and FY21/22 end in 2022,
+# FY2022 and FY22 in 2022, FY98/99 in 1999 (see CENTURY_PIVOT)
+def fiscal_year_end(label):
+    start, _, end = label[2:].partition('/')
+    if len(start) == 4:
+        return int(start) + 1 if end else int(start)
+    year = int(end or start)
+    return year + (1900 if year >= CENTURY_PIVOT else 2000)
+
+
+# Period end date for a fiscal label; fiscal years end on March 31
+def period_end(label, fiscal_year_end_month=3):
+    if label.startswith('FY'):
+        year = fiscal_year_end(label)
+        return pd.Timestamp(year=year, month=fiscal_year_end_month, day=1) + pd.offsets.MonthEnd(0)
+    return pd.Period(label, freq='Q').end_time.normalize()
+
+
+# One wide store row per (company, period) found in a document
+def document_rows(company, records):
+    rows = {}
+    for metric, period, value, _ in records:
+        row = rows.setdefault(period, {'company': company, 'fiscal_years': period, 'period_end': period_end(period)})
+        row[metric] = value
+    return rows.values()
+
+
+# Company id for a report file: explicit, or the file name up to the first "_"
+def company_for(path, company=None):
+    return company or Path(path).stem.split('_', 1)[0]
+
+
+# Stream documents through the extractor and write rows to the store in
+# batches, so memory stays bounded by the batch size. Rows are upserted by
+# (company, period): earlier batches and other periods of the same year are
+# kept, and documents are read in file name order, so the latest filing of a
+# restated period wins.
+def ingest(paths, company=None, batch_size=500, store_path=None, dry_run=False):
+    stats = {'documents': 0, 'records': 0, 'rows': 0}
+    start = time.perf_counter()
+
+    documents = iter_documents(paths)
+    while True:
+        batch = []
+        for path, lines in islice(documents, batch_size):
+            records = list(extract_records(lines))
+            stats['documents'] += 1
+            stats['records'] += len(records)
+            batch.extend(document_rows(company_for(path, company), records))
+        if not batch:
+            break
+
+        frame = pd.DataFrame(batch, columns=store.SCHEMA.names)
+        frame['unit_sales'] = frame['unit_sales'].astype('Int64')
+        # A period restated by a later filing keeps the later figures
+        frame = store.latest_rows(frame)
+        stats['rows'] += len(frame)
+        if not dry_run:
+            store.upsert_financials(frame, path=store_path)
+
+    stats['seconds'] = time.perf_counter() - start
+    stats['documents_per_second'] = stats['documents'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract financial metrics from report text into the store")
+    parser.add_argument("paths", nargs="+", help="report text files or directories of *.txt files")
+    parser.add_argument("--company", help="company id for every document (default: file name up to the first '_')")
+    parser.add_argument("--batch-size", type=int, default=500, help="documents per store write")
+    parser.add_argument("--store", help="store directory (default: FINANCIALS_STORE or data/store)")
+    parser.add_argument("--dry-run", action="store_true", help="extract without writing to the store")
+    args = parser.parse_args()
+
+    stats = ingest(args.paths, args.company, args.batch_size, args.store, args.dry_run)
+    print(f"{stats['documents']} documents, {stats['records']} metrics, {stats['rows']} rows "
+          f"in {stats['seconds']:.2f}s ({stats['documents_per_second']:,.0f} documents/s)")
+
+
+if __name__ == "__main__":
+    main()
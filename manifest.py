@@ -0,0 +1,48 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+MANIFEST_NAME = "manifest.json"
+
+
+# Content address of one rendered chart: its input data slice, the drawing
+# code and every style parameter that affects the output file
+def chart_key(data, code, style):
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    digest.update(",".join(map(str, data.columns)).encode())
+    digest.update(code.encode())
+    digest.update(json.dumps(style, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+# Output path (relative to the output directory) -> chart key
+def load_manifest(output_dir):
+    path = Path(output_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+# Write the manifest atomically so an interrupted run never leaves it truncated
+def save_manifest(output_dir, entries):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=output_dir, prefix=".manifest-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(dict(sorted(entries.items())), f, indent=1)
+        os.replace(tmp, output_dir / MANIFEST_NAME)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# True when `relpath` exists and was built from exactly this key
+def is_current(output_dir, relpath, key, entries):
+    return entries.get(relpath) == key and (Path(output_dir) / relpath).exists()
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+import profiling
+
+# Reported columns the ratio set is derived from
+BASE_COLUMNS = ['revenue', 'net_profit', 'free_cash_flow', 'net_debt', 'unit_sales']
+
+# Derived columns in output order
+YOY_COLUMNS = ['revenue_yoy', 'net_profit_yoy', 'free_cash_flow_yoy', 'net_debt_yoy', 'unit_sales_yoy']
+RATIO_COLUMNS = ['revenue_per_unit', 'profit_margin', 'debt_to_fcf']
+METRIC_COLUMNS = YOY_COLUMNS + RATIO_COLUMNS
+
+# How each YoY column compares a period with the previous one:
+# "pct" is a percentage change, "diff" an absolute change
+YOY_KIND = {
+    'revenue_yoy': 'pct',
+    'net_profit_yoy': 'diff',
+    'free_cash_flow_yoy': 'diff',
+    'net_debt_yoy': 'pct',
+    'unit_sales_yoy': 'pct',
+}
+
+
+# Compact representation: labels as categoricals (small integer codes plus
+# one copy of each distinct string) and float32 for values and ratios, which
+# keeps ~7 significant digits; £bn amounts and percentages need far fewer
+CATEGORICAL_COLUMNS = ['company', 'fiscal_years']
+COMPACT_FLOAT = np.float32
+
+
+# Reported columns of a long frame in the compact representation; other
+# columns (period_end, ...) are kept as they are
+def compact_columns(frame):
+    columns = {}
+    for column in frame.columns:
+        values = frame[column]
+        if column in CATEGORICAL_COLUMNS:
+            values = values.astype('category')
+        elif column == 'unit_sales':
+            fits = len(values) == 0 or values.abs().max() < np.iinfo(np.int32).max
+            values = values.astype(np.int32 if fits else np.int64)
+        elif column in BASE_COLUMNS:
+            values = values.astype(COMPACT_FLOAT)
+        columns[column] = values
+    return pd.DataFrame(columns, index=frame.index)
+
+
+# First row of every company run in a frame sorted by company then period
+def group_starts(frame):
+    n = len(frame)
+    starts = np.ones(n, dtype=bool)
+    if 'company' in frame and n:
+        codes = pd.factorize(frame['company'])[0]
+        starts[1:] = codes[1:] != codes[:-1]
+    return starts
+
+
+# Previous period's values for every row: a grouped shift done as one array
+# shift, blanking the rows where a new company starts
+def shift_previous(values, starts):
+    prev = np.empty_like(values)
+    prev[1:] = values[:-1]
+    prev[starts] = np.nan
+    return prev
+
+
+# Compute the full ratio set for a long (company, period) table in one pass.
+# `frame` must be sorted by company then period, as store.load_financials
+# returns it; a frame without a company column is treated as one company.
+# With compact=True the result uses the compact representation (see
+# compact_columns) and the arithmetic runs in float32 as well, halving the
+# temporaries.
+# `previous` continues earlier history: a frame indexed by company holding
+# each company's last stored period (BASE_COLUMNS), which the first row of
+# that company in `frame` is compared with. Companies missing from it start
+# fresh.
+def compute_metrics(frame, compact=False, previous=None):
+    dtype = COMPACT_FLOAT if compact else np.float64
+    values = frame[BASE_COLUMNS].to_numpy(dtype=dtype)
+    revenue, net_profit, free_cash_flow, net_debt, unit_sales = values.T
+    starts = group_starts(frame)
+    prev = shift_previous(values, starts)
+    if previous is not None:
+        prev[starts] = previous[BASE_COLUMNS].reindex(frame['company'].to_numpy()[starts]).to_numpy(dtype=dtype)
+
+    # All derived columns are written into one preallocated block, which
+    # becomes the derived columns' single block in the result without a copy
+    out = np.empty((len(frame), len(METRIC_COLUMNS)), dtype=dtype)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        with profiling.span("metrics.yoy", "compute"):
+            for i, column in enumerate(YOY_COLUMNS):
+                if YOY_KIND[column] == 'pct':
+                    out[:, i] = (values[:, i] / prev[:, i] - 1) * 100
+                else:
+                    out[:, i] = values[:, i] - prev[:, i]
+
+            # The first period of each company has no previous year
+            yoy = out[:, :len(YOY_COLUMNS)]
+            yoy[np.isnan(yoy)] = 0
+
+        with profiling.span("metrics.ratios", "compute"):
+            out[:, 5] = (revenue * 1e9) / unit_sales
+            out[:, 6] = (net_profit / revenue) * 100
+            out[:, 7] = net_debt / free_cash_flow
+
+            # Debt/FCF is undefined when free cash flow is zero
+            out[~np.isfinite(out[:, 7]), 7] = np.nan
+
+    if compact:
+        frame = compact_columns(frame)
+    derived = pd.DataFrame(out, columns=METRIC_COLUMNS, index=frame.index, copy=False)
+    return pd.concat([frame, derived], axis=1)
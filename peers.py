@@ -0,0 +1,186 @@
+import argparse
+import json
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import metrics
+import store
+
+# Ratios ranked against peers
+RATIOS = ['revenue_per_unit', 'profit_margin', 'debt_to_fcf']
+
+# Peer groups: every company in the same sector, the same region, or the universe
+GROUPS = ['sector', 'region', 'universe']
+
+ARRAYS = ['company_codes', 'period_days', 'labels', 'values', 'percentiles', 'peer_counts']
+
+
+def default_path(store_path=None):
+    return Path(store_path or store.STORE_PATH) / "peer_index"
+
+
+# Build the peer index offline: per-period percentile ranks of every ratio
+# within each peer group, written as flat arrays sorted by (company, period)
+# so they can be memory-mapped and searched without loading the universe
+def build(store_path=None, out=None):
+    out = Path(out or default_path(store_path))
+    frame = store.load_financials(path=store_path)
+    frame = metrics.compute_metrics(frame, compact=True)
+    # Net debt / FCF only measures leverage while FCF is positive; otherwise
+    # a cash-burning company would rank as the least levered
+    frame['debt_to_fcf'] = frame['debt_to_fcf'].where(frame['free_cash_flow'] > 0)
+
+    company_ids = sorted(frame['company'].unique())
+    companies = store.load_companies(store_path).set_index('company').reindex(company_ids).fillna('Unknown')
+    frame['sector'] = frame['company'].map(companies['sector'])
+    frame['region'] = frame['company'].map(companies['region'])
+    frame['universe'] = 'all'
+
+    frame['company_code'] = pd.Categorical(frame['company'], categories=company_ids).codes
+    frame = frame.sort_values(['company_code', 'period_end'], kind="stable").reset_index(drop=True)
+
+    n = len(frame)
+    percentiles = np.empty((n, len(RATIOS), len(GROUPS)), dtype=np.float32)
+    peer_counts = np.empty((n, len(GROUPS)), dtype=np.int32)
+    for g, group in enumerate(GROUPS):
+        grouped = frame.groupby(['period_end', group], sort=False)
+        peer_counts[:, g] = grouped['company'].transform('size').to_numpy()
+        percentiles[:, :, g] = grouped[RATIOS].rank(pct=True).to_numpy(dtype=np.float32) * 100
+
+    arrays = {
+        'company_codes': frame['company_code'].to_numpy(np.int32),
+        'period_days': frame['period_end'].to_numpy('datetime64[D]').astype(np.int32),
+        'labels': frame['fiscal_years'].to_numpy(str),
+        'values': frame[RATIOS].to_numpy(np.float32),
+        'percentiles': percentiles,
+        'peer_counts': peer_counts,
+    }
+    meta = {
+        'companies': company_ids,
+        'sector': companies['sector'].tolist(),
+        'region': companies['region'].tolist(),
+        'ratios': RATIOS,
+        'groups': GROUPS,
+        'rows': n,
+        'built_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    version = uuid.uuid4().hex
+
+    # Build next to the target and swap it in, so readers never see a partial index
+    out.parent.mkdir(parents=True, exist_ok=True)
+    scratch = Path(tempfile.mkdtemp(dir=out.parent, prefix=".peer_index-"))
+    for name, array in arrays.items():
+        np.save(scratch / f"{name}.npy", array)
+    with open(scratch / "meta.json", "w") as f:
+        json.dump(meta, f)
+    (scratch / "VERSION").write_text(version)
+    store.swap_directory(scratch, out)
+    return meta
+
+
+# Id of the built index, new on every build, or None if it has not been
+# built; a single short file, so checking it costs one small read
+def index_version(store_path=None):
+    try:
+        return (default_path(store_path) / "VERSION").read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# Read-only view over a built index; arrays are memory-mapped, so opening it
+# costs almost nothing and a lookup touches only the rows it needs
+class PeerIndex:
+    def __init__(self, path):
+        path = Path(path)
+        with open(path / "meta.json") as f:
+            self.meta = json.load(f)
+        for name in ARRAYS:
+            setattr(self, name, np.load(path / f"{name}.npy", mmap_mode='r'))
+        self.codes = {company: i for i, company in enumerate(self.meta['companies'])}
+
+    @classmethod
+    def open(cls, store_path=None):
+        if index_version(store_path) is None:
+            return None
+        return cls(default_path(store_path))
+
+    @property
+    def companies(self):
+        return self.meta['companies']
+
+    # Row range of one company (rows are sorted by company, then period)
+    def _rows(self, company):
+        code = self.codes[company]
+        lo = np.searchsorted(self.company_codes, code, side='left')
+        hi = np.searchsorted(self.company_codes, code, side='right')
+        return lo, hi
+
+    # Period labels available for a company, oldest first
+    def periods(self, company):
+        lo, hi = self._rows(company)
+        return self.labels[lo:hi].tolist()
+
+    # Ratios of `company` in `period` (label; default: latest) with their
+    # percentile rank and peer count in every peer group
+    def lookup(self, company, period=None):
+        lo, hi = self._rows(company)
+        if lo == hi:
+            return None
+        labels = self.labels[lo:hi].tolist()
+        row = hi - 1 if period is None else lo + labels.index(period)
+
+        code = self.codes[company]
+        peer_names = {
+            'sector': self.meta['sector'][code],
+            'region': self.meta['region'][code],
+            'universe': 'All companies',
+        }
+        records = []
+        for r, ratio in enumerate(self.meta['ratios']):
+            record = {'ratio': ratio, 'value': float(self.values[row, r])}
+            for g, group in enumerate(self.meta['groups']):
+                record[f'{group}_percentile'] = float(self.percentiles[row, r, g])
+                record[f'{group}_peers'] = int(self.peer_counts[row, g])
+            records.append(record)
+        return {
+            'company': company,
+            'period': str(self.labels[row]),
+            'groups': peer_names,
+            'ratios': records,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the precomputed peer index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="rebuild the index from the store")
+    build_parser.add_argument("--store", help="store directory (default: FINANCIALS_STORE or data/store)")
+    query_parser = sub.add_parser("query", help="look up one company")
+    query_parser.add_argument("company")
+    query_parser.add_argument("--period", help="period label (default: latest)")
+    query_parser.add_argument("--store", help="store directory (default: FINANCIALS_STORE or data/store)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        meta = build(args.store)
+        print(f"Indexed {meta['rows']:,} rows for {len(meta['companies']):,} companies "
+              f"in {time.perf_counter() - start:.1f}s")
+    else:
+        index = PeerIndex.open(args.store)
+        if index is None:
+            parser.error("no peer index; run `python peers.py build` first")
+        start = time.perf_counter()
+        result = index.lookup(args.company, args.period)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(json.dumps(result, indent=2))
+        print(f"lookup took {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Profile every rerun of every session; a single session can opt in with
+# the ?profile=1 query parameter instead
+ENABLED = os.environ.get("FINANCIALS_PROFILE", "") not in ("", "0")
+
+# Spans are appended to one Chrome trace file per server process in this
+# directory; open it in chrome://tracing or https://ui.perfetto.dev
+TRACE_DIR = Path(os.environ.get("FINANCIALS_TRACE_DIR", Path(__file__).parent / "data" / "traces"))
+
+_local = threading.local()
+_write_lock = threading.Lock()
+_trace_started = set()
+
+
+# Spans recorded during one rerun of the script, in completion order.
+# Each span is (name, category, start ns, duration ns, self ns, depth, args).
+class Run:
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.stack = []
+        self.start = time.perf_counter_ns()
+        self.duration = None
+
+
+# Start recording spans for the rerun on this thread; with enabled=False
+# every span is a no-op until the next start_run
+def start_run(name="rerun", enabled=True):
+    _local.run = Run(name) if enabled else None
+    return _local.run
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+# Time the enclosed block as a span of the current run, if there is one.
+# Time spent in nested spans is subtracted from this span's self time.
+@contextmanager
+def span(name, category="app", **args):
+    run = current_run()
+    if run is None:
+        yield
+        return
+
+    # Children add their durations to this slot
+    run.stack.append(0)
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter_ns() - start
+        children = run.stack.pop()
+        if run.stack:
+            run.stack[-1] += duration
+        run.spans.append((name, category, start, duration, duration - children, len(run.stack), args))
+
+
+# Decorator form of span, named after the function unless `name` is given
+def timed(name=None, category="app"):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# Stop recording, append the run's spans to this process's trace file and
+# return the run (None when profiling was off)
+def finish_run():
+    run = current_run()
+    _local.run = None
+    if run is None:
+        return None
+    run.duration = time.perf_counter_ns() - run.start
+    write_trace(run)
+    return run
+
+
+# Chrome trace events of a run: the rerun itself plus one complete ("X")
+# event per span, timestamps in microseconds
+def trace_events(run):
+    pid, tid = os.getpid(), threading.get_ident()
+    events = [{
+        'name': run.name, 'cat': "rerun", 'ph': "X", 'pid': pid, 'tid': tid,
+        'ts': run.start / 1000, 'dur': run.duration / 1000,
+    }]
+    for name, category, start, duration, _, _, args in run.spans:
+        events.append({
+            'name': name, 'cat': category, 'ph': "X", 'pid': pid, 'tid': tid,
+            'ts': start / 1000, 'dur': duration / 1000, 'args': args,
+        })
+    return events
+
+
+# The run as a standalone Chrome trace document
+def trace_json(run):
+    return json.dumps({'traceEvents': trace_events(run), 'displayTimeUnit': "ms"})
+
+
+def trace_path():
+    return TRACE_DIR / f"trace-{os.getpid()}.json"
+
+
+# Append the run's events to the process trace file. The file uses the JSON
+# array trace format, which may be left unterminated, so every rerun is one
+# append and the file is loadable while the server is still running.
+def write_trace(run):
+    path = trace_path()
+    lines = "".join(json.dumps(event) + ",\n" for event in trace_events(run))
+    with _write_lock:
+        if path not in _trace_started:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("[\n")
+            _trace_started.add(path)
+        with open(path, "a") as f:
+            f.write(lines)
+
+
+# Per-rerun breakdown: one row per span name with its call count, total and
+# self time, ordered by self time (where the time actually went)
+def breakdown(run):
+    rows = {}
+    for name, _, _, duration, self_time, depth, _ in run.spans:
+        row = rows.setdefault(name, {'span': name, 'calls': 0, 'total_ms': 0.0, 'self_ms': 0.0, 'depth': depth})
+        row['calls'] += 1
+        row['total_ms'] += duration / 1e6
+        row['self_ms'] += self_time / 1e6
+        row['depth'] = min(row['depth'], depth)
+    total = run.duration or (time.perf_counter_ns() - run.start)
+    for row in rows.values():
+        row['share_pct'] = row['self_ms'] / (total / 1e6) * 100
+    return sorted(rows.values(), key=lambda row: -row['self_ms'])
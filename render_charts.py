@@ -0,0 +1,118 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import matplotlib
+
+# Render off-screen: no GUI backend and no blocking plt.show()
+matplotlib.use("Agg")
+
+import manifest
+import store
+import Visualization
+
+
+# Chart templates built in this process, reused for every company it renders
+_templates = {}
+
+
+def _init_worker():
+    matplotlib.use("Agg")
+
+
+def get_template(chart_id):
+    if chart_id not in _templates:
+        _, template = Visualization.CHARTS[chart_id]
+        _templates[chart_id] = template()
+    return _templates[chart_id]
+
+
+# Render the selected charts for one company, skipping every chart whose
+# manifest key is unchanged; runs inside a worker process
+def render_company(company, charts, output_dir, fmt, dpi, store_path=None, previous=None, force=False):
+    data = store.load_financials([company], columns=Visualization.COLUMNS, path=store_path)
+    if data.empty:
+        return company, [], [], {}
+
+    target = Path(output_dir) / company
+    target.mkdir(parents=True, exist_ok=True)
+
+    written, skipped, entries = [], [], {}
+    for chart_id in charts:
+        name, _ = Visualization.CHARTS[chart_id]
+        relpath = f"{company}/{name}.{fmt}"
+        style = dict(Visualization.STYLE, chart=chart_id, format=fmt, dpi=dpi)
+        key = manifest.chart_key(data, Visualization.chart_source(chart_id), style)
+        entries[relpath] = key
+
+        if not force and manifest.is_current(output_dir, relpath, key, previous or {}):
+            skipped.append(relpath)
+            continue
+
+        get_template(chart_id).save(data, Path(output_dir) / relpath, dpi)
+        written.append(relpath)
+    return company, written, skipped, entries
+
+
+# Render `charts` for every company in a process pool, one task per company.
+# The parent owns the build manifest: workers get the previous entries for
+# their company and report new keys back.
+def render_all(companies, charts, output_dir, fmt="png", dpi=300, workers=None, store_path=None, force=False):
+    previous = manifest.load_manifest(output_dir)
+    entries = dict(previous)
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = []
+        for company in companies:
+            prefix = f"{company}/"
+            company_previous = {k: v for k, v in previous.items() if k.startswith(prefix)}
+            futures.append(pool.submit(
+                render_company, company, charts, output_dir, fmt, dpi, store_path, company_previous, force
+            ))
+        for future in as_completed(futures):
+            company, written, skipped, company_entries = future.result()
+            entries.update(company_entries)
+            results[company] = (written, skipped)
+
+    manifest.save_manifest(output_dir, entries)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the Visualization.py charts headlessly for many companies")
+    parser.add_argument("companies", nargs="*",
+                        help="company ids to render (default: every company in the store)")
+    parser.add_argument("--charts", default=",".join(Visualization.CHARTS),
+                        help=f"comma-separated chart ids from: {', '.join(Visualization.CHARTS)}")
+    parser.add_argument("--output-dir", default="charts")
+    parser.add_argument("--format", default="png", choices=["png", "pdf", "svg", "jpg"])
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--store", help="store directory (default: FINANCIALS_STORE or data/store)")
+    parser.add_argument("--force", action="store_true",
+                        help="re-render every chart even if its inputs are unchanged")
+    args = parser.parse_args()
+
+    charts = [c.strip() for c in args.charts.split(",") if c.strip()]
+    unknown = sorted(set(charts) - set(Visualization.CHARTS))
+    if unknown:
+        parser.error(f"unknown chart ids: {', '.join(unknown)}")
+
+    companies = args.companies or store.list_companies(args.store)
+
+    start = time.perf_counter()
+    results = render_all(companies, charts, args.output_dir, args.format, args.dpi, args.workers, args.store, args.force)
+    elapsed = time.perf_counter() - start
+
+    written = sum(len(w) for w, _ in results.values())
+    skipped = sum(len(s) for _, s in results.values())
+    missing = sorted(company for company, (w, s) in results.items() if not w and not s)
+    print(f"Rendered {written} charts, {skipped} unchanged, for {len(results) - len(missing)} companies in {elapsed:.1f}s")
+    if missing:
+        print(f"No data for: {', '.join(missing)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import argparse
+import hashlib
+import json
+import re
+import time
+
+import numpy as np
+
+# Default projection assumptions; the dashboard exposes each one as a slider
+ASSUMPTIONS = {
+    'years': 5,  # projection horizon in fiscal years
+    'runs': 5000,  # Monte Carlo scenarios
+    'unit_growth': 3.0,  # median unit sales growth, % per year
+    'unit_volatility': 8.0,  # std dev of yearly unit sales growth, %
+    'price_growth': 2.0,  # median revenue-per-unit growth, % per year
+    'price_volatility': 3.0,  # std dev of yearly revenue-per-unit growth, %
+    'target_margin': 8.0,  # profit margin the business reverts towards, %
+    'margin_volatility': 1.5,  # std dev of yearly margin shocks, percentage points
+    'margin_reversion': 0.5,  # share of the gap to the target margin closed each year
+    'fcf_conversion': 0.9,  # free cash flow as a share of net profit
+    'conversion_volatility': 0.25,  # std dev of the yearly conversion ratio
+    'paydown': 0.5,  # share of positive free cash flow used to pay down net debt
+    'seed': 0,
+}
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# Projected series, in the units of the metric table
+SERIES = ['unit_sales', 'revenue_per_unit', 'revenue', 'profit_margin', 'net_profit', 'free_cash_flow', 'net_debt']
+
+
+# Labels for the fiscal years after `label`: FY23/24 -> FY24/25, FY25/26, ...
+def future_labels(label, years):
+    match = re.fullmatch(r'FY(\d{2})/(\d{2})', label)
+    if match is None:
+        return [f"{label} +{i}y" for i in range(1, years + 1)]
+    end = int(match[2])
+    return [f"FY{(end + i - 1) % 100:02d}/{(end + i) % 100:02d}" for i in range(1, years + 1)]
+
+
+# Stable hash of a set of assumptions, for cache keys
+def fingerprint(assumptions):
+    return hashlib.sha1(json.dumps({**ASSUMPTIONS, **assumptions}, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# Project the metric table forward from its last period. Every scenario is a
+# row of a (runs, years) array, so the whole simulation is a handful of array
+# operations:
+#   unit sales and revenue per unit compound lognormal yearly growth;
+#   profit margin is an AR(1) process reverting to the target margin;
+#   free cash flow is net profit times a noisy conversion ratio;
+#   positive FCF pays down net debt at the paydown rate, cash burn adds to it.
+# Paths include the last actual period as column 0.
+def project(data, **assumptions):
+    a = {**ASSUMPTIONS, **assumptions}
+    rng = np.random.default_rng(a['seed'])
+    runs, years = int(a['runs']), int(a['years'])
+    shape = (runs, years)
+    last = data.iloc[-1]
+
+    def compound(start, growth, volatility):
+        steps = rng.normal(np.log1p(growth / 100), volatility / 100, shape)
+        return start * np.exp(np.cumsum(steps, axis=1))
+
+    unit_sales = compound(float(last['unit_sales']), a['unit_growth'], a['unit_volatility'])
+    revenue_per_unit = compound(float(last['revenue_per_unit']), a['price_growth'], a['price_volatility'])
+    revenue = unit_sales * revenue_per_unit / 1e9
+
+    # AR(1) in closed form: m_t = target + d^t (m_0 - target) + sum_{s<=t} d^(t-s) e_s,
+    # with the shock sum as one matrix product against lower-triangular weights
+    decay = 1 - a['margin_reversion']
+    steps = np.arange(1, years + 1)
+    lags = steps[:, None] - steps[None, :]
+    weights = np.where(lags >= 0, decay ** np.maximum(lags, 0), 0.0)
+    shocks = rng.normal(0, a['margin_volatility'], shape)
+    gap = float(last['profit_margin']) - a['target_margin']
+    profit_margin = a['target_margin'] + decay ** steps * gap + shocks @ weights.T
+
+    net_profit = revenue * profit_margin / 100
+    free_cash_flow = net_profit * rng.normal(a['fcf_conversion'], a['conversion_volatility'], shape)
+    repayment = np.where(free_cash_flow > 0, a['paydown'] * free_cash_flow, free_cash_flow)
+    net_debt = float(last['net_debt']) - np.cumsum(repayment, axis=1)
+
+    projected = {
+        'unit_sales': unit_sales,
+        'revenue_per_unit': revenue_per_unit,
+        'revenue': revenue,
+        'profit_margin': profit_margin,
+        'net_profit': net_profit,
+        'free_cash_flow': free_cash_flow,
+        'net_debt': net_debt,
+    }
+    paths = {
+        name: np.column_stack([np.full(runs, float(last[name])), values])
+        for name, values in projected.items()
+    }
+    return {
+        'labels': [last['fiscal_years'], *future_labels(last['fiscal_years'], years)],
+        'history': data[['fiscal_years', *SERIES]],
+        'paths': paths,
+        'percentiles': {name: np.percentile(values, PERCENTILES, axis=0) for name, values in paths.items()},
+        'assumptions': a,
+    }
+
+
+# Value of `series` at percentile `pct` (one of PERCENTILES) for every period
+def percentile(projection, series, pct):
+    return projection['percentiles'][series][PERCENTILES.index(pct)]
+
+
+def main():
+    import financials
+
+    parser = argparse.ArgumentParser(description="Monte Carlo projection of the dashboard metrics")
+    parser.add_argument("--company", default=financials.DEFAULT_COMPANY)
+    parser.add_argument("--runs", type=int, default=ASSUMPTIONS['runs'])
+    parser.add_argument("--years", type=int, default=ASSUMPTIONS['years'])
+    args = parser.parse_args()
+
+    data = financials.load_metrics(args.company)
+    start = time.perf_counter()
+    projection = project(data, runs=args.runs, years=args.years)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    horizon = projection['labels'][-1]
+    print(f"{args.runs:,} scenarios x {args.years} years in {elapsed:.1f} ms; {horizon} percentiles:")
+    for name in SERIES:
+        values = "  ".join(f"P{p}={percentile(projection, name, p)[-1]:,.2f}" for p in PERCENTILES)
+        print(f"  {name:<17} {values}")
+
+
+if __name__ == "__main__":
+    main()
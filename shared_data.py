@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import store
+
+# Serve the dashboard's financials from the published snapshot instead of
+# reading the store in every worker process
+ENABLED = os.environ.get("FINANCIALS_SHARED", "") not in ("", "0")
+
+# Seconds a worker keeps data loaded from a snapshot before checking for a
+# newer one
+TTL = float(os.environ.get("FINANCIALS_SHARED_TTL", "60"))
+
+# Snapshots kept on disk besides the current one, so workers still reading
+# a replaced snapshot are not left with a missing file on their next attach
+KEEP_PREVIOUS = 1
+
+# Snapshot metadata key holding each company's (offset, length) in the table
+INDEX_KEY = b"companies"
+
+_lock = threading.Lock()
+_attached = None
+
+
+def shared_dir(path=None):
+    return Path(path or store.STORE_PATH) / "shared"
+
+
+# One-line pointer file naming the current snapshot; replaced in one rename
+def current_path(path=None):
+    return shared_dir(path) / "CURRENT"
+
+
+# The whole financials table, sorted by company then period, published as
+# the current snapshot. Publishing the same store version again is a no-op.
+# Returns the snapshot file.
+def publish(path=None):
+    version = store.fingerprint(path=path)
+    target = shared_dir(path) / f"financials-{version[:16]}.arrow"
+    if target.exists() and current_version(path) == target.name:
+        return target
+
+    write_snapshot(store.load_financials(path=path, columns=store.SCHEMA.names), target, version)
+    pointer = target.with_name(f".CURRENT.{uuid.uuid4().hex}.tmp")
+    pointer.write_text(target.name)
+    os.replace(pointer, current_path(path))
+    prune(path)
+    return target
+
+
+# Write a frame sorted by company then period as an uncompressed Arrow IPC
+# file that workers memory-map. Every company's rows are contiguous and
+# their position is stored in the schema metadata, so a company is a
+# zero-copy slice.
+def write_snapshot(frame, target, version):
+    companies = frame['company'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, companies[1:] != companies[:-1]]) if len(frame) else np.array([], int)
+    lengths = np.diff(np.r_[starts, len(frame)])
+    index = {companies[s]: [int(s), int(n)] for s, n in zip(starts, lengths)}
+
+    table = pa.Table.from_pandas(frame[store.SCHEMA.names], schema=store.SCHEMA, preserve_index=False)
+    table = table.replace_schema_metadata({INDEX_KEY: json.dumps(index), b"version": version})
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{uuid.uuid4().hex}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, target)
+
+
+# Delete snapshots older than the current one and the KEEP_PREVIOUS before it.
+# Workers that already mapped a deleted file keep reading it until they
+# attach the new one; the pages are freed when the last mapping goes.
+def prune(path=None):
+    current = current_version(path)
+    snapshots = sorted(shared_dir(path).glob("financials-*.arrow"), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    old = [p for p in snapshots if p.name != current][KEEP_PREVIOUS:]
+    for snapshot in old:
+        snapshot.unlink(missing_ok=True)
+
+
+# File name of the current snapshot, or None before the first publish
+def current_version(path=None):
+    try:
+        return current_path(path).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# A memory-mapped snapshot. The table's buffers point into the OS page
+# cache, which every process mapping the same file shares.
+class Snapshot:
+    def __init__(self, file):
+        self.name = Path(file).name
+        self.table = pa.ipc.open_file(pa.memory_map(str(file), "r")).read_all()
+        metadata = self.table.schema.metadata
+        self.version = metadata[b"version"].decode()
+        self.index = json.loads(metadata[INDEX_KEY])
+
+    def select(self, companies=None):
+        if companies is None:
+            return self.table
+        slices = [self.table.slice(*self.index[c]) for c in companies if c in self.index]
+        return pa.concat_tables(slices) if slices else self.table.slice(0, 0)
+
+
+# This process's mapping of the current snapshot, swapped for the new one
+# when the pointer has moved; None when nothing has been published
+def attach(path=None):
+    global _attached
+    name = current_version(path)
+    if name is None:
+        return None
+    with _lock:
+        if _attached is None or _attached.name != name:
+            _attached = Snapshot(shared_dir(path) / name)
+        return _attached
+
+
+# Read like store.load_financials, from the shared snapshot when there is
+# one. Only the selected rows are copied into the returned frame.
+def load_financials(companies=None, start=None, end=None, columns=None, path=None):
+    snapshot = attach(path)
+    if snapshot is None:
+        return store.load_financials(companies, start, end, columns, path=path)
+
+    table = snapshot.select(None if companies is None else list(companies))
+    if start is not None:
+        table = table.filter(pc.field("period_end") >= pa.scalar(pd.Timestamp(start).date(), pa.date32()))
+    if end is not None:
+        table = table.filter(pc.field("period_end") <= pa.scalar(pd.Timestamp(end).date(), pa.date32()))
+    if companies is not None and len(companies) > 1:
+        # Slices come back in the requested order; the store returns company order
+        table = table.sort_by([("company", "ascending"), ("period_end", "ascending")])
+    return table.select(list(columns or store.SCHEMA.names)).to_pandas(date_as_object=False)
+
+
+# Company ids in the shared snapshot, or in the store before one is published
+def list_companies(path=None):
+    snapshot = attach(path)
+    if snapshot is None:
+        return store.list_companies(path)
+    return sorted(snapshot.index)
+
+
+# Version of the data being served: the snapshot's store fingerprint when
+# one is published, else the store's own
+def fingerprint(companies=None, path=None):
+    snapshot = attach(path)
+    if snapshot is None:
+        return store.fingerprint(companies, path=path)
+    return snapshot.version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the store's financials as a shared memory-mapped snapshot")
+    parser.add_argument("--store", help="store directory (default: FINANCIALS_STORE or data/store)")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="keep running and republish whenever the store changes, checking at this interval")
+    args = parser.parse_args()
+
+    while True:
+        start = time.perf_counter()
+        previous = current_version(args.store)
+        target = publish(args.store)
+        if target.name != previous:
+            size = target.stat().st_size / 2**20
+            print(f"Published {target.name} ({size:.1f} MB) in {time.perf_counter() - start:.2f}s")
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
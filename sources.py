@@ -0,0 +1,269 @@
+import argparse
+import asyncio
+import atexit
+import os
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+import store
+
+# Base URL of the financial-data service; when unset the dashboard reads the local store
+SOURCE_URL = os.environ.get("FINANCIALS_SOURCE_URL")
+
+# Seconds a fetched (company, period range) stays fresh
+CACHE_TTL = float(os.environ.get("FINANCIALS_SOURCE_TTL", "300"))
+
+# Maximum open connections to the service per process
+POOL_SIZE = int(os.environ.get("FINANCIALS_SOURCE_POOL", "20"))
+
+# Fetched ranges kept in the TTL cache; expired entries are pruned past this
+CACHE_ENTRIES = 4096
+
+
+# Service rows (period_end as ISO dates) -> the store's long frame. Going
+# through the store schema gives exactly the dtypes store.load_financials returns.
+def to_frame(rows):
+    frame = pd.DataFrame(rows, columns=store.SCHEMA.names)
+    frame['period_end'] = pd.to_datetime(frame['period_end'])
+    table = pa.Table.from_pandas(frame, schema=store.SCHEMA, preserve_index=False)
+    return table.to_pandas(date_as_object=False)
+
+
+# The store's long frame -> JSON-ready service rows
+def to_rows(frame):
+    frame = frame[store.SCHEMA.names].assign(period_end=frame['period_end'].dt.strftime('%Y-%m-%d'))
+    return frame.to_dict('records')
+
+
+def _iso(value):
+    return None if value is None else pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+# A source of financials. fetch() returns one company's rows in the store
+# schema; fetch_many() fans out concurrently and returns the same sorted long
+# frame store.load_financials does; list_companies() returns the sorted ids
+# the source has rows for.
+class DataSource:
+    async def fetch(self, company, start=None, end=None):
+        raise NotImplementedError
+
+    async def list_companies(self):
+        raise NotImplementedError
+
+    async def fetch_many(self, companies, start=None, end=None):
+        frames = await asyncio.gather(*(self.fetch(c, start, end) for c in companies))
+        frame = pd.concat(frames, ignore_index=True) if frames else to_frame([])
+        return frame.sort_values(['company', 'period_end'], kind="stable").reset_index(drop=True)
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+# The local Parquet store behind the async interface; reads run in worker threads
+class StoreSource(DataSource):
+    def __init__(self, path=None):
+        self.path = path
+
+    async def fetch(self, company, start=None, end=None):
+        frame = await asyncio.to_thread(store.load_financials, [company], start, end, None, self.path)
+        return frame[store.SCHEMA.names]
+
+    async def list_companies(self):
+        return await asyncio.to_thread(store.list_companies, self.path)
+
+
+# The financial-data HTTP service: GET <base_url>/financials/<company>?start=&end=
+# returning {"company": ..., "rows": [...]}, and GET <base_url>/companies
+# returning {"companies": [...]}. One pooled session per source;
+# concurrent requests for the same range share one round trip, and results
+# are served from a TTL cache until they expire.
+class HTTPSource(DataSource):
+    def __init__(self, base_url, pool_size=POOL_SIZE, ttl=CACHE_TTL, timeout=10.0):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.ttl = ttl
+        self.timeout = timeout
+        self._session = None
+        self._cache = {}  # key -> (expires, frame)
+        self._inflight = {}  # key -> task fetching it
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0}
+
+    def _get_session(self):
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                raise_for_status=True,
+            )
+        return self._session
+
+    async def fetch(self, company, start=None, end=None):
+        key = (company, _iso(start), _iso(end))
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.stats['cache_hits'] += 1
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._load(key))
+        else:
+            self.stats['coalesced'] += 1
+        # Shielded so one caller being cancelled does not cancel the others
+        return await asyncio.shield(task)
+
+    async def _load(self, key):
+        company, start, end = key
+        params = {k: v for k, v in (('start', start), ('end', end)) if v is not None}
+        try:
+            self.stats['requests'] += 1
+            async with self._get_session().get(f"{self.base_url}/financials/{company}", params=params) as response:
+                payload = await response.json()
+            frame = to_frame(payload['rows'])
+            self._store(key, frame)
+            return frame
+        finally:
+            self._inflight.pop(key, None)
+
+    async def list_companies(self):
+        self.stats['requests'] += 1
+        async with self._get_session().get(f"{self.base_url}/companies") as response:
+            payload = await response.json()
+        return sorted(payload['companies'])
+
+    def _store(self, key, frame):
+        now = time.monotonic()
+        if len(self._cache) >= CACHE_ENTRIES:
+            self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+        self._cache[key] = (now + self.ttl, frame)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+# Streamlit scripts are synchronous; async sources run on one background event
+# loop per process so their connection pool and cache outlive single reruns
+_loop = None
+_loop_lock = threading.Lock()
+_default_source = None
+
+
+def run_sync(coro):
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="sources-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+
+# The configured live source (FINANCIALS_SOURCE_URL), or None to use the store
+def default_source():
+    global _default_source
+    if SOURCE_URL is None:
+        return None
+    with _loop_lock:
+        if _default_source is None:
+            _default_source = HTTPSource(SOURCE_URL)
+            atexit.register(run_sync, _default_source.close())
+    return _default_source
+
+
+# Blocking fetch of several companies from `source` (default: the live source)
+def load(companies, start=None, end=None, source=None):
+    return run_sync((source or default_source()).fetch_many(companies, start, end))
+
+
+# Blocking list of the companies `source` (default: the live source) serves
+def list_companies(source=None):
+    return run_sync((source or default_source()).list_companies())
+
+
+# A stand-in for the financial-data service that serves the local store, so
+# the HTTP path can be exercised offline; `latency` seconds are added per
+# request, and requests served are counted in `counts['requests']` when a
+# dict is given
+def make_stub_app(store_path=None, latency=0.0, counts=None):
+    from aiohttp import web
+
+    counts = {} if counts is None else counts
+    counts['requests'] = 0
+
+    async def financials(request):
+        if latency:
+            await asyncio.sleep(latency)
+        counts['requests'] += 1
+        company = request.match_info['company']
+        frame = await asyncio.to_thread(
+            store.load_financials, [company], request.query.get('start'), request.query.get('end'), None, store_path
+        )
+        return web.json_response({'company': company, 'rows': to_rows(frame)})
+
+    async def companies(request):
+        counts['requests'] += 1
+        return web.json_response({'companies': await asyncio.to_thread(store.list_companies, store_path)})
+
+    app = web.Application()
+    app.router.add_get('/financials/{company}', financials)
+    app.router.add_get('/companies', companies)
+    return app
+
+
+# Start the stub in the running event loop; returns (runner, base_url)
+async def start_stub(store_path=None, host="127.0.0.1", port=0, latency=0.0, counts=None):
+    from aiohttp import web
+
+    runner = web.AppRunner(make_stub_app(store_path, latency, counts))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Financial-data service stub and fetch client")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="serve the local store over HTTP")
+    serve_parser.add_argument("--store", help="store directory (default: FINANCIALS_STORE or data/store)")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every response")
+    fetch_parser = sub.add_parser("fetch", help="fetch companies concurrently and print a summary")
+    fetch_parser.add_argument("companies", nargs="+")
+    fetch_parser.add_argument("--url", default=SOURCE_URL or "http://127.0.0.1:8765")
+    fetch_parser.add_argument("--start")
+    fetch_parser.add_argument("--end")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        from aiohttp import web
+
+        web.run_app(make_stub_app(args.store, args.latency_ms / 1000), host=args.host, port=args.port)
+        return
+
+    async def fetch():
+        async with HTTPSource(args.url) as source:
+            start = time.perf_counter()
+            frame = await source.fetch_many(args.companies, args.start, args.end)
+            return frame, time.perf_counter() - start, source.stats
+
+    frame, seconds, stats = asyncio.run(fetch())
+    print(frame)
+    print(f"{len(frame)} rows for {len(args.companies)} companies in {seconds * 1000:.0f} ms "
+          f"({stats['requests']} requests, {stats['coalesced']} coalesced)")
+
+
+if __name__ == "__main__":
+    main()
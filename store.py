@@ -0,0 +1,242 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Root of the columnar store; override with the FINANCIALS_STORE env var
+STORE_PATH = Path(os.environ.get("FINANCIALS_STORE", Path(__file__).parent / "data" / "store"))
+
+# Long (company, period) layout: one row per company per reporting period
+SCHEMA = pa.schema([
+    ("company", pa.string()),
+    ("fiscal_years", pa.string()),  # period label, e.g. FY23/24 or 2023Q4
+    ("period_end", pa.date32()),
+    ("revenue", pa.float64()),  # in billion £
+    ("net_profit", pa.float64()),  # in billion £, profit before tax & exceptional items
+    ("free_cash_flow", pa.float64()),  # in billion £
+    ("net_debt", pa.float64()),  # in billion £
+    ("unit_sales", pa.int64()),  # number of units
+])
+
+# Files are laid out as financials/company=<id>/year=<yyyy>/part-*.parquet so
+# filters on company and period prune whole directories before any file is opened
+PARTITIONING = ds.partitioning(
+    pa.schema([("company", pa.string()), ("year", pa.int32())]),
+    flavor="hive"
+)
+
+# JLR figures from the annual reports, used to seed an empty store
+SEED = pd.DataFrame({
+    'company': 'JLR',
+    'fiscal_years': ['FY21/22', 'FY22/23', 'FY23/24'],
+    'period_end': pd.to_datetime(['2022-03-31', '2023-03-31', '2024-03-31']).date,
+    'revenue': [18.3, 22.8, 29.0],
+    'net_profit': [-0.4, -0.1, 2.2],
+    'free_cash_flow': [-1.1, 0.5, 2.3],
+    'net_debt': [3.2, 3.0, 0.7],
+    'unit_sales': [376381, 354662, 431733]
+})
+
+# Company reference data: peer-group membership for each company id
+COMPANY_SCHEMA = pa.schema([
+    ("company", pa.string()),
+    ("name", pa.string()),
+    ("sector", pa.string()),
+    ("region", pa.string()),
+])
+
+SEED_COMPANIES = pd.DataFrame({
+    'company': ['JLR'],
+    'name': ['Jaguar Land Rover'],
+    'sector': ['Automotive'],
+    'region': ['Europe'],
+})
+
+# Sales rows: one row per (company, period, brand, region, model line) sale
+# record; the source of the drill-down cube
+SALES_SCHEMA = pa.schema([
+    ("company", pa.string()),
+    ("fiscal_years", pa.string()),
+    ("period_end", pa.date32()),
+    ("brand", pa.string()),  # e.g. Jaguar, Land Rover, Range Rover, Defender
+    ("region", pa.string()),
+    ("model", pa.string()),  # model line
+    ("unit_sales", pa.int64()),
+    ("revenue", pa.float64()),  # in billion £
+])
+
+_seed_lock = threading.Lock()
+
+
+def _dataset_path(path=None, name="financials"):
+    return Path(path or STORE_PATH) / name
+
+
+# Write a long (company, period) frame into the store.
+# mode="replace" rewrites every company/year partition present in `frame`;
+# mode="append" adds new files next to the existing ones and never touches them.
+def write_financials(frame, path=None, mode="replace", name="financials", schema=SCHEMA):
+    table = pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+    years = pa.array(pd.to_datetime(frame['period_end']).dt.year.to_numpy(), pa.int32())
+    table = table.append_column("year", years)
+
+    ds.write_dataset(
+        table,
+        _dataset_path(path, name),
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        max_partitions=max(1024, len(table)),
+        existing_data_behavior="delete_matching" if mode == "replace" else "overwrite_or_ignore",
+    )
+
+
+# One row per (company, period_end), sorted. Where a key repeats, each
+# column keeps its last non-null value, so later rows override earlier ones
+# and fill in nothing they do not report.
+def latest_rows(frame):
+    return frame.groupby(['company', 'period_end'], as_index=False, sort=True).last()[list(frame.columns)]
+
+
+# Insert or update rows by (company, period_end). The (company, year)
+# partitions the rows fall in are read, merged with them (latest_rows, new
+# rows last) and rewritten, so the other periods in those partitions stay.
+def upsert_financials(frame, path=None, name="financials", schema=SCHEMA):
+    frame = frame[schema.names].copy()
+    frame['period_end'] = pd.to_datetime(frame['period_end'])
+    if frame.empty:
+        return
+
+    years = frame['period_end'].dt.year
+    existing = load_financials(
+        frame['company'].unique().tolist(), start=f"{years.min()}-01-01", end=f"{years.max()}-12-31",
+        columns=schema.names, path=path, name=name
+    )
+    touched = pd.MultiIndex.from_arrays([frame['company'], years]).unique()
+    keys = pd.MultiIndex.from_arrays([existing['company'], existing['period_end'].dt.year])
+    merged = pd.concat([existing[keys.isin(touched)], frame], ignore_index=True)
+    write_financials(latest_rows(merged), path=path, name=name, schema=schema)
+
+
+# Read a slice of the store. Company and period filters are pushed down to
+# partition directories and Parquet row-group statistics, and only the
+# requested columns are decoded.
+def load_financials(companies=None, start=None, end=None, columns=None, path=None, name="financials"):
+    ensure_store(path)
+    dataset = ds.dataset(_dataset_path(path, name), format="parquet", partitioning=PARTITIONING)
+
+    filters = []
+    if companies is not None:
+        filters.append(ds.field("company").isin(list(companies)))
+    if start is not None:
+        start = pd.Timestamp(start)
+        filters.append(ds.field("year") >= start.year)
+        filters.append(ds.field("period_end") >= pa.scalar(start.date(), pa.date32()))
+    if end is not None:
+        end = pd.Timestamp(end)
+        filters.append(ds.field("year") <= end.year)
+        filters.append(ds.field("period_end") <= pa.scalar(end.date(), pa.date32()))
+
+    filter_expr = None
+    for expr in filters:
+        filter_expr = expr if filter_expr is None else filter_expr & expr
+
+    # Always read the sort keys, drop them afterwards if they were not asked for
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys(['company', 'period_end', *columns]))
+
+    frame = dataset.to_table(columns=read_columns, filter=filter_expr).to_pandas(date_as_object=False)
+    frame = frame.sort_values(['company', 'period_end'], kind="stable").reset_index(drop=True)
+
+    if columns is None:
+        columns = ['company', *(c for c in frame.columns if c not in ('company', 'year'))]
+    return frame[list(columns)]
+
+
+# Sales rows go to their own dataset, partitioned like the financials
+def write_sales(frame, path=None, mode="replace"):
+    write_financials(frame, path=path, mode=mode, name="sales", schema=SALES_SCHEMA)
+
+
+# Move a freshly built directory into place, replacing `target` if it
+# exists, so readers see either the old or the new contents in full
+def swap_directory(scratch, target):
+    old = None
+    if target.exists():
+        old = target.with_name(f".{target.name}-old-{os.getpid()}")
+        os.replace(target, old)
+    os.replace(scratch, target)
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+# Replace the company reference table (a single small Parquet file)
+def write_companies(frame, path=None):
+    target = Path(path or STORE_PATH) / "companies.parquet"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(frame[COMPANY_SCHEMA.names], schema=COMPANY_SCHEMA, preserve_index=False)
+    tmp = target.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, target)
+
+
+# Company reference table; stores without one fall back to the seed entries
+def load_companies(path=None):
+    target = Path(path or STORE_PATH) / "companies.parquet"
+    if not target.exists():
+        return SEED_COMPANIES.copy()
+    return pq.read_table(target).to_pandas()
+
+
+# Cheap change marker for the files holding `companies` (default: all):
+# every write adds or replaces part files, so names, sizes and mtimes differ
+def fingerprint(companies=None, path=None, name="financials"):
+    ensure_store(path)
+    root = _dataset_path(path, name)
+    dirs = [root / f"company={c}" for c in companies] if companies is not None else [root]
+    digest = hashlib.sha1()
+    for directory in dirs:
+        for file in sorted(directory.rglob("*.parquet")):
+            stat = file.stat()
+            digest.update(f"{file.relative_to(root)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+# Company ids present in the store, read from the partition directory names
+def list_companies(path=None, name="financials"):
+    ensure_store(path)
+    return sorted(p.name.split("=", 1)[1] for p in _dataset_path(path, name).glob("company=*"))
+
+
+# Create the store with the seed data the first time it is used. The store is
+# built in a scratch directory and moved into place so concurrent readers
+# never see a half-written dataset.
+def ensure_store(path=None):
+    target = _dataset_path(path)
+    if target.exists():
+        return
+
+    with _seed_lock:
+        if target.exists():
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        scratch = Path(tempfile.mkdtemp(dir=target.parent))
+        try:
+            write_financials(SEED, path=scratch)
+            if not (target.parent / "companies.parquet").exists():
+                write_companies(SEED_COMPANIES, path=target.parent)
+            os.replace(scratch / target.name, target)
+        except OSError:
+            if not target.exists():
+                raise
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,37 @@
+import commentary
+import export_report
+
+
+def section(title):
+    return next(blocks for name, blocks in export_report.REPORT if name == title)
+
+
+def subheadings(blocks):
+    return [value for kind, value in export_report.walk_blocks(blocks) if kind == "subheading"]
+
+
+def test_strategy_headings_follow_the_company():
+    text = {'operational_drivers': "Ops", 'strategic_drivers': "Strategy", 'outlook': "Outlook"}
+    blocks = export_report.resolve_blocks(
+        section("Strategic Analysis & Future Outlook"), text, commentary.headings("JLR")
+    )
+    assert subheadings(blocks) == [
+        "Key Drivers of JLR's Financial Turnaround",
+        "'Reimagine' Strategy Impact on Financial Performance",
+        "Scenario Projections",
+        "Future Outlook & Strategic Implications",
+    ]
+
+
+def test_headings_without_text_are_left_out():
+    text = {'operational_drivers': "", 'strategic_drivers': "", 'outlook': " ",
+            'profitability_analysis': "Margins", 'operating_efficiency': ""}
+    strategic = export_report.resolve_blocks(
+        section("Strategic Analysis & Future Outlook"), text, commentary.headings("ACME")
+    )
+    profitability = export_report.resolve_blocks(
+        section("Profitability & Operating Performance"), text, commentary.headings("ACME")
+    )
+    assert subheadings(strategic) == ["Strategic Indicators", "Scenario Projections"]
+    assert [value for kind, value in export_report.walk_blocks(strategic) if kind == "commentary"] == []
+    assert subheadings(profitability) == ["Profitability Analysis"]
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+import streamlit as st
+
+import disk_cache
+import financials
+import store
+
+
+@pytest.fixture
+def acme_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "STORE_PATH", tmp_path / "store")
+    monkeypatch.setattr(disk_cache, "CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    store.write_financials(pd.DataFrame({
+        'company': 'ACME',
+        'fiscal_years': ['FY21/22', 'FY22/23', 'FY23/24'],
+        'period_end': pd.to_datetime(['2022-03-31', '2023-03-31', '2024-03-31']),
+        'revenue': [10.0, 12.0, 15.0],
+        'net_profit': [0.5, 1.0, 0.8],
+        'free_cash_flow': [0.2, 0.4, 0.6],
+        'net_debt': [2.0, 1.5, 1.2],
+        'unit_sales': [1000, 1100, 1200],
+    }), path=store.STORE_PATH)
+    st.cache_data.clear()
+    yield
+    st.cache_data.clear()
+
+
+def test_range_keeps_changes_against_the_period_before_it(acme_store):
+    full = financials.load_metrics("ACME")
+    ranged = financials.load_metrics("ACME", start=pd.Timestamp('2023-03-31'))
+
+    assert list(ranged['fiscal_years']) == ['FY22/23', 'FY23/24']
+    pd.testing.assert_frame_equal(ranged, full.iloc[1:].reset_index(drop=True))
+    assert ranged['revenue_yoy'].iloc[0] == pytest.approx(20.0)
+    assert ranged['net_profit_yoy'].iloc[0] == pytest.approx(0.5)
+
+
+def test_end_of_range_is_inclusive(acme_store):
+    ranged = financials.load_metrics("ACME", end=pd.Timestamp('2023-03-31'))
+    assert list(ranged['fiscal_years']) == ['FY21/22', 'FY22/23']
+    assert 'period_end' not in ranged
@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+
+import incremental
+import store
+
+
+def quarters(labels, revenue):
+    return pd.DataFrame({
+        'company': 'ACME',
+        'fiscal_years': labels,
+        'period_end': pd.to_datetime([f"{label[:4]}-{3 * int(label[-1]):02d}-28" for label in labels]),
+        'revenue': revenue,
+        'net_profit': 0.1,
+        'free_cash_flow': 0.2,
+        'net_debt': 1.0,
+        'unit_sales': 1000,
+    })
+
+
+def test_past_period_is_corrected_with_upsert_and_rebuild(tmp_path):
+    store.write_financials(quarters(["2023Q1", "2023Q2"], [1.0, 2.0]), path=tmp_path)
+    incremental.append_periods(quarters(["2023Q3", "2023Q4"], [3.0, 4.0]), path=tmp_path)
+
+    correction = quarters(["2023Q2"], [2.5])
+    with pytest.raises(ValueError, match="store.upsert_financials"):
+        incremental.append_periods(correction, path=tmp_path)
+    store.upsert_financials(correction, path=tmp_path)
+    incremental.rebuild(tmp_path)
+
+    rows = incremental.load_metrics(["ACME"], path=tmp_path)
+    assert list(rows['fiscal_years']) == ["2023Q1", "2023Q2", "2023Q3", "2023Q4"]
+    assert list(rows['revenue']) == [1.0, 2.5, 3.0, 4.0]
+    assert rows['revenue_yoy'].iloc[2] == pytest.approx(20.0)
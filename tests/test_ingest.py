@@ -0,0 +1,120 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import ingest
+import store
+
+CONTENT = Path(__file__).resolve().parent.parent / "content.txt"
+
+
+def quarter_report(period, revenue, units):
+    return (
+        "Revenue Trends:\n"
+        f"{period}: Revenue stood at £{revenue} billion.\n"
+        "Unit Sales:\n"
+        f"{period}: {units:,} units sold.\n"
+        "Net Profit (Before Tax & Exceptional Items):\n"
+        f"{period}: A loss of £0.2 billion.\n"
+    )
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return tmp_path / "store"
+
+
+def test_extract_records_from_report():
+    with open(CONTENT, encoding="utf-8") as f:
+        records = list(ingest.extract_records(line.strip() for line in f))
+    rows = pd.DataFrame(ingest.document_rows("JLR", records))[store.SCHEMA.names]
+
+    expected = store.SEED.assign(period_end=pd.to_datetime(store.SEED['period_end']))
+    pd.testing.assert_frame_equal(rows, expected, check_dtype=False)
+
+
+def test_extract_records_signs_and_scales():
+    lines = [
+        "Free Cash Flow:",
+        "FY21/22: Free cash flow was (–£1.1) billion.",
+        "FY22/23: Free cash flow was £(450) million.",
+        "FY23/24: Free cash flow was £2.3 bn.",
+        "Reasoning:",
+        "FY23/24: £9.9 billion outside any section.",
+    ]
+    assert list(ingest.extract_records(lines)) == [
+        ('free_cash_flow', 'FY21/22', -1.1, '£bn'),
+        ('free_cash_flow', 'FY22/23', -0.45, '£bn'),
+        ('free_cash_flow', 'FY23/24', 2.3, '£bn'),
+    ]
+
+
+def test_batches_keep_earlier_periods_of_the_same_year(tmp_path, store_path):
+    filings = tmp_path / "filings"
+    filings.mkdir()
+    for quarter in range(1, 5):
+        text = quarter_report(f"2023Q{quarter}", 1.0 + quarter, 1000 * quarter)
+        (filings / f"ACME_2023Q{quarter}.txt").write_text(text, encoding="utf-8")
+
+    stats = ingest.ingest([filings], batch_size=2, store_path=store_path)
+    rows = store.load_financials(["ACME"], path=store_path)
+
+    assert stats['documents'] == 4
+    assert list(rows['fiscal_years']) == ["2023Q1", "2023Q2", "2023Q3", "2023Q4"]
+    assert list(rows['revenue']) == [2.0, 3.0, 4.0, 5.0]
+    assert list(rows['net_profit']) == [-0.2] * 4
+
+
+def test_restated_period_keeps_the_latest_filing(tmp_path, store_path):
+    filings = tmp_path / "filings"
+    filings.mkdir()
+    (filings / "ACME_2023.txt").write_text(
+        "Revenue Trends:\nFY21/22: £10.0 billion.\nFY22/23: £11.0 billion.\n"
+        "Net Debt:\nFY21/22: £3.0 billion.\nFY22/23: £2.5 billion.\n",
+        encoding="utf-8",
+    )
+    (filings / "ACME_2024.txt").write_text(
+        "Revenue Trends:\nFY22/23: £11.4 billion.\nFY23/24: £12.0 billion.\n",
+        encoding="utf-8",
+    )
+
+    for batch_size in (1, 2):
+        path = store_path / str(batch_size)
+        ingest.ingest([filings], batch_size=batch_size, store_path=path)
+        rows = store.load_financials(["ACME"], path=path)
+
+        assert list(rows['fiscal_years']) == ["FY21/22", "FY22/23", "FY23/24"]
+        assert list(rows['revenue']) == [10.0, 11.4, 12.0]
+        # Figures the restating filing does not report are kept
+        assert rows['net_debt'].iloc[1] == 2.5
+
+
+@pytest.mark.parametrize("label, end", [
+    ("FY21/22", "2022-03-31"),
+    ("FY98/99", "1999-03-31"),
+    ("FY99/00", "2000-03-31"),
+    ("FY69/70", "1970-03-31"),
+    ("FY68/69", "2069-03-31"),
+    ("FY98", "1998-03-31"),
+    ("FY1998/99", "1999-03-31"),
+    ("FY1999/2000", "2000-03-31"),
+    ("FY2024", "2024-03-31"),
+    ("2023Q4", "2023-12-31"),
+])
+def test_period_end(label, end):
+    assert ingest.period_end(label) == pd.Timestamp(end)
+
+
+def test_last_century_sorts_before_this_one(tmp_path, store_path):
+    filings = tmp_path / "filings"
+    filings.mkdir()
+    (filings / "ACME_2024.txt").write_text(
+        "Revenue Trends:\nFY98: £1.0 billion.\nFY2001/02: £1.5 billion.\nFY23/24: £2.0 billion.\n",
+        encoding="utf-8",
+    )
+    ingest.ingest([filings], store_path=store_path)
+    rows = store.load_financials(["ACME"], path=store_path)
+
+    assert list(rows['fiscal_years']) == ["FY98", "FY2001/02", "FY23/24"]
+    assert list(rows['period_end'].dt.year) == [1998, 2002, 2024]
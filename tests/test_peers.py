@@ -0,0 +1,51 @@
+import math
+
+import pandas as pd
+
+import peers
+import store
+
+
+def test_debt_to_fcf_is_not_ranked_without_positive_fcf(tmp_path):
+    frame = pd.DataFrame({
+        'company': ['A', 'B', 'C'],
+        'fiscal_years': 'FY23/24',
+        'period_end': pd.Timestamp('2024-03-31'),
+        'revenue': 10.0,
+        'net_profit': 1.0,
+        'free_cash_flow': [-0.5, 1.0, 0.5],
+        'net_debt': [2.0, 4.0, 1.0],
+        'unit_sales': 1000,
+    })
+    store.write_financials(frame, path=tmp_path)
+    store.write_companies(pd.DataFrame({
+        'company': ['A', 'B', 'C'], 'name': ['A', 'B', 'C'], 'sector': 'Automotive', 'region': 'Europe',
+    }), path=tmp_path)
+    peers.build(tmp_path)
+    index = peers.PeerIndex.open(tmp_path)
+
+    def debt_to_fcf(company):
+        record = next(r for r in index.lookup(company)['ratios'] if r['ratio'] == 'debt_to_fcf')
+        return record['value'], record['universe_percentile']
+
+    value, percentile = debt_to_fcf('A')
+    assert math.isnan(value) and math.isnan(percentile)
+    assert debt_to_fcf('C') == (2.0, 50.0)
+    assert debt_to_fcf('B') == (4.0, 100.0)
+
+
+def test_rebuild_changes_the_version(tmp_path):
+    assert peers.index_version(tmp_path) is None and peers.PeerIndex.open(tmp_path) is None
+    store.write_financials(pd.DataFrame({
+        'company': 'A', 'fiscal_years': ['FY22/23', 'FY23/24'],
+        'period_end': pd.to_datetime(['2023-03-31', '2024-03-31']),
+        'revenue': 10.0, 'net_profit': 1.0, 'free_cash_flow': 0.5, 'net_debt': 1.0, 'unit_sales': 1000,
+    }), path=tmp_path)
+    peers.build(tmp_path)
+    first = peers.index_version(tmp_path)
+    index = peers.PeerIndex.open(tmp_path)
+    assert index.periods('A') == ['FY22/23', 'FY23/24']
+    assert index.lookup('A', 'FY22/23')['period'] == 'FY22/23'
+
+    peers.build(tmp_path)
+    assert peers.index_version(tmp_path) not in (None, first)
@@ -0,0 +1,90 @@
+import asyncio
+
+import pandas as pd
+
+import sources
+import store
+
+
+def write_acme(path):
+    store.write_financials(pd.DataFrame({
+        'company': 'ACME',
+        'fiscal_years': ['FY22/23', 'FY23/24'],
+        'period_end': pd.to_datetime(['2023-03-31', '2024-03-31']),
+        'revenue': [10.0, 12.5],
+        'net_profit': [0.5, -0.2],
+        'free_cash_flow': [0.3, 0.4],
+        'net_debt': [2.0, 1.8],
+        'unit_sales': [1000, 1200],
+    }), path=path)
+
+
+# Run `scenario(source, counts)` against the stub serving `path` on an
+# ephemeral port; counts['requests'] is the number of requests it served
+def with_stub(path, scenario, ttl=60.0, latency=0.05):
+    async def run():
+        counts = {}
+        runner, base_url = await sources.start_stub(path, latency=latency, counts=counts)
+        try:
+            async with sources.HTTPSource(base_url, ttl=ttl) as source:
+                return await scenario(source, counts)
+        finally:
+            await runner.cleanup()
+    return asyncio.run(run())
+
+
+def test_concurrent_fetches_share_one_request(tmp_path):
+    write_acme(tmp_path)
+
+    async def scenario(source, counts):
+        frame = await source.fetch_many(["ACME", "ACME", "ACME"])
+        return frame, dict(source.stats), counts['requests']
+
+    frame, stats, served = with_stub(tmp_path, scenario)
+    assert served == 1
+    assert stats['requests'] == 1 and stats['coalesced'] == 2
+    assert len(frame) == 6
+
+
+def test_repeat_within_ttl_is_served_from_cache(tmp_path):
+    write_acme(tmp_path)
+
+    async def scenario(source, counts):
+        first = await source.fetch("ACME")
+        second = await source.fetch("ACME")
+        return first, second, dict(source.stats), counts['requests']
+
+    first, second, stats, served = with_stub(tmp_path, scenario)
+    assert served == 1 and stats['cache_hits'] == 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_expired_entry_is_fetched_again(tmp_path):
+    write_acme(tmp_path)
+
+    async def scenario(source, counts):
+        await source.fetch("ACME")
+        await asyncio.sleep(0.1)
+        await source.fetch("ACME")
+        return dict(source.stats), counts['requests']
+
+    stats, served = with_stub(tmp_path, scenario, ttl=0.05, latency=0.0)
+    assert served == 2 and stats['cache_hits'] == 0
+
+
+def test_fetched_frame_matches_the_store(tmp_path):
+    write_acme(tmp_path)
+
+    async def scenario(source, counts):
+        return (
+            await source.fetch_many(["ACME"]),
+            await source.fetch_many(["ACME"], start="2024-01-01"),
+            await source.list_companies(),
+        )
+
+    frame, ranged, companies = with_stub(tmp_path, scenario)
+    pd.testing.assert_frame_equal(frame, store.load_financials(["ACME"], path=tmp_path)[store.SCHEMA.names])
+    pd.testing.assert_frame_equal(
+        ranged, store.load_financials(["ACME"], start="2024-01-01", path=tmp_path)[store.SCHEMA.names]
+    )
+    assert companies == ["ACME"]